@@ -0,0 +1,472 @@
+"""
+Mood Analytics
+--------------
+Journal-wide analytics for the mood tracker. The journal is loaded once into two
+columns: day ordinals (an array of ints) and rasa numbers (bytes, one per entry),
+sorted by date. Every statistic is then computed from these columns:
+
+- Rolling 7/30/90-day rasa distributions ending on the latest entry.
+- The longest streak of consecutive days spent in each rasa.
+- The 9x9 rasa-to-rasa transition matrix between consecutive entries.
+- Year-over-year rasa counts.
+- Rasa counts for any date range, answered in O(1) per rasa from cumulative
+  per-day counts (RangeCounter).
+
+The heavy lifting is done by operations that run in C rather than Python loops:
+bisect to find date boundaries, bytes.count to count rasas in a slice, bytes.find
+to measure runs of a rasa, and big-integer arithmetic to pair up consecutive entries.
+Where a loop is left, it steps from one day to the next with bisect, so it runs
+once per day rather than once per entry.
+
+For journals of NUMPY_MIN_ROWS entries or more, the day-by-day rasas, the transition
+matrix and the RangeCounter totals are computed with NumPy if it is installed
+(pip install numpy). It is optional: without it the same results come from the
+pure Python paths, only more slowly on journals of millions of entries.
+
+Journals in the binary format load fastest, since their columns are read straight
+from disk; CSV journals are read with the memory-mapped scanner in fast_reader.py.
+"""
+import calendar
+import operator
+import os
+import re
+from array import array
+from itertools import accumulate, islice
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date, timedelta
+
+from binary_journal import BinaryJournal
+from fast_reader import MONTH_NUMBERS, read_columns
+from rasas import REGISTRY, rasa_dict
+from storage import SQLITE_SUFFIXES, SqliteStorage
+
+# Windows (in days) of the rolling rasa distributions
+ROLLING_WINDOWS = (7, 30, 90)
+
+# Columns with at least this many entries use NumPy when it is installed; for smaller
+# ones the pure Python paths finish before NumPy would even be imported
+NUMPY_MIN_ROWS = 200_000
+
+# Day ordinals and rasa numbers of every entry, sorted by date
+JournalColumns = namedtuple("JournalColumns", ["days", "rasas"])
+
+
+def _numpy(rows):
+    """Return the numpy module for columns of rows entries, or None to use the pure Python paths."""
+    if rows < NUMPY_MIN_ROWS:
+        return None
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# =================== Loading ===================
+def load_columns(path):
+    """
+    Load a journal (CSV, SQLite or binary) into JournalColumns sorted by date.
+
+    Entries recorded on the same day keep their journal order.
+    Rows with an unknown rasa or an unreadable date are skipped.
+    """
+    if path.lower().endswith(".nvj"):
+        with BinaryJournal(path) as journal:
+            days = array(journal.days.typecode, journal.days)
+            rasas = bytes(journal.rasas)
+            already_sorted = journal.is_sorted
+    elif path.lower().endswith(SQLITE_SUFFIXES):
+        storage = SqliteStorage(path)
+        days = array("l")
+        rasas = bytearray()
+        cursor = storage.connection.execute(
+            "SELECT entry_date, rasa_id FROM entries ORDER BY entry_date, id")
+        for iso_date, rasa_id in cursor:
+            days.append(date.fromisoformat(iso_date).toordinal())
+            rasas.append(rasa_id)
+        storage.close()
+        rasas = bytes(rasas)
+        already_sorted = True
+    else:
+        days, rasas = read_columns(path)
+        already_sorted = False
+
+    if not already_sorted:
+        days, rasas = _sort_columns(days, rasas)
+    return JournalColumns(days, rasas)
+
+
+def _sort_columns(days, rasas):
+    # Skip the sort when the journal was written in date order, as it usually is
+    if all(map(operator.le, days, islice(days, 1, None))):
+        return days, rasas
+    order = sorted(range(len(days)), key=days.__getitem__)
+    return array(days.typecode, [days[i] for i in order]), bytes(rasas[i] for i in order)
+
+
+# =================== Statistics ===================
+def rasa_counts(rasas):
+    """Return a dictionary of rasa number -> number of entries in a rasa column."""
+    return {rasa_id: rasas.count(code) for rasa_id, code in REGISTRY.codes.items()}
+
+
+def day_spans(days):
+    """
+    Yield (day ordinal, start, end) for every day in a sorted day column, where
+    [start, end) are the positions of that day's entries.
+    """
+    start = 0
+    while start < len(days):
+        day = days[start]
+        end = bisect_right(days, day, start)
+        yield day, start, end
+        start = end
+
+
+def rolling_distribution(columns, window, end_day=None):
+    """
+    Return the rasa counts of the entries in the window days ending on end_day
+    (the date of the latest entry by default).
+    """
+    if not columns.days:
+        return rasa_counts(b"")
+    if end_day is None:
+        end_day = columns.days[-1]
+    first = bisect_right(columns.days, end_day - window)
+    last = bisect_right(columns.days, end_day)
+    return rasa_counts(columns.rasas[first:last])
+
+
+def day_rasas(columns):
+    """
+    Return (first day ordinal, bytes with the rasa of each calendar day).
+
+    Days without entries hold 0; on days with several entries the last one wins,
+    as in the calendar view.
+    """
+    if not columns.days:
+        return 0, b""
+    first_day = columns.days[0]
+    np = _numpy(len(columns.days))
+    if np is not None:
+        days = np.asarray(columns.days)
+        rasas = np.frombuffer(columns.rasas, dtype=np.uint8)
+        # The last entry of each day is the one followed by a different day (or none)
+        last = np.append(np.flatnonzero(days[1:] != days[:-1]), len(days) - 1)
+        by_day = np.zeros(columns.days[-1] - first_day + 1, dtype=np.uint8)
+        by_day[days[last] - first_day] = rasas[last]
+        return first_day, by_day.tobytes()
+
+    by_day = bytearray(columns.days[-1] - first_day + 1)
+    rasas = columns.rasas
+    for day, _, end in day_spans(columns.days):
+        by_day[day - first_day] = rasas[end - 1]
+    return first_day, bytes(by_day)
+
+
+def longest_streaks(columns):
+    """
+    Return a dictionary of rasa number -> (length, first day, last day) of the
+    longest run of consecutive days spent in that rasa, or None if it never occurs.
+    """
+    first_day, by_day = day_rasas(columns)
+    streaks = {}
+    for rasa_id in rasa_dict:
+        # Double the run length while such a run exists, then narrow it down
+        marker = bytes([rasa_id])
+        if marker not in by_day:
+            streaks[rasa_id] = None
+            continue
+        found, missing = 1, 2
+        while marker * missing in by_day:
+            found, missing = missing, missing * 2
+        while missing - found > 1:
+            middle = (found + missing) // 2
+            if marker * middle in by_day:
+                found = middle
+            else:
+                missing = middle
+        start = by_day.find(marker * found)
+        streaks[rasa_id] = (found,
+                            date.fromordinal(first_day + start),
+                            date.fromordinal(first_day + start + found - 1))
+    return streaks
+
+
+def transition_matrix(columns):
+    """
+    Return a 9x9 list of lists where matrix[a - 1][b - 1] counts how often an entry
+    in rasa a was followed by an entry in rasa b.
+    """
+    rasas = columns.rasas
+    if len(rasas) < 2:
+        return [[0 for _ in rasa_dict] for _ in rasa_dict]
+
+    np = _numpy(len(rasas))
+    if np is not None:
+        ids = np.frombuffer(rasas, dtype=np.uint8).astype(np.intp)
+        counts = np.bincount((ids[:-1] << 4) + ids[1:], minlength=256)
+        return [[int(counts[(from_id << 4) + to_id]) for to_id in rasa_dict] for from_id in rasa_dict]
+
+    # Read the column (minus its last and first entry) as two big integers, one byte
+    # per entry. Shifting one by a nibble and adding the other combines every pair in
+    # a single C-level operation into a byte (from << 4) + to, since rasa numbers
+    # are below 16.
+    from_ids = int.from_bytes(rasas[:-1], "big")
+    to_ids = int.from_bytes(rasas[1:], "big")
+    pair_codes = ((from_ids << 4) + to_ids).to_bytes(len(rasas) - 1, "big")
+
+    # Rather than 81 bytes.count passes over every pair, bytes.translate first drops
+    # the pairs that start in another rasa, and the 9 counts run over what is left
+    matrix = []
+    for from_id in rasa_dict:
+        other_pairs = bytes(code for code in range(256) if code >> 4 != from_id)
+        pairs = pair_codes.translate(None, other_pairs)
+        matrix.append([pairs.count(bytes([(from_id << 4) + to_id])) for to_id in rasa_dict])
+    return matrix
+
+
+def yearly_counts(columns):
+    """Return a dictionary of year -> {rasa number: count} for every year in the journal."""
+    if not columns.days:
+        return {}
+    counts = {}
+    first_year = date.fromordinal(columns.days[0]).year
+    last_year = date.fromordinal(columns.days[-1]).year
+    for year in range(first_year, last_year + 1):
+        start = bisect_left(columns.days, date(year, 1, 1).toordinal())
+        end = bisect_left(columns.days, date(year + 1, 1, 1).toordinal()) if year < 9999 else len(columns.days)
+        counts[year] = rasa_counts(columns.rasas[start:end])
+    return counts
+
+
+# =================== Date ranges ===================
+class RangeCounter:
+    """
+    Cumulative per-day counts of each rasa.
+
+    cumulative[rasa][i] is the number of entries of that rasa recorded before day
+    first_day + i, so the count for any date range is one subtraction per rasa.
+    Appending an entry for the latest day only touches the last value of one rasa.
+    """
+
+    def __init__(self, columns):
+        days = columns.days
+        self.first_day = days[0] if days else date.today().toordinal()
+        span = (days[-1] - self.first_day + 1) if days else 0
+
+        np = _numpy(len(days))
+        if np is not None:
+            self.cumulative = self._numpy_totals(np, columns, span)
+            return
+
+        # Count the entries of each rasa per day, then turn the counts into running totals.
+        # A day with many entries is counted with bytes.count rather than entry by entry.
+        per_day = {rasa_id: array("l", [0]) * span for rasa_id in rasa_dict}
+        rasas = columns.rasas
+        codes = REGISTRY.codes.items()
+        for day, start, end in day_spans(days):
+            offset = day - self.first_day
+            if end - start < len(per_day):
+                for rasa_id in rasas[start:end]:
+                    per_day[rasa_id][offset] += 1
+            else:
+                entries = rasas[start:end]
+                for rasa_id, code in codes:
+                    per_day[rasa_id][offset] = entries.count(code)
+        self.cumulative = {rasa_id: array("l", accumulate(counts, initial=0))
+                           for rasa_id, counts in per_day.items()}
+
+    def _numpy_totals(self, np, columns, span):
+        # Count every (day, rasa) pair with one bincount, then take running totals per rasa
+        width = max(rasa_dict) + 1
+        offsets = np.asarray(columns.days) - self.first_day
+        rasas = np.frombuffer(columns.rasas, dtype=np.uint8)
+        counts = np.bincount(offsets * width + rasas, minlength=span * width).reshape(span, width)
+        long_type = np.dtype(f"i{array('l').itemsize}")
+        cumulative = {}
+        for rasa_id in rasa_dict:
+            totals = np.zeros(span + 1, dtype=long_type)
+            np.cumsum(counts[:, rasa_id], out=totals[1:])
+            cumulative[rasa_id] = array("l", totals.tobytes())
+        return cumulative
+
+    @property
+    def last_day(self):
+        """Ordinal of the last day covered by the running totals."""
+        return self.first_day + len(self.cumulative[next(iter(rasa_dict))]) - 2
+
+    def add(self, day, rasa_id):
+        """Add one entry of rasa_id recorded on day ordinal day."""
+        if day < self.first_day:
+            # Entries before the first day are rare; rebuild the totals from the new start
+            shift = self.first_day - day
+            for key, totals in self.cumulative.items():
+                self.cumulative[key] = array("l", [0]) * shift + totals
+            self.first_day = day
+
+        # Carry the running totals forward to cover the new day
+        for totals in self.cumulative.values():
+            missing = day - self.first_day + 2 - len(totals)
+            if missing > 0:
+                totals.extend([totals[-1]] * missing)
+
+        totals = self.cumulative[rasa_id]
+        for i in range(day - self.first_day + 1, len(totals)):
+            totals[i] += 1
+
+    def count(self, start, end):
+        """Return a dictionary of rasa number -> entries recorded from start to end (dates, inclusive)."""
+        first = min(max(start.toordinal() - self.first_day, 0), self.last_day - self.first_day + 1)
+        last = min(max(end.toordinal() - self.first_day + 1, 0), self.last_day - self.first_day + 1)
+        if last <= first:
+            return {rasa_id: 0 for rasa_id in rasa_dict}
+        return {rasa_id: totals[last] - totals[first] for rasa_id, totals in self.cumulative.items()}
+
+
+# Range counters built during this session, keyed by journal path
+_range_counters = {}
+
+
+def journal_signature(path):
+    """Return the (size, mtime) of a journal file, or None if it does not exist yet."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def range_counter_for(path):
+    """
+    Return the RangeCounter of a journal, building it on first use.
+
+    The counter is rebuilt if the journal was changed by anything other than
+    record_entry() since it was built.
+    """
+    cached = _range_counters.get(path)
+    if cached is None or cached[1] != journal_signature(path):
+        cached = (RangeCounter(load_columns(path)), journal_signature(path))
+        _range_counters[path] = cached
+    return cached[0]
+
+
+def record_entry(path, day, rasa_id, before):
+    """
+    Extend the journal's cached RangeCounter, if any, with an entry that was just saved.
+
+    before is journal_signature(path) taken just before the entry was saved. If the
+    journal had changed since the counter was built (e.g. another process added an
+    entry), the counter is dropped instead, and rebuilt on next use.
+    """
+    cached = _range_counters.get(path)
+    if cached is None:
+        return
+    if cached[1] != before:
+        del _range_counters[path]
+        return
+    cached[0].add(day, rasa_id)
+    _range_counters[path] = (cached[0], journal_signature(path))
+
+
+def parse_range(text, today=None):
+    """
+    Parse a date range typed by the user and return (start date, end date), inclusive.
+
+    Accepted forms (case-insensitive):
+    - "last 90 days"
+    - "2024" or "all of 2024"
+    - "May 2025"
+    - "Jan 2023 - Jun 2025" (also with "to" or an en dash)
+    - "05 Jan 2023 - 20 Jun 2025"
+
+    Raises ValueError for anything else.
+    """
+    today = today or date.today()
+    text = " ".join(text.strip().lower().split())
+
+    match = re.fullmatch(r"last (\d+) days?", text)
+    if match:
+        length = int(match.group(1))
+        if length < 1:
+            raise ValueError("The range must cover at least one day.")
+        # Dates before 1 Jan 1 cannot be represented
+        if length > today.toordinal():
+            raise ValueError(f"The range cannot go back more than {today.toordinal():,} days.")
+        return today - timedelta(days=length - 1), today
+
+    match = re.fullmatch(r"(?:all of )?(\d{4})", text)
+    if match:
+        year = int(match.group(1))
+        return date(year, 1, 1), date(year, 12, 31)
+
+    parts = re.split(r"\s*(?:-|–|\bto\b)\s*", text)
+    if len(parts) == 1:
+        parts = parts * 2
+    if len(parts) != 2:
+        raise ValueError(f"Unrecognised date range: {text!r}")
+    start, end = _parse_range_end(parts[0], False), _parse_range_end(parts[1], True)
+    if end < start:
+        raise ValueError("The range ends before it starts.")
+    return start, end
+
+
+def _parse_range_end(text, is_end):
+    # "05 jan 2023" is a single day; "jan 2023" covers the whole month
+    words = text.split()
+    if len(words) in (2, 3) and words[-2].title() not in MONTH_NUMBERS:
+        raise ValueError(f"Unrecognised month: {words[-2]!r}")
+    if len(words) == 3:
+        return date(int(words[2]), MONTH_NUMBERS[words[1].title()], int(words[0]))
+    if len(words) == 2:
+        year, month = int(words[1]), MONTH_NUMBERS[words[0].title()]
+        return date(year, month, calendar.monthrange(year, month)[1] if is_end else 1)
+    raise ValueError(f"Unrecognised date: {text!r}")
+
+
+# =================== Report ===================
+def format_report(columns):
+    """Return the analytics report for a journal as a list of printable lines."""
+    if not columns.days:
+        return ["No entries found."]
+
+    names = REGISTRY.names
+    lines = []
+
+    # Rolling distributions as percentages of each window
+    latest = date.fromordinal(columns.days[-1]).strftime('%d %b %Y')
+    lines.append(f"Rolling rasa distribution (up to {latest}):")
+    lines.append("    " + "Rasa".ljust(12) + "".join(f"{window} days".rjust(10) for window in ROLLING_WINDOWS))
+    distributions = [rolling_distribution(columns, window) for window in ROLLING_WINDOWS]
+    totals = [sum(distribution.values()) or 1 for distribution in distributions]
+    for rasa_id, name in names.items():
+        shares = "".join(f"{100 * distribution[rasa_id] / total:9.0f}%"
+                         for distribution, total in zip(distributions, totals))
+        lines.append("    " + name.ljust(12) + shares)
+
+    # Longest streak of each rasa
+    lines.append("")
+    lines.append("Longest streaks:")
+    for rasa_id, streak in longest_streaks(columns).items():
+        if streak is None:
+            lines.append(f"    {names[rasa_id]}: none")
+        else:
+            length, first, last = streak
+            lines.append(f"    {names[rasa_id]}: {length} day(s), "
+                         f"{first.strftime('%d %b %Y')} - {last.strftime('%d %b %Y')}")
+
+    # Transition matrix with abbreviated rasa names as column headings
+    lines.append("")
+    lines.append("Rasa transitions (row = from, column = to):")
+    lines.append("    " + " " * 12 + "".join(name[:5].rjust(7) for name in names.values()))
+    for rasa_id, row in zip(names, transition_matrix(columns)):
+        lines.append("    " + names[rasa_id].ljust(12) + "".join(str(count).rjust(7) for count in row))
+
+    # Year-over-year counts
+    lines.append("")
+    lines.append("Entries per year:")
+    lines.append("    " + "Year".ljust(6) + "".join(name[:5].rjust(7) for name in names.values()))
+    for year, counts in yearly_counts(columns).items():
+        lines.append("    " + str(year).ljust(6) + "".join(str(counts[rasa_id]).rjust(7) for rasa_id in names))
+    return lines
@@ -0,0 +1,100 @@
+"""
+Reader Comparison
+-----------------
+Checks that the memory-mapped scanner in fast_reader.py finds exactly the rows that
+a csv.DictReader scan finds, and reports how much faster it is, for a month query
+(as view_stats used to do it) and a rasa query (as view_all_entries used to do it).
+
+    python benchmarks/compare_readers.py 1000000
+    python benchmarks/compare_readers.py --journal mood_tracking.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from fast_reader import Entry, read_columns, scan_month, scan_rasa
+from generate_journal import START_DATE, generate_journal
+from journal_index import FIELDNAMES
+
+
+def dictreader_month(path, year, month):
+    # The full scan view_stats used before the journal index
+    rows = []
+    with open(path,"r",newline='',encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            try:
+                entry_date = datetime.strptime(row['Date'], '%d %b %Y')
+            except (TypeError, ValueError):
+                continue
+            if entry_date.year == year and entry_date.month == month:
+                rows.append(row)
+    return rows
+
+
+def dictreader_rasa(path, rasa):
+    # The full scan view_all_entries used before the journal index
+    with open(path,"r",newline='',encoding="utf-8") as file:
+        return [row for row in csv.DictReader(file) if (row['Mood'] or "").strip().lower() == rasa.lower()]
+
+
+def as_entries(rows):
+    return [Entry(*[row[name] for name in FIELDNAMES]) for row in rows]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def compare(path, year, month, rasa):
+    """Run both readers on both queries, print the speedups and return True if all results match."""
+    identical = True
+    for name, slow, fast, args in (("month", dictreader_month, scan_month, (path, year, month)),
+                                   ("rasa", dictreader_rasa, scan_rasa, (path, rasa))):
+        expected, slow_seconds = timed(slow, *args)
+        found, fast_seconds = timed(fast, *args)
+        same = as_entries(expected) == found
+        identical = identical and same
+        print(f"{name:>6}: {len(found)} rows, DictReader {slow_seconds * 1000:9.1f} ms, "
+              f"fast_reader {fast_seconds * 1000:9.1f} ms, {slow_seconds / fast_seconds:5.1f}x "
+              f"{'identical' if same else 'DIFFERENT'}")
+
+    _, seconds = timed(read_columns, path)
+    print(f"columns: every row read in {seconds * 1000:.1f} ms")
+    return identical
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fast_reader with csv.DictReader scans.")
+    parser.add_argument("rows", type=int, nargs="?", default=1_000_000, help="size of the synthetic journal")
+    parser.add_argument("--journal", help="use this journal instead of a synthetic one")
+    parser.add_argument("--month", default=None, help='month to query, e.g. "Jun 2025" (default: one in the journal)')
+    parser.add_argument("--rasa", default="Shantam")
+    args = parser.parse_args(argv)
+
+    if args.month:
+        parsed = datetime.strptime(args.month, '%b %Y')
+        year, month = parsed.year, parsed.month
+    elif args.journal:
+        year, month = 2025, 6
+    else:
+        year, month = START_DATE.year + 1, 6
+
+    if args.journal:
+        return 0 if compare(args.journal, year, month, args.rasa) else 1
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "journal.csv")
+        generate_journal(path, args.rows)
+        return 0 if compare(path, year, month, args.rasa) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Synthetic Journal Generator
+---------------------------
+Writes deterministic mood tracking CSVs of any size for benchmarking.
+
+Rows use the real rasas and prompts from rasa_dict, are written in date order in
+the same layout as start_journaling(), and have random verses. The same size and
+seed always produce the same file.
+
+    python benchmarks/generate_journal.py 1000000 journal_1m.csv --seed 7
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+# Make the tracker modules importable when run from the benchmarks directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal_index import FIELDNAMES
+from rasas import rasa_dict
+
+# First day of every synthetic journal
+START_DATE = date(2000, 1, 1)
+
+# Days covered by the largest journals, kept well inside the range of datetime.date
+MAX_DAYS = 36500
+
+# Words the random verses are made of
+VERSE_WORDS = ("rain", "light", "river", "shadow", "laughter", "silence", "storm", "bloom",
+               "ember", "tide", "whisper", "mountain", "lantern", "petal", "thunder", "dawn",
+               "dusk", "breeze", "echo", "stone", "feather", "flame", "moon", "salt")
+
+
+def generate_rows(rows, seed=0):
+    """
+    Yield rows journal rows as lists in CSV column order.
+
+    A journal of up to MAX_DAYS rows has one entry per day; bigger journals put
+    several entries on each day so the dates stay within MAX_DAYS days.
+    """
+    rng = random.Random(seed)
+    per_day = max(1, -(-rows // MAX_DAYS))
+    rasa_ids = list(rasa_dict)
+
+    for number in range(rows):
+        current = START_DATE + timedelta(days=number // per_day)
+        info = rasa_dict[rng.choice(rasa_ids)]
+
+        # Roughly one entry in five skips the creative prompt, like real journals
+        if rng.random() < 0.2:
+            prompt = "No prompt"
+            verse = "No verse today."
+        else:
+            prompt = rng.choice(info['prompts'])
+            verse = " ".join(rng.choice(VERSE_WORDS) for _ in range(rng.randint(3, 9))).capitalize()
+
+        yield [current.strftime('%d %b %Y'),
+               info['rasa'].title(),
+               info['meaning'].title(),
+               info['color'].lower(),
+               prompt,
+               verse]
+
+
+def generate_journal(path, rows, seed=0):
+    """Write a synthetic journal of the given number of rows to path."""
+    with open(path,"w",newline='',encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        writer.writerows(generate_rows(rows, seed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic mood journal for benchmarking.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generate_journal(args.path, args.rows, args.seed)
+    print(f"Wrote {args.rows} rows to {args.path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Benchmark Suite
+---------------
+Times the read and write paths of the mood tracker on synthetic journals and records
+the peak memory of each, writing the results to JSON so runs from different commits
+can be compared.
+
+Benchmarks (for each journal size):
+- startup        : importing navarasam_mood_tracker in a fresh interpreter
+- index_build    : building the journal index of a new CSV
+- month_summary  : the monthly summary behind view_stats (index loaded from disk)
+- rasa_filter    : counting a rasa and reading its first page, as view_all_entries does
+- search_build   : building the full-text search index of the journal
+- search_query   : a "rain AND shantam in <year>" query on the loaded search index
+- single_append  : appending one entry, as start_journaling does
+- bulk_append    : appending BULK_APPENDS entries one after another
+- bulk_writer    : writing BULK_APPENDS entries through the storage's group-commit bulk writer
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 --output results.json
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from generate_journal import START_DATE, generate_journal
+from search_index import SearchIndex, parse_query
+from storage import CsvStorage
+
+# Journal sizes benchmarked by default
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# Number of entries written by the bulk append benchmark
+BULK_APPENDS = 1_000
+
+# Ratio above which --compare flags a benchmark as slower
+REGRESSION_THRESHOLD = 1.2
+
+SAMPLE_ENTRY = {"Date": "", "Mood": "Shantam", "Meaning": "Peace/Tranquility", "Color": "grey",
+                "Prompt": "sound of silence", "Verse": "A hush that holds you like a lullaby"}
+
+
+def measure(function, reset=None):
+    """
+    Return (seconds, peak bytes allocated) of a call to function.
+
+    The function runs twice, once timed and once under tracemalloc, since tracing
+    allocations slows Python code down several times. reset, if given, runs before
+    each call to restore the starting state.
+    """
+    if reset:
+        reset()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+
+    if reset:
+        reset()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def measure_startup():
+    """Time a fresh interpreter importing the tracker (memory is not traced across processes)."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import navarasam_mood_tracker"], cwd=REPO_DIR, check=True)
+    return time.perf_counter() - start, None
+
+
+def run_size(rows, work_dir):
+    """Run every journal benchmark on a synthetic journal of the given size."""
+    path = os.path.join(work_dir, f"journal_{rows}.csv")
+    generate_journal(path, rows)
+    results = {}
+
+    def remove_index():
+        for index_path in (path + ".idx", path + ".idx.log"):
+            if os.path.exists(index_path):
+                os.remove(index_path)
+    results['index_build'] = measure(lambda: CsvStorage(path).index, remove_index)
+
+    # The middle month of the journal, so the summary is not just the first or last range
+    months = CsvStorage(path).recorded_months()
+    year, month = months[len(months) // 2]
+    results['month_summary'] = measure(lambda: CsvStorage(path).month_summary(year, month))
+
+    def rasa_filter():
+        storage = CsvStorage(path)
+        storage.rasa_count("Shantam")
+        list(storage.rasa_rows("Shantam", 0, 10))
+    results['rasa_filter'] = measure(rasa_filter)
+
+    def remove_search_index():
+        for index_path in (path + ".search", path + ".search.log"):
+            if os.path.exists(index_path):
+                os.remove(index_path)
+    results['search_build'] = measure(lambda: SearchIndex.load(path), remove_search_index)
+
+    search_index = SearchIndex.load(path)
+    query = parse_query(f"rain AND shantam in {year}")
+    results['search_query'] = measure(lambda: search_index.search(query))
+
+    entry = dict(SAMPLE_ENTRY, Date=date.today().strftime('%d %b %Y'))
+    results['single_append'] = measure(lambda: CsvStorage(path).append(entry))
+
+    def bulk_append():
+        storage = CsvStorage(path)
+        for _ in range(BULK_APPENDS):
+            storage.append(entry)
+    results['bulk_append'] = measure(bulk_append)
+
+    def bulk_writer():
+        with CsvStorage(path).bulk_writer() as writer:
+            for _ in range(BULK_APPENDS):
+                writer.append(entry)
+    results['bulk_writer'] = measure(bulk_writer)
+
+    remove_index()
+    remove_search_index()
+    os.remove(path)
+    return results
+
+
+def git_commit():
+    """Return the current git commit of the repository, or None outside a git checkout."""
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def run_benchmarks(sizes):
+    """Run the whole suite and return the results as a JSON-serialisable dictionary."""
+    results = []
+    seconds, peak = measure_startup()
+    results.append({"name": "startup", "rows": 0, "seconds": seconds, "peak_bytes": peak})
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in sizes:
+            for name, (seconds, peak) in run_size(rows, work_dir).items():
+                results.append({"name": name, "rows": rows, "seconds": seconds, "peak_bytes": peak})
+                print(f"{name:>14} {rows:>10} rows: {seconds * 1000:10.2f} ms, peak {peak / 1024:10.1f} KiB")
+
+    return {"commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "journal_start": START_DATE.isoformat(),
+            "results": results}
+
+
+def compare(previous, current):
+    """Print each benchmark's time relative to a previous run and return the number of regressions."""
+    before = {(result['name'], result['rows']): result['seconds'] for result in previous['results']}
+    regressions = 0
+    print(f"\nCompared with {previous.get('commit') or 'previous run'}:")
+    for result in current['results']:
+        key = (result['name'], result['rows'])
+        if key not in before or before[key] == 0:
+            continue
+        ratio = result['seconds'] / before[key]
+        flag = "  <-- slower" if ratio > REGRESSION_THRESHOLD else ""
+        if flag:
+            regressions += 1
+        print(f"{key[0]:>14} {key[1]:>10} rows: {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the mood tracker's read and write paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="journal sizes in rows (e.g. 1000 1000000 10000000)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the results in this JSON file")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.sizes)
+    if args.output:
+        with open(args.output,"w",encoding="utf-8") as file:
+            json.dump(current, file, indent=2)
+        print(f"\nResults written to {args.output}.")
+
+    if args.compare:
+        with open(args.compare,"r",encoding="utf-8") as file:
+            previous = json.load(file)
+        if compare(previous, current):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
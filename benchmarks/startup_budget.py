@@ -0,0 +1,120 @@
+"""
+Startup Budget
+--------------
+Checks that launching the tracker and moving around its menu stay within a time
+budget, for thin clients where every import and every spawned process is felt.
+It exits with status 1 when a budget is exceeded; tests/test_startup_budget.py
+runs the same checks under pytest.
+
+Checks:
+- import : importing navarasam_mood_tracker in a fresh interpreter (median of
+           --runs), which must also leave tkinter and the calendar modules unloaded
+- menu   : one main_menu iteration (clear the screen, show the menu, read a choice)
+           with stdin fed MENU_ITERATIONS choices, which must not start any process
+
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --import-budget 80 --menu-budget 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# Default budgets in milliseconds
+IMPORT_BUDGET_MS = 150
+MENU_BUDGET_MS = 1.0
+
+# Number of menu choices fed to main_menu by the menu check
+MENU_ITERATIONS = 2_000
+
+# Modules that must only be imported when a calendar is drawn
+DEFERRED_MODULES = ("tkinter", "calendar_view", "calendar_render")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import navarasam_mood_tracker
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+MENU_SCRIPT = """
+import io, json, os, subprocess, sys, time
+import navarasam_mood_tracker
+
+# Record any process the menu starts, and pretend it ran
+spawned = []
+def record(*args, **kwargs):
+    spawned.append(repr(args[:1]))
+    return 0
+os.system = subprocess.call = record
+
+# A terminal stand-in, so the screen is cleared as it would be interactively
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+# Invalid choices keep the menu looping; the last one exits
+sys.stdin = io.StringIO("9\\n" * %d + "0\\n")
+sys.stdout = Terminal()
+start = time.perf_counter()
+navarasam_mood_tracker.main_menu()
+seconds = time.perf_counter() - start
+sys.stdout = sys.__stdout__
+print(json.dumps({"seconds": seconds, "spawned": spawned}))
+""" % MENU_ITERATIONS
+
+
+def run_child(script, environment=None):
+    """Run a script in a fresh interpreter in the repository and return its JSON output."""
+    completed = subprocess.run([sys.executable, "-c", script], cwd=REPO_DIR, env=environment,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def check_import(runs, budget_ms):
+    """Return True if the median import time is within budget and no deferred module was loaded."""
+    results = [run_child(IMPORT_SCRIPT) for _ in range(runs)]
+    median_ms = statistics.median(result['seconds'] for result in results) * 1000
+    loaded = sorted({name for result in results for name in result['loaded']})
+    passed = median_ms <= budget_ms and not loaded
+    print(f"import: {median_ms:7.1f} ms (budget {budget_ms} ms)"
+          + (f", loaded {', '.join(loaded)}" if loaded else "")
+          + f"  {'ok' if passed else 'OVER BUDGET'}")
+    return passed
+
+
+def check_menu(budget_ms):
+    """Return True if a menu iteration is within budget and the menu started no process."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        environment = dict(os.environ, NAVARASAM_JOURNAL=os.path.join(work_dir, "mood_tracking.csv"))
+        result = run_child(MENU_SCRIPT, environment)
+    iteration_ms = result['seconds'] * 1000 / (MENU_ITERATIONS + 1)
+    passed = iteration_ms <= budget_ms and not result['spawned']
+    print(f"  menu: {iteration_ms:7.3f} ms per iteration (budget {budget_ms} ms)"
+          + (f", started {len(result['spawned'])} process(es) such as {result['spawned'][0]}"
+             if result['spawned'] else "")
+          + f"  {'ok' if passed else 'OVER BUDGET'}")
+    return passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the tracker's startup and menu latency budgets.")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS, help="import budget in ms")
+    parser.add_argument("--menu-budget", type=float, default=MENU_BUDGET_MS, help="per-iteration menu budget in ms")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters timed for the import check")
+    args = parser.parse_args(argv)
+
+    passed = check_import(args.runs, args.import_budget)
+    passed = check_menu(args.menu_budget) and passed
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
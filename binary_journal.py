@@ -0,0 +1,357 @@
+"""
+Binary Journal
+--------------
+A compact binary format for mood journals. In the CSV every row repeats the rasa
+name, meaning, color and prompt text, although all of them can be derived from
+rasa_dict. The binary journal keeps only what varies from entry to entry.
+
+A journal "<name>.nvj" holds a small header followed by four columns of
+fixed-width little-endian integers, one value per entry:
+- day    : uint32 date ordinal (datetime.date.toordinal())
+- rasa   : uint8 rasa number (key of rasa_dict)
+- prompt : uint8 index into rasa_dict[rasa]['prompts'], or one of the codes
+           NO_PROMPT ("No prompt"), CUSTOM_PROMPT (any other prompt text) or
+           RAW_ROW (a row whose text cannot be derived from rasa_dict)
+- verse  : uint32 offset into the verse heap
+
+The verse heap "<name>.nvj.verses" holds length-prefixed UTF-8 strings. Identical
+verses are stored once. For CUSTOM_PROMPT entries the prompt text is stored just
+before the verse at the same offset. For RAW_ROW entries (e.g. rows written by older
+versions with a different meaning, or with extra columns) the offset points to a
+count followed by every field of the row after the date.
+
+BinaryJournal memory-maps the file, so month and rasa scans run over contiguous
+integer columns instead of parsing text.
+
+Converting to and from the CSV layout written by start_journaling() is lossless:
+    python binary_journal.py import mood_tracking.csv mood_tracking.nvj
+    python binary_journal.py export mood_tracking.nvj mood_tracking.csv
+"""
+import argparse
+import csv
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+
+from journal_index import FIELDNAMES
+from rasas import REGISTRY, rasa_dict
+
+MAGIC = b"NVJ1"
+
+# Header: magic, number of entries, flags
+HEADER = struct.Struct("<4sII")
+
+# Header flag set when the day column is in ascending order
+FLAG_SORTED = 1
+
+# Prompt codes that do not index into rasa_dict[rasa]['prompts']
+NO_PROMPT = 255
+CUSTOM_PROMPT = 254
+RAW_ROW = 253
+
+# Length prefix of a string in the verse heap
+LENGTH = struct.Struct("<I")
+
+
+def _uint32_array(data=b""):
+    """Return an array of little-endian uint32 values read from data."""
+    column = array("I")
+    if column.itemsize != 4:
+        column = array("L")
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _uint32_bytes(column):
+    """Return the little-endian bytes of a uint32 array."""
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+# =================== Converting from CSV ===================
+def encode_entry(entry):
+    """
+    Convert a CSV-style entry to (day ordinal, rasa number, prompt code).
+
+    Raises ValueError if the date is not in DD Mon YYYY format or the mood is not
+    a known rasa, since neither could be stored in the integer columns.
+    """
+    parsed_date = datetime.strptime(entry['Date'], '%d %b %Y').date()
+    if parsed_date.strftime('%d %b %Y') != entry['Date']:
+        raise ValueError(f"Date is not in DD Mon YYYY format: {entry['Date']!r}")
+
+    rasa_id = REGISTRY.id_of(entry['Mood'])
+    if rasa_id is None:
+        raise ValueError(f"Unknown rasa: {entry['Mood']!r}")
+
+    # Rows whose text cannot be rebuilt from rasa_dict keep all their fields in the heap
+    if (decode_columns(rasa_id) != (entry['Mood'], entry['Meaning'], entry['Color'])
+            or entry.get(None) or None in entry.values()):
+        return parsed_date.toordinal(), rasa_id, RAW_ROW
+
+    prompts = rasa_dict[rasa_id]['prompts']
+    if entry['Prompt'] == "No prompt":
+        prompt_code = NO_PROMPT
+    elif entry['Prompt'] in prompts:
+        prompt_code = prompts.index(entry['Prompt'])
+    else:
+        prompt_code = CUSTOM_PROMPT
+    return parsed_date.toordinal(), rasa_id, prompt_code
+
+
+def decode_columns(rasa_id):
+    """Return the (Mood, Meaning, Color) values written to the CSV for a rasa."""
+    return REGISTRY.names[rasa_id], REGISTRY.meanings[rasa_id], REGISTRY.colors[rasa_id]
+
+
+def csv_to_binary(csv_path, nvj_path):
+    """
+    Convert a CSV journal to the binary format. Returns the number of entries.
+
+    Raises ValueError naming the line of the first row that cannot be converted
+    losslessly.
+    """
+    days = _uint32_array()
+    rasas = bytearray()
+    prompts = bytearray()
+    verses = _uint32_array()
+    heap = bytearray()
+    heap_offsets = {}
+
+    def store(*texts, counted=False):
+        # Store strings in the heap, reusing the offset of identical earlier strings
+        if (texts, counted) not in heap_offsets:
+            heap_offsets[(texts, counted)] = len(heap)
+            if counted:
+                heap.extend(LENGTH.pack(len(texts)))
+            for text in texts:
+                encoded = text.encode("utf-8")
+                heap.extend(LENGTH.pack(len(encoded)))
+                heap.extend(encoded)
+        return heap_offsets[(texts, counted)]
+
+    with open(csv_path,"r",newline='',encoding="utf-8") as file:
+        # Line 1 is the header, so data rows start at line 2
+        for line_number, row in enumerate(csv.DictReader(file), start=2):
+            try:
+                day, rasa_id, prompt_code = encode_entry(row)
+            except (KeyError, ValueError) as error:
+                raise ValueError(f"{csv_path}, line {line_number}: {error}") from error
+
+            days.append(day)
+            rasas.append(rasa_id)
+            prompts.append(prompt_code)
+            if prompt_code == RAW_ROW:
+                fields = [row[name] for name in FIELDNAMES[1:] if row[name] is not None]
+                verses.append(store(*fields, *row.get(None, []), counted=True))
+            elif prompt_code == CUSTOM_PROMPT:
+                verses.append(store(row['Prompt'], row['Verse']))
+            else:
+                verses.append(store(row['Verse']))
+
+    flags = FLAG_SORTED if all(days[i] <= days[i + 1] for i in range(len(days) - 1)) else 0
+
+    with open(nvj_path,"wb") as file:
+        file.write(HEADER.pack(MAGIC, len(days), flags))
+        file.write(_uint32_bytes(days))
+        file.write(rasas)
+        file.write(prompts)
+        file.write(_uint32_bytes(verses))
+    with open(nvj_path + ".verses","wb") as file:
+        file.write(heap)
+    return len(days)
+
+
+def binary_to_csv(nvj_path, csv_path):
+    """Convert a binary journal back to the CSV layout. Returns the number of entries."""
+    with BinaryJournal(nvj_path) as journal, open(csv_path,"w",newline='',encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        for position in range(len(journal)):
+            entry = journal.entry(position)
+            writer.writerow([entry[name] for name in FIELDNAMES if entry[name] is not None]
+                            + entry.get(None, []))
+        return len(journal)
+
+
+# =================== Reading ===================
+class BinaryJournal:
+    """
+    Read-only view of a binary journal.
+
+    The columns are exposed as days (uint32 array), rasas and prompts (bytes-like,
+    one byte per entry) and verses (uint32 array of heap offsets).
+
+    Opening a file that is not a binary journal, or whose columns are cut short,
+    raises ValueError.
+    """
+
+    def __init__(self, nvj_path):
+        self.path = nvj_path
+        with open(nvj_path,"rb") as file:
+            if file.seek(0, 2) < HEADER.size:
+                raise ValueError(f"{nvj_path} is too short to be a binary mood journal")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, flags = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) != HEADER.size + 10 * count:
+            self._map.close()
+            raise ValueError(f"{nvj_path} is not a binary mood journal, or is truncated")
+        try:
+            with open(nvj_path + ".verses","rb") as file:
+                # mmap cannot map an empty file
+                if file.seek(0, 2) == 0:
+                    self._heap = b""
+                else:
+                    self._heap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            self._map.close()
+            raise
+        self.count = count
+        self.is_sorted = bool(flags & FLAG_SORTED)
+
+        # Column positions follow the header back to back
+        start = HEADER.size
+        self.days = _uint32_array(self._map[start:start + 4 * count])
+        start += 4 * count
+        self.rasas = memoryview(self._map)[start:start + count]
+        start += count
+        self.prompts = memoryview(self._map)[start:start + count]
+        start += count
+        self.verses = _uint32_array(self._map[start:start + 4 * count])
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.rasas.release()
+        self.prompts.release()
+        self._map.close()
+        if isinstance(self._heap, mmap.mmap):
+            self._heap.close()
+
+    def _heap_string(self, offset):
+        # Return the heap string at offset and the offset just past it
+        (length,) = LENGTH.unpack_from(self._heap, offset)
+        start = offset + LENGTH.size
+        return bytes(self._heap[start:start + length]).decode("utf-8"), start + length
+
+    def _raw_entry(self, position):
+        # Rebuild a RAW_ROW entry the way csv.DictReader would have read it
+        offset = self.verses[position]
+        (count,) = LENGTH.unpack_from(self._heap, offset)
+        offset += LENGTH.size
+        fields = [date.fromordinal(self.days[position]).strftime('%d %b %Y')]
+        for _ in range(count):
+            text, offset = self._heap_string(offset)
+            fields.append(text)
+
+        entry = dict(zip(FIELDNAMES, fields))
+        for name in FIELDNAMES[len(fields):]:
+            entry[name] = None
+        if len(fields) > len(FIELDNAMES):
+            entry[None] = fields[len(FIELDNAMES):]
+        return entry
+
+    def entry(self, position):
+        """
+        Return the entry at position as a CSV-style dictionary.
+
+        Rows with missing or extra columns come back as csv.DictReader returns them:
+        missing columns are None and extra fields are listed under the key None.
+        """
+        rasa_id = self.rasas[position]
+        prompt_code = self.prompts[position]
+        offset = self.verses[position]
+
+        if prompt_code == RAW_ROW:
+            return self._raw_entry(position)
+        if prompt_code == CUSTOM_PROMPT:
+            prompt, offset = self._heap_string(offset)
+        elif prompt_code == NO_PROMPT:
+            prompt = "No prompt"
+        else:
+            prompt = rasa_dict[rasa_id]['prompts'][prompt_code]
+        verse, _ = self._heap_string(offset)
+
+        mood, meaning, color = decode_columns(rasa_id)
+        return {"Date": date.fromordinal(self.days[position]).strftime('%d %b %Y'),
+                "Mood": mood,
+                "Meaning": meaning,
+                "Color": color,
+                "Prompt": prompt,
+                "Verse": verse}
+
+    def month_positions(self, year, month):
+        """Return the positions of the entries dated in the given month."""
+        first = date(year, month, 1).toordinal()
+        following = (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)).toordinal()
+        if self.is_sorted:
+            return range(bisect_left(self.days, first), bisect_left(self.days, following))
+        return [position for position, day in enumerate(self.days) if first <= day < following]
+
+    def month_summary(self, year, month):
+        """Return (mood_count, mood_by_day) for a month, like the journal index rollup."""
+        mood_count = {}
+        mood_by_day = {}
+        for position in self.month_positions(year, month):
+            if self.prompts[position] == RAW_ROW:
+                mood = self._raw_entry(position)['Mood']
+            else:
+                mood = REGISTRY.names[self.rasas[position]]
+            mood_count[mood] = mood_count.get(mood,0) + 1
+            mood_by_day[date.fromordinal(self.days[position]).day] = mood
+        return mood_count, mood_by_day
+
+    def rasa_positions(self, rasa_id):
+        """Yield the positions of the entries recorded for a rasa number."""
+        # bytes.find scans the rasa column in C rather than one entry at a time
+        target = bytes([rasa_id])
+        column = self._map
+        start = HEADER.size + 4 * self.count
+        end = start + self.count
+        position = column.find(target, start, end)
+        while position != -1:
+            yield position - start
+            position = column.find(target, position + 1, end)
+
+
+# =================== Command line ===================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert mood journals between CSV and the binary format.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    to_binary = subparsers.add_parser("import", help="convert a CSV journal to the binary format")
+    to_binary.add_argument("csv_path", metavar="journal.csv")
+    to_binary.add_argument("nvj_path", metavar="journal.nvj")
+    to_csv = subparsers.add_parser("export", help="convert a binary journal back to CSV")
+    to_csv.add_argument("nvj_path", metavar="journal.nvj")
+    to_csv.add_argument("csv_path", metavar="journal.csv")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "import":
+            count = csv_to_binary(args.csv_path, args.nvj_path)
+        else:
+            count = binary_to_csv(args.nvj_path, args.csv_path)
+    except (OSError, ValueError) as error:
+        print(f"Conversion failed: {error}")
+        return 1
+    print(f"Converted {count} entries.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Bulk Import
+-----------
+Imports journal entries exported by other apps into a mood journal in one go.
+
+Sources can be CSV files with a header row, or JSON-lines files with one object per
+line. Each entry needs a "Date" (DD Mon YYYY or YYYY-MM-DD) and a "Mood" naming one
+of the nine rasas; "Prompt" and "Verse" are optional and default to the values
+start_journaling() records when no prompt is chosen. A prompt or verse must fit on
+one line, since every journal row is kept on its own line. Meaning and color are always
+taken from rasa_dict, so imported rows look exactly like ones written by the tracker.
+
+Entries are validated as they stream in and invalid ones are skipped and reported.
+Valid entries go through the storage's bulk writer, which keeps one file or database
+connection open and commits a group of rows at a time.
+
+    python bulk_import.py export.jsonl [more.csv ...] --journal mood_tracking.csv
+    cat export.csv | python bulk_import.py - --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import date
+
+from journal_index import parse_entry_date
+from rasas import REGISTRY
+from storage import GROUP_COMMIT_ROWS, open_storage
+
+# Number of skipped entries reported individually before the rest are only counted
+MAX_REPORTED_ERRORS = 10
+
+ImportResult = namedtuple("ImportResult", ["imported", "skipped", "seconds", "errors"])
+
+
+def read_entries(stream, file_format):
+    """
+    Yield (line number, raw entry dictionary) pairs from a CSV or JSON-lines stream.
+
+    A JSON line that cannot be parsed is yielded as (line number, None).
+    """
+    if file_format == "csv":
+        # Line 1 is the header, so data rows start at line 2
+        yield from enumerate(csv.DictReader(stream), start=2)
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError:
+            raw = None
+        yield line_number, raw if isinstance(raw, dict) else None
+
+
+def parse_date(text):
+    """Parse an entry date written as DD Mon YYYY or YYYY-MM-DD."""
+    text = text.strip()
+    try:
+        return parse_entry_date(text)
+    except ValueError:
+        return date.fromisoformat(text)
+
+
+def normalise_entry(raw):
+    """
+    Return the journal entry for a raw imported entry, in the layout start_journaling() writes.
+
+    Raises ValueError if the date cannot be parsed, the mood is not a known rasa, or
+    the prompt or verse contains a line break.
+    """
+    if raw is None:
+        raise ValueError("not a JSON object")
+    try:
+        entry_date = parse_date(str(raw['Date']))
+        mood = str(raw['Mood'])
+    except KeyError as error:
+        raise ValueError(f"missing {error.args[0]!r}") from error
+
+    rasa_id = REGISTRY.id_of(mood)
+    if rasa_id is None:
+        raise ValueError(f"unknown rasa {mood!r}")
+
+    prompt = str(raw.get('Prompt') or "No prompt")
+    verse = str(raw.get('Verse') or "No verse today.")
+    # A line break would split the row, and the journal index expects one row per line
+    for name, value in (("Prompt", prompt), ("Verse", verse)):
+        if "\n" in value or "\r" in value:
+            raise ValueError(f"line break in {name!r}")
+
+    return {"Date": entry_date.strftime('%d %b %Y'),
+            "Mood": REGISTRY.names[rasa_id],
+            "Meaning": REGISTRY.meanings[rasa_id],
+            "Color": REGISTRY.colors[rasa_id],
+            "Prompt": prompt,
+            "Verse": verse}
+
+
+def bulk_import(sources, storage, group_size=GROUP_COMMIT_ROWS):
+    """
+    Import entries from (name, stream, file_format) sources into a journal storage.
+
+    Every entry is validated once on its way through and invalid entries are skipped.
+    Returns an ImportResult with the numbers of imported and skipped entries, the
+    time taken and up to MAX_REPORTED_ERRORS error messages. Raises ValueError if
+    group_size is less than 1.
+    """
+    if group_size < 1:
+        raise ValueError(f"The group size must be at least 1, not {group_size}.")
+    skipped = 0
+    errors = []
+    start = time.perf_counter()
+
+    with storage.bulk_writer(group_size) as writer:
+        for name, stream, file_format in sources:
+            for line_number, raw in read_entries(stream, file_format):
+                try:
+                    writer.append(normalise_entry(raw))
+                except ValueError as error:
+                    skipped += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append(f"{name}, line {line_number}: {error}")
+
+    return ImportResult(writer.written, skipped, time.perf_counter() - start, errors)
+
+
+def positive_int(text):
+    """argparse type for a whole number of at least 1."""
+    try:
+        number = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {text!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def source_format(path, file_format):
+    """Return the format of a source: the one given, or else guessed from its extension."""
+    if file_format:
+        return file_format
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import journal entries from CSV or JSON-lines files.")
+    parser.add_argument("sources", nargs="+", metavar="file", help="files to import, or - for standard input")
+    parser.add_argument("--journal", default=os.environ.get("NAVARASAM_JOURNAL", "mood_tracking.csv"))
+    parser.add_argument("--format", choices=["csv","jsonl"],
+                        help="format of the sources (default: by extension, JSON lines unless .csv)")
+    parser.add_argument("--group-size", type=positive_int, default=GROUP_COMMIT_ROWS,
+                        help=f"rows per group commit (default: {GROUP_COMMIT_ROWS})")
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.journal)
+    files = []
+    try:
+        sources = []
+        for path in args.sources:
+            if path == "-":
+                sources.append(("<stdin>", sys.stdin, args.format or "jsonl"))
+            else:
+                stream = open(path,"r",newline='',encoding="utf-8")
+                files.append(stream)
+                sources.append((path, stream, source_format(path, args.format)))
+        result = bulk_import(sources, storage, args.group_size)
+    except OSError as error:
+        print(f"Import failed: {error}")
+        return 1
+    finally:
+        for stream in files:
+            stream.close()
+        storage.close()
+
+    for message in result.errors:
+        print(f"Skipped {message}")
+    rate = result.imported / result.seconds if result.seconds else 0
+    print(f"Imported {result.imported} entries into {args.journal} ({result.skipped} skipped) "
+          f"in {result.seconds:.2f}s, {rate:,.0f} rows/sec.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
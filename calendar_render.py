@@ -0,0 +1,281 @@
+"""
+Calendar Render
+---------------
+Headless rendering of the mood calendar, for servers without a display.
+
+The layout helpers here (circle positions, legend position, colors) are shared with
+the Tkinter views in calendar_view.py, so the rendered images match what the mood
+summary draws on screen: up to 7 circles per row of radius 20, each colored by the
+rasa recorded that day, followed by the color legend.
+
+- render_svg builds the calendar as an SVG document using only the standard library.
+- render_png draws the same layout with Pillow (which must be installed for PNG output).
+
+The batch command renders every month of a journal (optionally limited to a date
+range), or every journal in a directory, spreading the work over a process pool:
+    python calendar_render.py mood_tracking.csv --range "Jan 2025 - Jun 2025" --format png
+    python calendar_render.py journals/ --out-dir reports --workers 8
+"""
+import argparse
+import calendar
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from analytics import parse_range
+from journal_index import JournalIndex
+from rasas import REGISTRY, rasa_dict
+from storage import SQLITE_SUFFIXES, open_storage
+
+# Layout of the calendar circles
+CIRCLE_RADIUS = 20
+MARGIN = 15
+X_START, Y_START = 65, 100
+MAX_PER_ROW = 7
+
+CANVAS_WIDTH = 500
+CANVAS_HEIGHT = 700
+LEGEND_X = 50
+
+# RGB values Tk uses for the color names in rasa_dict, so renders match the screen
+TK_COLORS = {"white": "#ffffff", "black": "#000000", "pink": "#ffc0cb", "yellow": "#ffff00",
+             "blue": "#0000ff", "red": "#ff0000", "orange": "#ffa500", "purple": "#a020f0",
+             "green": "#00ff00", "turquoise": "#40e0d0", "grey": "#bebebe", "gray": "#bebebe"}
+
+# Journal file extensions picked up when rendering a whole directory
+JOURNAL_SUFFIXES = (".csv", ".db", ".sqlite", ".sqlite3")
+
+# Number of months of one journal rendered by a worker in one go
+MONTHS_PER_TASK = 12
+
+
+# =================== Layout ===================
+def cell_position(position):
+    """Return the top-left corner of the circle for the cell at position (0-based)."""
+    row = position // MAX_PER_ROW
+    col = position % MAX_PER_ROW
+    return (X_START + col * (2 * CIRCLE_RADIUS + MARGIN),
+            Y_START + row * (2 * CIRCLE_RADIUS + MARGIN))
+
+
+def legend_top(number_of_cells):
+    """Return the y position of the first legend line below number_of_cells circles."""
+    return Y_START + ((number_of_cells // MAX_PER_ROW) + 2) * (2 * CIRCLE_RADIUS + MARGIN)
+
+
+def mood_color(mood):
+    """Return the circle color for a mood name, or white if there is no (known) mood."""
+    return REGISTRY.colors.get(REGISTRY.id_of(mood), 'white')
+
+
+def mood_of_the_period(mood_count):
+    """Return (mood, meaning) of the most recorded mood in mood_count."""
+    most_recorded_mood = max(mood_count, key = mood_count.get)
+    return most_recorded_mood, REGISTRY.meaning_of(most_recorded_mood)
+
+
+def layout(label, period, mood_count, cells):
+    """
+    Return the calendar as a list of drawing instructions, shared by both renderers.
+
+    Each instruction is ("circle", x, y, color, number) or ("text", x, y, text, size,
+    style, anchor), where anchor is "middle" or "start".
+    """
+    items = [("text", CANVAS_WIDTH / 2, 20, f"The rasas you expressed in {label}", 16, "bold", "middle")]
+    if mood_count:
+        most_recorded_mood, meaning = mood_of_the_period(mood_count)
+        subtitle = f"Mood of the {period}: {most_recorded_mood} ({meaning})"
+    else:
+        subtitle = f"No entries for this {period}"
+    items.append(("text", CANVAS_WIDTH / 2, 50, subtitle, 12, "italic", "middle"))
+
+    for position, (day, mood) in enumerate(cells):
+        x, y = cell_position(position)
+        items.append(("circle", x + CIRCLE_RADIUS, y + CIRCLE_RADIUS, mood_color(mood), str(day)))
+
+    legend_y = legend_top(len(cells))
+    items.append(("text", LEGEND_X, legend_y - 25, "Color Legend:", 12, "bold", "start"))
+    for idx, rasa_id in enumerate(REGISTRY.ids):
+        legend_text = f"{REGISTRY.colors[rasa_id].capitalize()} - {REGISTRY.names[rasa_id]} ({REGISTRY.meanings[rasa_id]})"
+        items.append(("text", LEGEND_X, legend_y + idx * 20, legend_text, 10, "normal", "start"))
+    return items
+
+
+def canvas_height(cells):
+    """Return the height needed for the circles and the legend (at least CANVAS_HEIGHT)."""
+    return max(CANVAS_HEIGHT, legend_top(len(cells)) + len(rasa_dict) * 20 + 20)
+
+
+def month_cells(mood_by_day, year, month):
+    """Return one (day number, mood or None) cell for each day of a month."""
+    days_in_month = calendar.monthrange(year, month)[1]
+    return [(day, mood_by_day.get(day)) for day in range(1, days_in_month + 1)]
+
+
+# =================== Renderers ===================
+def render_svg(label, period, mood_count, cells):
+    """Return the calendar of a period as an SVG document (a string)."""
+    height = canvas_height(cells)
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{CANVAS_WIDTH}" height="{height}" '
+             f'viewBox="0 0 {CANVAS_WIDTH} {height}" font-family="Helvetica, Arial, sans-serif">',
+             f'<rect width="100%" height="100%" fill="{TK_COLORS["white"]}"/>']
+
+    for item in layout(label, period, mood_count, cells):
+        if item[0] == "circle":
+            _, x, y, color, number = item
+            lines.append(f'<circle cx="{x}" cy="{y}" r="{CIRCLE_RADIUS}" '
+                         f'fill="{TK_COLORS.get(color, color)}" stroke="black"/>')
+            lines.append(f'<text x="{x}" y="{y}" font-size="10" text-anchor="middle" '
+                         f'dominant-baseline="central">{number}</text>')
+        else:
+            _, x, y, text, size, style, anchor = item
+            weight = ' font-weight="bold"' if style == "bold" else ""
+            italic = ' font-style="italic"' if style == "italic" else ""
+            lines.append(f'<text x="{x}" y="{y}" font-size="{size}"{weight}{italic} '
+                         f'text-anchor="{anchor}" dominant-baseline="central">{escape(text)}</text>')
+
+    lines.append("</svg>")
+    return "\n".join(lines) + "\n"
+
+
+def render_png(label, period, mood_count, cells, out_path):
+    """
+    Draw the calendar of a period and save it as a PNG file.
+
+    Raises RuntimeError if Pillow is not installed.
+    """
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError as error:
+        raise RuntimeError("PNG output needs Pillow (pip install Pillow); use --format svg instead.") from error
+
+    fonts = {}
+
+    def font(size):
+        # Scalable default font on Pillow 10.1+, the fixed bitmap font before that
+        if size not in fonts:
+            try:
+                fonts[size] = ImageFont.load_default(size)
+            except TypeError:
+                fonts[size] = ImageFont.load_default()
+        return fonts[size]
+
+    def draw_text(x, y, text, size, anchor):
+        # Center vertically on y, and horizontally on x for "middle" anchors
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font(size))
+        if anchor == "middle":
+            x -= (right - left) / 2
+        draw.text((x, y - (top + bottom) / 2), text, fill="black", font=font(size))
+
+    image = Image.new("RGB", (CANVAS_WIDTH, canvas_height(cells)), TK_COLORS["white"])
+    draw = ImageDraw.Draw(image)
+    for item in layout(label, period, mood_count, cells):
+        if item[0] == "circle":
+            _, x, y, color, number = item
+            draw.ellipse((x - CIRCLE_RADIUS, y - CIRCLE_RADIUS, x + CIRCLE_RADIUS, y + CIRCLE_RADIUS),
+                         fill=TK_COLORS.get(color, color), outline="black")
+            draw_text(x, y, number, 10, "middle")
+        else:
+            _, x, y, text, size, _, anchor = item
+            draw_text(x, y, text, size, anchor)
+    image.save(out_path, "PNG")
+
+
+def render_month(storage, year, month, out_path):
+    """Render one month of a journal to out_path (SVG or PNG, by its extension)."""
+    mood_count, mood_by_day = storage.month_summary(year, month)
+    label = f"{calendar.month_abbr[month]} {year}"
+    cells = month_cells(mood_by_day, year, month)
+    if out_path.lower().endswith(".png"):
+        render_png(label, "month", mood_count, cells, out_path)
+    else:
+        with open(out_path,"w",encoding="utf-8") as file:
+            file.write(render_svg(label, "month", mood_count, cells))
+
+
+# =================== Batch rendering ===================
+def _render_task(task):
+    # Render a chunk of months of one journal; runs in a worker process
+    journal_path, months, out_dir, file_format = task
+    stem = os.path.splitext(os.path.basename(journal_path))[0]
+    storage = open_storage(journal_path)
+    written = []
+    for year, month in months:
+        out_path = os.path.join(out_dir, f"{stem}_{year:04d}-{month:02d}.{file_format}")
+        render_month(storage, year, month, out_path)
+        written.append(out_path)
+    storage.close()
+    return written
+
+
+def batch_tasks(journal_paths, out_dir, file_format, date_range=None):
+    """
+    Split the months to render into tasks of at most MONTHS_PER_TASK months of one journal.
+
+    Without a date_range every month that has entries is rendered; with a
+    (start date, end date) range every month overlapping it is rendered.
+
+    The index of every CSV journal is loaded here, and rebuilt if it is stale, so
+    the workers find it up to date instead of all rebuilding it at once.
+    """
+    tasks = []
+    for journal_path in journal_paths:
+        if date_range is None:
+            storage = open_storage(journal_path)
+            months = storage.recorded_months()
+            storage.close()
+        else:
+            if not journal_path.lower().endswith(SQLITE_SUFFIXES):
+                JournalIndex.load(journal_path)
+            start, end = date_range
+            months = []
+            year, month = start.year, start.month
+            while (year, month) <= (end.year, end.month):
+                months.append((year, month))
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+        for first in range(0, len(months), MONTHS_PER_TASK):
+            tasks.append((journal_path, months[first:first + MONTHS_PER_TASK], out_dir, file_format))
+    return tasks
+
+
+def render_batch(journal_paths, out_dir, file_format="svg", date_range=None, workers=None):
+    """Render the months of every journal across a process pool. Returns the files written."""
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = batch_tasks(journal_paths, out_dir, file_format, date_range)
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for paths in executor.map(_render_task, tasks):
+            written.extend(paths)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render monthly mood calendars to SVG or PNG files.")
+    parser.add_argument("journal", help="a journal file, or a directory of journals")
+    parser.add_argument("--range", dest="date_range",
+                        help='months to render, e.g. "Jan 2025 - Jun 2025" (default: every month with entries)')
+    parser.add_argument("--format", choices=["svg","png"], default="svg")
+    parser.add_argument("--out-dir", default="calendar_reports")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.journal):
+        journal_paths = sorted(os.path.join(args.journal, name) for name in os.listdir(args.journal)
+                               if name.lower().endswith(JOURNAL_SUFFIXES))
+    else:
+        journal_paths = [args.journal]
+
+    try:
+        date_range = parse_range(args.date_range) if args.date_range else None
+        written = render_batch(journal_paths, args.out_dir, args.format, date_range, args.workers)
+    except (OSError, ValueError, RuntimeError) as error:
+        print(f"Rendering failed: {error}")
+        return 1
+    print(f"Rendered {len(written)} calendar(s) into {args.out_dir}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
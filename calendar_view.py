@@ -0,0 +1,195 @@
+"""
+Calendar View
+-------------
+Tkinter calendar views for the mood summary.
+
+- MonthViewer is a persistent window with previous/next month navigation. It creates
+  the 31 day circles, their numbers and the color legend once, and flipping to another
+  month only changes their colors and visibility, so browsing years of months does not
+  rebuild the canvas or open new windows.
+- draw_calendar draws a one-off calendar for an arbitrary list of days, used for
+  date-range summaries.
+
+Both use the same layout as the headless renderer in calendar_render.py: up to
+7 circles per row, each colored by the rasa recorded that day (white when there is
+no entry), followed by the color legend.
+"""
+import calendar
+import tkinter as tk
+
+import instrumentation
+from calendar_render import (CANVAS_HEIGHT, CANVAS_WIDTH, CIRCLE_RADIUS, LEGEND_X,
+                             cell_position, legend_top, mood_color, mood_of_the_period)
+from rasas import REGISTRY, rasa_dict
+
+
+def _draw_legend(canvas, legend_y):
+    # Add the title for the legend
+    canvas.create_text(
+        LEGEND_X,
+        legend_y - 25,
+        text="Color Legend:",
+        anchor='w',
+        font=("Helvetica", 12, "bold"))
+
+    # Show legend as text lines: "rasa name - color"
+    for idx, rasa_id in enumerate(REGISTRY.ids):
+        y = legend_y + idx * 20  # 20 px vertical spacing between lines
+        legend_text = f"{REGISTRY.colors[rasa_id].capitalize()} - {REGISTRY.names[rasa_id]} ({REGISTRY.meanings[rasa_id]})"
+        canvas.create_text(
+            LEGEND_X, y,
+            text=legend_text,
+            anchor='w',  # align left
+            font=("Helvetica", 10))
+
+
+def _create_titles(canvas):
+    # Title and subtitle, centered at the top; their text is filled in later
+    title = canvas.create_text(
+        CANVAS_WIDTH / 2,
+        20,
+        font=("Helvetica", 16, "bold"),
+        fill="black")
+    subtitle = canvas.create_text(
+        CANVAS_WIDTH / 2,
+        50,
+        font=("Helvetica", 12, "italic"),
+        fill="black")
+    return title, subtitle
+
+
+def _create_day(canvas, position, day, color):
+    # Draw the circle and day number text for one cell
+    x, y = cell_position(position)
+    oval = canvas.create_oval(x,
+                              y,
+                              x + 2 * CIRCLE_RADIUS,
+                              y + 2 * CIRCLE_RADIUS,
+                              fill=color,
+                              outline="black")
+    text = canvas.create_text(x + CIRCLE_RADIUS,
+                              y + CIRCLE_RADIUS,
+                              text=str(day),
+                              font=("Helvetica", 10))
+    return oval, text
+
+
+# =================== One-off calendar ===================
+def draw_calendar(label, period, mood_count, cells):
+    """
+    Draw the calendar of a period in a new window and wait until it is closed.
+
+    cells lists (day number, mood or None) for each day to draw, in order.
+    """
+    with instrumentation.phase("draw_calendar"):
+        most_recorded_mood, meaning = mood_of_the_period(mood_count)
+        legend_y = legend_top(len(cells))
+
+        # Create canvas to display visualisation, tall enough for the circles and the legend
+        window = tk.Tk()
+        window.title(f"The rasas you expressed in {label}")
+        canvas_height = max(CANVAS_HEIGHT, legend_y + len(rasa_dict) * 20 + 20)
+        canvas = tk.Canvas(window, width=CANVAS_WIDTH, height=canvas_height)
+        canvas.pack()
+
+        title, subtitle = _create_titles(canvas)
+        canvas.itemconfigure(title, text=f"The rasas you expressed in {label}")
+        canvas.itemconfigure(subtitle, text=f"Mood of the {period}: {most_recorded_mood} ({meaning}) ")
+
+        # Draw a circle for each day of the period
+        for position, (day, mood) in enumerate(cells):
+            _create_day(canvas, position, day, mood_color(mood))
+
+        _draw_legend(canvas, legend_y)
+    instrumentation.count("canvas_items", len(canvas.find_all()))
+    window.mainloop()
+
+
+# =================== Persistent month viewer ===================
+class MonthViewer:
+    """
+    A calendar window for one month at a time with previous/next month navigation.
+
+    All canvas items are created once in __init__; show() only reconfigures them.
+    Month rollups are read from the journal storage once and cached.
+    """
+
+    def __init__(self, storage, year, month):
+        with instrumentation.phase("draw_calendar"):
+            self._create(storage)
+        instrumentation.count("canvas_items", len(self.canvas.find_all()))
+        self.show(year, month)
+
+    def _create(self, storage):
+        self.storage = storage
+        self.rollups = {}
+
+        self.window = tk.Tk()
+        self.canvas = tk.Canvas(self.window, width=CANVAS_WIDTH, height=CANVAS_HEIGHT)
+        self.canvas.pack()
+        self.title, self.subtitle = _create_titles(self.canvas)
+
+        # Pre-allocate a circle and a number for each of the 31 possible days
+        self.days = [_create_day(self.canvas, day - 1, day, 'white') for day in range(1, 32)]
+
+        # Every month has 28 to 31 days, so the legend never moves
+        _draw_legend(self.canvas, legend_top(31))
+
+        # Navigation buttons and arrow keys
+        buttons = tk.Frame(self.window)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="< Previous", command=self.previous_month).pack(side="left", padx=10)
+        tk.Button(buttons, text="Next >", command=self.next_month).pack(side="left", padx=10)
+        self.window.bind("<Left>", lambda event: self.previous_month())
+        self.window.bind("<Right>", lambda event: self.next_month())
+
+    def rollup(self, year, month):
+        """Return the cached (mood_count, mood_by_day) of a month."""
+        if (year, month) not in self.rollups:
+            self.rollups[(year, month)] = self.storage.month_summary(year, month)
+        return self.rollups[(year, month)]
+
+    def show(self, year, month):
+        """Recolor the pooled canvas items to show the given month."""
+        with instrumentation.phase("show_month"):
+            self._show(year, month)
+
+    def _show(self, year, month):
+        self.year, self.month = year, month
+        label = f"{calendar.month_abbr[month]} {year}"
+        mood_count, mood_by_day = self.rollup(year, month)
+
+        self.window.title(f"The rasas you expressed in {label}")
+        self.canvas.itemconfigure(self.title, text=f"The rasas you expressed in {label}")
+        if mood_count:
+            most_recorded_mood, meaning = mood_of_the_period(mood_count)
+            subtitle = f"Mood of the month: {most_recorded_mood} ({meaning}) "
+        else:
+            subtitle = "No entries for this month"
+        self.canvas.itemconfigure(self.subtitle, text=subtitle)
+
+        # Color the days of this month and hide the circles it does not have
+        days_in_month = calendar.monthrange(year, month)[1]
+        for day, (oval, text) in enumerate(self.days, start=1):
+            if day <= days_in_month:
+                self.canvas.itemconfigure(oval, fill=mood_color(mood_by_day.get(day)), state="normal")
+                self.canvas.itemconfigure(text, state="normal")
+            else:
+                self.canvas.itemconfigure(oval, state="hidden")
+                self.canvas.itemconfigure(text, state="hidden")
+
+    def previous_month(self):
+        if self.month == 1:
+            self.show(self.year - 1, 12)
+        else:
+            self.show(self.year, self.month - 1)
+
+    def next_month(self):
+        if self.month == 12:
+            self.show(self.year + 1, 1)
+        else:
+            self.show(self.year, self.month + 1)
+
+    def run(self):
+        """Open the window and wait until it is closed."""
+        self.window.mainloop()
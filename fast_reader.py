@@ -0,0 +1,232 @@
+"""
+Fast Reader
+-----------
+Reads the mood tracking CSV without csv.DictReader.
+
+The journal is memory-mapped and searched with precompiled byte patterns, so rows
+that do not match are never decoded or split into fields:
+- scan_month finds a month's rows by their date suffix, e.g. b" May 2025,".
+- scan_rasa finds a rasa's rows by the rasa name in the second column.
+- iter_rows and read_columns pull the date and mood of every row, for building the
+  journal index and the analytics columns.
+
+Matching rows come back as Entry objects, which use __slots__ instead of a dict per
+row and can still be read by column name (entry['Verse']) like a DictReader row.
+
+Each journal row is expected to sit on its own line, as written by start_journaling().
+"""
+import csv
+import mmap
+import re
+from array import array
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import instrumentation
+from rasas import REGISTRY
+
+# Month abbreviations as written in the journal's DD Mon YYYY dates
+MONTH_BYTES = {month: date(2000, month, 1).strftime('%b').encode("ascii") for month in range(1, 13)}
+MONTH_NUMBERS = {name.decode("ascii"): month for month, name in MONTH_BYTES.items()}
+
+# Rasa names as written by start_journaling(), mapped to their rasa number
+RASA_BYTES = {name.encode("utf-8"): rasa_id for rasa_id, name in REGISTRY.names.items()}
+
+# The first two fields of a row (date and mood) and the rest of its line
+ROW_PATTERN = re.compile(rb"^([^,\r\n]*),([^,\r\n]*)[^\n]*\n?", re.MULTILINE)
+
+# The first two fields of a row, found from the newline before it
+FIELDS_PATTERN = re.compile(rb"\n([^,\r\n]*),([^,\r\n]*)")
+
+
+def parse_entry_date(text):
+    """
+    Parse a journal date written as DD Mon YYYY (e.g. '05 Jun 2025').
+
+    Dates in exactly that layout are read by position, which is many times faster
+    than strptime; anything else (e.g. '5 Jun 2025') falls back to strptime.
+    Raises ValueError if the date cannot be parsed.
+    """
+    if len(text) == 11 and text[3:6] in MONTH_NUMBERS:
+        try:
+            return date(int(text[7:]), MONTH_NUMBERS[text[3:6]], int(text[:2]))
+        except ValueError:
+            pass
+    return datetime.strptime(text, '%d %b %Y').date()
+
+
+# =================== Entries ===================
+class Entry:
+    """
+    One journal row. Fields are attributes, and can also be read by CSV column name
+    (entry['Date'], entry.get('Verse')) like a csv.DictReader row. Missing fields are None.
+    """
+
+    __slots__ = ("date", "mood", "meaning", "color", "prompt", "verse")
+
+    _COLUMNS = {"Date": "date", "Mood": "mood", "Meaning": "meaning",
+                "Color": "color", "Prompt": "prompt", "Verse": "verse"}
+
+    def __init__(self, date=None, mood=None, meaning=None, color=None, prompt=None, verse=None, *extra):
+        self.date = date
+        self.mood = mood
+        self.meaning = meaning
+        self.color = color
+        self.prompt = prompt
+        self.verse = verse
+
+    def __getitem__(self, column):
+        return getattr(self, self._COLUMNS[column])
+
+    def get(self, column, default=None):
+        value = getattr(self, self._COLUMNS.get(column, ""), None)
+        return default if value is None else value
+
+    def __eq__(self, other):
+        return isinstance(other, Entry) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Entry({self.date!r}, {self.mood!r}, {self.verse!r})"
+
+
+def parse_line(line):
+    """Return the Entry of one journal line (bytes, with or without its line ending)."""
+    text = line.decode("utf-8").rstrip("\r\n")
+    # Only quoted fields need the csv module; most rows are plain comma-separated text
+    if '"' in text:
+        return Entry(*next(csv.reader([text]), []))
+    return Entry(*text.split(","))
+
+
+# =================== Memory-mapped journal ===================
+@contextmanager
+def mapped(path):
+    """Memory-map a journal for reading; an empty journal maps to b""."""
+    with open(path,"rb") as file:
+        try:
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            yield b""
+            return
+        try:
+            yield view
+        finally:
+            view.close()
+
+
+def first_row(data):
+    """Return the offset of the first row after the header line of a mapped journal."""
+    newline = data.find(b"\n")
+    return len(data) if newline < 0 else newline + 1
+
+
+def _scan(path, pattern):
+    """
+    Return an Entry for every row (after the header) matched by pattern.
+
+    pattern starts at the newline before a row and captures the row's line, so the
+    regex engine only tries to match at newlines and rows that do not match are
+    never decoded.
+    """
+    with mapped(path) as data:
+        # Start at the newline that ends the header
+        start = first_row(data) - 1
+        if start < 0:
+            return []
+        entries = [parse_line(line) for line in pattern.findall(data, start)]
+        if instrumentation.ENABLED:
+            instrumentation.count("bytes_read", len(data) - start)
+            # Slicing a mapped journal copies it, so lines are only counted while instrumented
+            instrumentation.count("rows_scanned", data[start:].count(b"\n"))
+            instrumentation.count("rows_matched", len(entries))
+        return entries
+
+
+def scan_month(path, year, month):
+    """Return the entries dated in the given month, in journal order."""
+    suffix = re.escape(b" " + MONTH_BYTES[month] + b" %04d" % year)
+    pattern = re.compile(rb'\n("?\d{1,2}' + suffix + rb'"?,[^\n]*)', re.IGNORECASE)
+    return _scan(path, pattern)
+
+
+def scan_rasa(path, rasa):
+    """Return the entries recorded for a rasa (compared case-insensitively), in journal order."""
+    name = re.escape(rasa.strip().encode("utf-8"))
+    pattern = re.compile(rb'\n([^,\n]*,[ \t]*"?[ \t]*' + name + rb'[ \t]*"?[ \t]*,[^\n]*)', re.IGNORECASE)
+    return _scan(path, pattern)
+
+
+def iter_rows(path, end=None):
+    """
+    Yield (start, end, date text, mood text) for every row after the header, where
+    [start, end) are the bytes of the row's line. Lines without a comma are skipped.
+    If end is given, only the first end bytes of the journal are read.
+    """
+    with mapped(path) as data:
+        yield from rows_between(data, first_row(data), len(data) if end is None else min(end, len(data)))
+
+
+def rows_between(data, start, end):
+    """
+    Like iter_rows, for the rows of a mapped journal (or bytes) that lie in
+    data[start:end]. start must be the beginning of a line.
+    """
+    for match in ROW_PATTERN.finditer(data, start, end):
+        entry_date, mood = match.group(1), match.group(2)
+        if entry_date.startswith(b'"') or mood.startswith(b'"'):
+            entry = parse_line(match.group())
+            yield match.start(), match.end(), entry.date, entry.mood
+        else:
+            yield match.start(), match.end(), entry_date.decode("utf-8"), mood.decode("utf-8")
+
+
+def read_columns(path):
+    """
+    Return (day ordinals, rasa numbers) of every row with a readable date and a
+    known rasa, in journal order: an array of ints and a bytes object.
+    """
+    days = array("l")
+    rasas = bytearray()
+    # Journals repeat the same dates and rasa spellings, so each is converted only once
+    day_cache = {}
+    rasa_cache = dict(RASA_BYTES)
+
+    with mapped(path) as data:
+        # Start at the newline that ends the header
+        start = first_row(data) - 1
+        rows = FIELDS_PATTERN.findall(data, start) if start >= 0 else []
+        for raw_date, raw_mood in rows:
+            rasa_id = rasa_cache.get(raw_mood)
+            if rasa_id is None:
+                if raw_mood in rasa_cache:
+                    continue
+                rasa_id = rasa_cache[raw_mood] = REGISTRY.id_of(raw_mood.decode("utf-8", "replace"))
+                if rasa_id is None:
+                    continue
+
+            day = day_cache.get(raw_date)
+            if day is None:
+                if raw_date in day_cache:
+                    continue
+                day = day_cache[raw_date] = _day_ordinal(raw_date)
+                if day is None:
+                    continue
+
+            days.append(day)
+            rasas.append(rasa_id)
+
+        if instrumentation.ENABLED:
+            instrumentation.count("bytes_read", len(data))
+            instrumentation.count("rows_scanned", len(rows))
+            instrumentation.count("rows_matched", len(days))
+    return days, bytes(rasas)
+
+
+def _day_ordinal(raw_date):
+    # Read the same way as by the journal index, so both agree on which rows have a date
+    try:
+        return parse_entry_date(raw_date.strip(b'"').decode("utf-8")).toordinal()
+    except ValueError:
+        return None
@@ -0,0 +1,53 @@
+"""
+File Lock
+---------
+An exclusive advisory lock held on a lock file, shared by the writers and readers of
+a journal and its indexes, e.g. "<journal>.lock" around appends to a CSV journal and
+around rebuilding its index.
+
+Locks are advisory fcntl locks where available, msvcrt locks on Windows, and no-ops
+where neither exists (a single process then still works correctly).
+"""
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+class FileLock:
+    """An exclusive advisory lock held on a lock file, used as a context manager."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path,"a+b")
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            self.file.seek(0)
+            while True:
+                # msvcrt gives up after 10 one-second attempts, so keep asking
+                try:
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
@@ -0,0 +1,287 @@
+"""
+Fleet Report
+------------
+Monthly rasa distributions for a whole fleet of journals, e.g. one
+mood_tracking.csv per user in a directory tree.
+
+For every journal and every month with entries the report has one row with the
+number of entries of each rasa and the mood of the month. After those come the
+population rows: for every month, the entries of each rasa summed over all users,
+the number of users who wrote that month and the population's mood of the month.
+The mood of the month is the most recorded rasa; ties go to the lower rasa number.
+
+The work is done map-reduce style on a process pool:
+- map: each worker reads a chunk of JOURNALS_PER_TASK journals and returns their
+  per-user rows and the chunk's partial population counts.
+- reduce: the main process writes the per-user rows to the report as each chunk
+  comes back, and adds the partial counts into one table per month.
+
+Journals are discovered lazily and only a few chunks per worker are in flight at a
+time, so memory stays flat however many journals there are, and the per-user rows
+never pile up in memory. Workers receive paths rather than data, so adding cores
+adds throughput until the disk is the limit.
+
+A journal's user is the name of its directory when the file is called
+mood_tracking.*, and the file name otherwise. Journals can be CSV, SQLite or
+binary (.nvj) files.
+
+    python fleet_report.py users/ --output fleet.csv
+    python fleet_report.py "users/*/mood_tracking.csv" --output fleet.json --workers 8
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+
+from analytics import load_columns
+from journal_index import month_key
+from rasas import REGISTRY
+
+# Journal file extensions picked up when scanning a directory
+JOURNAL_SUFFIXES = (".csv", ".db", ".sqlite", ".sqlite3", ".nvj")
+
+# Number of journals read by a worker in one go
+JOURNALS_PER_TASK = 32
+
+# Number of chunks queued per worker, so workers never wait for the next chunk
+TASKS_IN_FLIGHT_PER_WORKER = 2
+
+# Rasa numbers in report column order, and the report columns
+RASA_NUMBERS = REGISTRY.ids
+REPORT_COLUMNS = (["scope", "user", "journal", "month", "users", "entries"]
+                  + [REGISTRY.names[rasa_id] for rasa_id in RASA_NUMBERS]
+                  + ["mood_of_the_month"])
+
+
+# =================== Finding journals ===================
+def iter_journals(sources):
+    """
+    Yield the journal paths named by sources: journal files, directories (searched
+    recursively for JOURNAL_SUFFIXES files) and glob patterns.
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            for directory, subdirectories, names in os.walk(source):
+                subdirectories.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(JOURNAL_SUFFIXES):
+                        yield os.path.join(directory, name)
+        elif glob.has_magic(source):
+            yield from glob.iglob(source, recursive=True)
+        else:
+            yield source
+
+
+def user_of(journal_path):
+    """Return the user a journal belongs to."""
+    stem = os.path.splitext(os.path.basename(journal_path))[0]
+    if stem == "mood_tracking":
+        return os.path.basename(os.path.dirname(os.path.abspath(journal_path)))
+    return stem
+
+
+def mood_of_the_month(counts):
+    """Return the name of the most recorded rasa in a {rasa number: count} table."""
+    rasa_id = max(RASA_NUMBERS, key=lambda number: (counts.get(number, 0), -number))
+    return REGISTRY.names[rasa_id]
+
+
+# =================== Map: one chunk of journals ===================
+def monthly_counts(journal_path):
+    """Return {month key: {rasa number: count}} for a journal, months in date order."""
+    columns = load_columns(journal_path)
+    months = {}
+    month_of_day = {}
+    for day, rasa_id in zip(columns.days, columns.rasas):
+        key = month_of_day.get(day)
+        if key is None:
+            entry_date = date.fromordinal(day)
+            key = month_of_day[day] = month_key(entry_date.year, entry_date.month)
+        counts = months.get(key)
+        if counts is None:
+            counts = months[key] = {}
+        counts[rasa_id] = counts.get(rasa_id, 0) + 1
+    return months
+
+
+def aggregate_chunk(journal_paths):
+    """
+    Aggregate a chunk of journals; runs in a worker process.
+
+    Returns (journals read, user rows, population counts, errors): the report rows
+    of each journal, {month key: [users, {rasa number: count}]} summed over the
+    chunk, and (journal path, message) for each journal that could not be read.
+    """
+    rows = []
+    population = {}
+    errors = []
+    for journal_path in journal_paths:
+        # Opening a missing SQLite journal would create it
+        if not os.path.isfile(journal_path):
+            errors.append((journal_path, "no such journal"))
+            continue
+        try:
+            months = monthly_counts(journal_path)
+        except (OSError, ValueError, sqlite3.Error) as error:
+            errors.append((journal_path, str(error)))
+            continue
+
+        user = user_of(journal_path)
+        for key, counts in months.items():
+            rows.append(report_row("user", user, journal_path, key, 1, counts))
+            total = population.get(key)
+            if total is None:
+                total = population[key] = [0, {}]
+            total[0] += 1
+            for rasa_id, count in counts.items():
+                total[1][rasa_id] = total[1].get(rasa_id, 0) + count
+    return len(journal_paths) - len(errors), rows, population, errors
+
+
+def report_row(scope, user, journal_path, key, users, counts):
+    """Return one report row as a list of values in REPORT_COLUMNS order."""
+    return ([scope, user, journal_path, key, users, sum(counts.values())]
+            + [counts.get(rasa_id, 0) for rasa_id in RASA_NUMBERS]
+            + [mood_of_the_month(counts)])
+
+
+# =================== Reduce ===================
+def merge_population(total, partial):
+    """Add a chunk's population counts into the running total."""
+    for key, (users, counts) in partial.items():
+        month = total.get(key)
+        if month is None:
+            month = total[key] = [0, {}]
+        month[0] += users
+        for rasa_id, count in counts.items():
+            month[1][rasa_id] = month[1].get(rasa_id, 0) + count
+
+
+def chunks(iterable, size):
+    """Yield lists of up to size items from iterable, reading it lazily."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_chunks(tasks, workers=None):
+    """
+    Yield the result of aggregate_chunk for each task, in order, keeping only a
+    few tasks per worker queued on the process pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        limit = workers * TASKS_IN_FLIGHT_PER_WORKER
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(aggregate_chunk, task))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CsvReport:
+    """Report written as CSV rows, user rows first and population rows last."""
+
+    def __init__(self, file):
+        self.writer = csv.writer(file)
+        self.writer.writerow(REPORT_COLUMNS)
+
+    def add_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def finish(self, population_rows, summary):
+        self.writer.writerows(population_rows)
+
+
+class JsonReport:
+    """
+    Report written as one JSON object with "users" and "population" lists of row
+    objects and a "summary". The users list is written as rows arrive.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.first = True
+        file.write('{"users": [')
+
+    def add_rows(self, rows):
+        for row in rows:
+            self.file.write(("\n" if self.first else ",\n") + json.dumps(dict(zip(REPORT_COLUMNS, row))))
+            self.first = False
+
+    def finish(self, population_rows, summary):
+        self.file.write('\n], "population": [')
+        self.file.write(",".join("\n" + json.dumps(dict(zip(REPORT_COLUMNS, row))) for row in population_rows))
+        self.file.write('\n], "summary": ' + json.dumps(summary) + "}\n")
+
+
+def fleet_report(sources, file, report_format="csv", workers=None, chunk_size=JOURNALS_PER_TASK):
+    """
+    Aggregate every journal named by sources and write the report to an open text
+    file. Returns a summary dictionary (journals, failed, entries, seconds).
+
+    Journals that cannot be read are reported on stderr and left out.
+    """
+    start = time.perf_counter()
+    report = JsonReport(file) if report_format == "json" else CsvReport(file)
+    population = {}
+    journals = failed = entries = 0
+
+    for read, rows, partial, errors in run_chunks(chunks(iter_journals(sources), chunk_size), workers):
+        report.add_rows(rows)
+        merge_population(population, partial)
+        journals += read
+        entries += sum(row[5] for row in rows)
+        for journal_path, message in errors:
+            print(f"Skipped {journal_path}: {message}", file=sys.stderr)
+        failed += len(errors)
+
+    population_rows = [report_row("population", "", "", key, users, counts)
+                       for key, (users, counts) in sorted(population.items())]
+    summary = {"journals": journals, "failed": failed, "entries": entries,
+               "seconds": round(time.perf_counter() - start, 3)}
+    report.finish(population_rows, summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate monthly rasa distributions over many journals.")
+    parser.add_argument("sources", nargs="+", help="journal files, directories of journals or glob patterns")
+    parser.add_argument("--output", default="fleet_report.csv", help="report file (.csv or .json)")
+    parser.add_argument("--format", choices=["csv","json"],
+                        help="report format (default: from the output file extension)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=JOURNALS_PER_TASK, help="journals per work unit")
+    args = parser.parse_args(argv)
+
+    report_format = args.format or ("json" if args.output.lower().endswith(".json") else "csv")
+    try:
+        with open(args.output,"w",newline='',encoding="utf-8") as file:
+            summary = fleet_report(args.sources, file, report_format, args.workers, args.chunk_size)
+    except (OSError, RuntimeError) as error:
+        print(f"Report failed: {error}")
+        return 1
+
+    rate = summary['journals'] / summary['seconds'] if summary['seconds'] else 0
+    print(f"Aggregated {summary['journals']} journal(s), {summary['entries']} entries, into {args.output} "
+          f"in {summary['seconds']:.1f} s ({rate:,.0f} journals/sec).")
+    if summary['failed']:
+        print(f"{summary['failed']} journal(s) could not be read.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Instrumentation
+---------------
+Opt-in timings and counters for the tracker's menu actions and commands, for finding
+where time goes on a real journal without patching the code.
+
+Each action (e.g. view_stats) is recorded with:
+- its total time and the time of each phase inside it (opening the journal,
+  loading or rebuilding the index, reading rows, drawing the calendar, ...)
+- counters: rows scanned and rows matched by journal reads, bytes read from the
+  journal and Canvas items created
+
+Instrumentation is off unless NAVARASAM_PROFILE (or the tracker's --profile flag)
+selects an output:
+- json  : one JSON line per action, appended to NAVARASAM_PROFILE_FILE
+          (default navarasam_profile.jsonl)
+- table : a summary table per action, printed to stderr when the program exits
+
+NAVARASAM_CPROFILE (or --cprofile) names actions to run under cProfile, separated by
+commas, or "all". The statistics of every run of an action are collected in
+profile_<action>.prof, which can be read with python -m pstats.
+
+    NAVARASAM_PROFILE=table python navarasam_mood_tracker.py
+    python navarasam_mood_tracker.py --profile json --cprofile view_stats
+    python navarasam_mood_tracker.py --profile table stats --all-months
+
+Interactive actions include the time spent waiting for input; their phases show
+where the rest of it went. While instrumentation is off, phase() and the counters
+cost one attribute check each.
+"""
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+# Output modes selected by NAVARASAM_PROFILE / --profile
+MODES = ("json", "table")
+
+# File the json mode appends to
+DEFAULT_PROFILE_FILE = "navarasam_profile.jsonl"
+
+# Set by configure(); checked by the instrumented code before doing any work
+ENABLED = False
+
+_mode = None
+_profile_file = DEFAULT_PROFILE_FILE
+_cprofile_actions = frozenset()
+_profiles = {}
+_totals = {}
+_record = None
+_NO_PHASE = nullcontext()
+
+
+def configure(mode=None, cprofile=None, profile_file=None):
+    """
+    Turn instrumentation on with an output mode ("json" or "table") and optionally
+    a comma-separated list of actions to run under cProfile, or off with mode None.
+    Raises ValueError for an unknown mode.
+    """
+    global ENABLED, _mode, _profile_file, _cprofile_actions
+    if mode and mode not in MODES:
+        raise ValueError(f"Unknown profile output {mode!r}; use {' or '.join(MODES)}.")
+    _mode = mode or None
+    _profile_file = profile_file or DEFAULT_PROFILE_FILE
+    _cprofile_actions = frozenset(name.strip() for name in (cprofile or "").split(",") if name.strip())
+    ENABLED = bool(_mode or _cprofile_actions)
+
+
+def configure_from_environment(mode=None, cprofile=None):
+    """
+    Configure instrumentation from NAVARASAM_PROFILE, NAVARASAM_CPROFILE and
+    NAVARASAM_PROFILE_FILE; mode and cprofile, if given, take precedence (e.g. from
+    command line flags). An unknown mode in the environment is reported and ignored.
+    """
+    try:
+        configure(mode or os.environ.get("NAVARASAM_PROFILE", "").strip().lower() or None,
+                  cprofile or os.environ.get("NAVARASAM_CPROFILE"),
+                  os.environ.get("NAVARASAM_PROFILE_FILE"))
+    except ValueError as error:
+        print(f"NAVARASAM_PROFILE: {error}", file=sys.stderr)
+        configure(None, cprofile or os.environ.get("NAVARASAM_CPROFILE"))
+
+
+# =================== Recording ===================
+@contextmanager
+def action(name):
+    """
+    Record one run of an action. Phases and counters recorded while it runs are
+    added to it. An action inside another one is recorded as a phase of the outer one.
+    """
+    global _record
+    if not ENABLED or _record is not None:
+        with phase(name):
+            yield
+        return
+
+    profile = None
+    if name in _cprofile_actions or "all" in _cprofile_actions:
+        import cProfile
+        profile = _profiles.setdefault(name, cProfile.Profile())
+
+    _record = {"action": name, "started": datetime.now().isoformat(timespec="seconds"),
+               "seconds": 0.0, "phases": {}, "counters": {}}
+    start = time.perf_counter()
+    try:
+        if profile is None:
+            yield
+        else:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+    finally:
+        record, _record = _record, None
+        record['seconds'] = time.perf_counter() - start
+        if profile is not None:
+            profile.dump_stats(f"profile_{name}.prof")
+        _emit(record)
+
+
+def instrumented(function):
+    """Decorator that records every call of function as an action named after it."""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return function(*args, **kwargs)
+        with action(function.__name__):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def phase(name):
+    """Return a context manager that adds the time spent in it to a phase of the current action."""
+    if _record is None:
+        return _NO_PHASE
+    return _timed_phase(name)
+
+
+@contextmanager
+def _timed_phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        # The action may have ended in the meantime, e.g. in a generator closed later
+        if _record is not None:
+            phases = _record['phases']
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def count(name, amount=1):
+    """Add amount to a counter of the current action (rows_scanned, rows_matched, bytes_read, canvas_items)."""
+    if _record is not None:
+        counters = _record['counters']
+        counters[name] = counters.get(name, 0) + amount
+
+
+# =================== Output ===================
+def _emit(record):
+    if _mode == "json":
+        with open(_profile_file,"a",encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+    elif _mode == "table":
+        if not _totals:
+            atexit.register(print_summary)
+        total = _totals.setdefault(record['action'], {"runs": 0, "seconds": 0.0, "max": 0.0,
+                                                      "phases": {}, "counters": {}})
+        total['runs'] += 1
+        total['seconds'] += record['seconds']
+        total['max'] = max(total['max'], record['seconds'])
+        for key in ("phases", "counters"):
+            for name, value in record[key].items():
+                total[key][name] = total[key].get(name, 0) + value
+
+
+def summary_lines():
+    """Return the summary table of the actions recorded so far as a list of lines."""
+    lines = [f"{'Action / phase':<32}{'runs':>6}{'total ms':>12}{'mean ms':>10}{'max ms':>10}"]
+    for name, total in _totals.items():
+        lines.append(f"{name:<32}{total['runs']:>6}{total['seconds'] * 1000:>12.1f}"
+                     f"{total['seconds'] * 1000 / total['runs']:>10.1f}{total['max'] * 1000:>10.1f}")
+        for phase_name, seconds in sorted(total['phases'].items(), key=lambda item: -item[1]):
+            lines.append(f"  {phase_name:<36}{seconds * 1000:>12.1f}{seconds * 1000 / total['runs']:>10.1f}")
+        for counter, value in sorted(total['counters'].items()):
+            lines.append(f"  {counter:<36}{value:>12,}")
+    return lines
+
+
+def print_summary():
+    """Print the summary table to stderr."""
+    if _totals:
+        print("\n" + "\n".join(summary_lines()), file=sys.stderr)
+
+
+configure_from_environment()
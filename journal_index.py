@@ -0,0 +1,538 @@
+"""
+Journal Index
+-------------
+A small sidecar index for the mood tracking CSV, so that monthly summaries can
+seek straight to the rows they need instead of re-reading the whole journal.
+
+Alongside the byte ranges, the index keeps a rollup for every month: how often each
+rasa was recorded and which rasa was recorded on each day. A monthly summary is then
+a lookup rather than an aggregation over the month's rows.
+
+For every rasa the index also keeps a posting list with the date and byte offset of
+each row recorded for it, in date order, so entries of one rasa can be paged through
+by reading only the rows on the page.
+
+The index is stored next to the journal in two files:
+- "<journal>.idx"     : a snapshot. A fixed header with the size and modification time
+                        of the journal it describes and a JSON header with the month
+                        ranges and rollups are followed by the posting lists as arrays
+                        of integers. The snapshot is memory-mapped, and a rasa's
+                        postings are only copied out of it when that rasa is asked for.
+- "<journal>.idx.log" : one JSON line for every row appended since the snapshot.
+
+Recording an append reads only the last line of the log (or the snapshot's fixed
+header) to check that the index described the journal just before the append, then
+adds one line to the log, so it costs the same however large the journal grows.
+Loading the index reads the month ranges and rollups and replays the log; neither
+grows with the number of rows. The log is folded back into the snapshot once it gets
+long. If the journal's size or modification time no longer matches what the index
+recorded (e.g. the CSV was edited by hand), the index is rebuilt from the CSV in a
+single pass.
+
+Each journal row is expected to sit on its own line, as written by start_journaling().
+
+The index can also be checked or rebuilt from the command line:
+    python journal_index.py verify [journal.csv]
+    python journal_index.py rebuild [journal.csv]
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from contextlib import nullcontext
+from itertools import chain
+
+import instrumentation
+from fast_reader import iter_rows, parse_entry_date, parse_line
+from file_lock import FileLock
+from rasas import REGISTRY
+
+# Column names used by the mood tracking CSV
+FIELDNAMES = ["Date","Mood","Meaning","Color","Prompt","Verse"]
+
+# Number of logged appends after which the log is merged into the snapshot
+LOG_COMPACT_THRESHOLD = 500
+
+MAGIC = b"NVI2"
+
+# Snapshot header: magic, size and modification time (ns) of the journal it
+# describes, length of the JSON header that follows
+HEADER = struct.Struct("<4sQqI")
+
+
+def month_key(year, month):
+    """Return the key used to store a month in the index, e.g. '2025-05'."""
+    return f"{year:04d}-{month:02d}"
+
+
+class JournalIndex:
+    """
+    Byte-offset index of a mood tracking CSV keyed by (year, month).
+
+    For every month the index keeps a list of [start, end) byte ranges covering the
+    rows dated in that month. Consecutive rows of the same month share one range,
+    so a journal written day by day needs a single range per month.
+
+    It also keeps a rollup for every month with the count of each mood and the
+    mood recorded on each day (the last entry of a day wins, as in the calendar view).
+
+    Finally it keeps a posting list per rasa (lowercased mood name): the date
+    ordinals and byte offsets of its rows, ordered by (date, offset) so that rows of
+    the same day keep their journal order, whatever order the rows were appended in.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.index_path = csv_path + ".idx"
+        self.log_path = csv_path + ".idx.log"
+        self._mapping = None
+        self._reset()
+
+    def _reset(self):
+        self._release()
+        # Size and modification time of the journal this index describes
+        self.size = 0
+        self.mtime_ns = 0
+        self.months = {}
+        self.rollups = {}
+        self.sections = {}  # rasa -> [start, count] of its postings in the snapshot
+        self.rasas = {}     # rasa -> (days, offsets) arrays of the postings read so far
+        self.added = {}     # rasa -> [(day, offset), ...] of rows added since they were read
+        self.log_length = 0
+        # Snapshot file version and how far into the append log this index has read
+        self.snapshot_signature = None
+        self.log_offset = 0
+        # Parsed form of each date text seen so far: (month key, day, ordinal), or None
+        self._dates = {}
+
+    def _release(self):
+        # Unmap the snapshot; postings already read from it are copies and stay valid
+        if self._mapping is not None:
+            self._view.release()
+            self._mapping.close()
+            self._mapping = None
+
+    # -------- Loading and saving --------
+    @classmethod
+    def load(cls, csv_path, locked=False):
+        """
+        Load the index for csv_path, rebuilding it if it is missing or stale.
+
+        Steps:
+        - Map the snapshot and replay any logged appends on top of it.
+        - Compare the recorded size and mtime with the journal on disk.
+        - Rebuild and save the index if anything is missing, unreadable or out of date.
+
+        The rebuild happens under the journal lock ("<journal>.lock"), so no writer can
+        append or log rows while the journal is scanned and the log is cleared; the
+        index is read again once the lock is held, in case another process rebuilt it
+        meanwhile. Pass locked=True when the caller already holds the journal lock.
+        """
+        index = cls.read_existing(csv_path)
+        if os.path.exists(csv_path) and not index.is_current():
+            with nullcontext() if locked else FileLock(csv_path + ".lock"):
+                index._release()
+                index = cls.read_existing(csv_path)
+                if not index.is_current():
+                    index.rebuild()
+                    index.save()
+        return index
+
+    @classmethod
+    def read_existing(cls, csv_path):
+        """Read the stored index for csv_path as it is, without checking or rebuilding it."""
+        index = cls(csv_path)
+        try:
+            index._read_snapshot()
+            index._replay_log()
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            index._reset()
+        return index
+
+    def _read_snapshot(self):
+        with open(self.index_path,"rb") as file:
+            magic, size, mtime_ns, length = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.index_path} is not a journal index snapshot")
+            header = json.loads(file.read(length))
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.snapshot_signature = _signature(os.fstat(file.fileno()))
+
+        # Offsets (8 bytes each) and then days (4 bytes each) of every posting
+        position = HEADER.size + length
+        position += -position % 8
+        postings = sum(count for _, count in header['rasas'].values())
+        if header['byteorder'] != sys.byteorder or len(mapping) != position + 12 * postings:
+            mapping.close()
+            raise ValueError(f"{self.index_path} is truncated or from another platform")
+
+        self._mapping = mapping
+        self._view = memoryview(mapping)
+        self._offsets_start = position
+        self._days_start = position + 8 * postings
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.months = header['months']
+        self.rollups = header['rollups']
+        self.sections = header['rasas']
+
+    def _replay_log(self):
+        # Replay the log lines after log_offset; a line still being written is left for later
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path,"rb") as file:
+            file.seek(self.log_offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                self.add_row(record['start'], record['end'], record['date'], record['mood'])
+                self.size = record['size']
+                self.mtime_ns = record['mtime_ns']
+                self.log_length += 1
+                self.log_offset += len(line)
+
+    def refresh(self):
+        """
+        Catch up with appends that other processes logged since this index was read.
+
+        Only the new log lines are replayed. Returns True if the index is now current;
+        if the snapshot was rewritten meanwhile, or the log cannot be read, it returns
+        False and the index should be loaded again.
+        """
+        try:
+            if _signature(os.stat(self.index_path)) != self.snapshot_signature:
+                return False
+            self._replay_log()
+        except (OSError, ValueError, KeyError):
+            return False
+        return self.is_current()
+
+    def is_current(self):
+        """Return True if the index matches the journal's current size and mtime."""
+        try:
+            stat = os.stat(self.csv_path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def save(self):
+        """Write a fresh snapshot of the index and clear the append log."""
+        sections = {}
+        offsets = array("Q")
+        days = array("I")
+        for rasa in sorted(self.sections.keys() | self.rasas.keys() | self.added.keys()):
+            rasa_days, rasa_offsets = self._postings(rasa)
+            if not rasa_days:
+                continue
+            sections[rasa] = [len(days), len(rasa_days)]
+            days.extend(rasa_days)
+            offsets.extend(rasa_offsets)
+        header = json.dumps({"byteorder": sys.byteorder,
+                             "months": self.months,
+                             "rollups": self.rollups,
+                             "rasas": sections}).encode("utf-8")
+        # Every rasa's postings are in self.rasas now, so the old snapshot is no longer needed
+        self._release()
+
+        # Write to a temporary file first so a crash never leaves a half-written index
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path,"wb") as file:
+            file.write(HEADER.pack(MAGIC, self.size, self.mtime_ns, len(header)) + header)
+            file.write(b"\0" * (-file.tell() % 8))
+            file.write(offsets.tobytes())
+            file.write(days.tobytes())
+        os.replace(temp_path, self.index_path)
+        self.sections = sections
+        self.snapshot_signature = _signature(os.stat(self.index_path))
+
+        try:
+            os.remove(self.log_path)
+        except FileNotFoundError:
+            pass
+        self.log_length = 0
+        self.log_offset = 0
+
+    @classmethod
+    def log_appends(cls, csv_path, rows, before):
+        """
+        Add rows that were just appended to the journal, given as (start, end, date,
+        mood) tuples in file order, to the append log of its stored index.
+
+        before is the journal's (size, mtime_ns) from just before the rows were written.
+        The index is not loaded: only the last line of the log, or the snapshot's fixed
+        header if the log is empty, is read to check that the stored index described
+        the journal at that point. If it did not, nothing is logged; the index is stale
+        anyway and is rebuilt when it is next loaded.
+
+        Returns the number of rows in the log afterwards, or 0 if nothing was logged.
+        """
+        log_path = csv_path + ".idx.log"
+        try:
+            line = _last_line(log_path)
+            if line is not None:
+                record = json.loads(line)
+                recorded, length = (record['size'], record['mtime_ns']), record['n']
+            else:
+                with open(csv_path + ".idx","rb") as file:
+                    magic, size, mtime_ns, _ = HEADER.unpack(file.read(HEADER.size))
+                recorded, length = ((size, mtime_ns) if magic == MAGIC else None), 0
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return 0
+        if recorded != tuple(before):
+            return 0
+
+        stat = os.stat(csv_path)
+        lines = [json.dumps({"n": number, "start": start, "end": end, "date": entry_date, "mood": mood,
+                             "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}) + "\n"
+                 for number, (start, end, entry_date, mood) in enumerate(rows, start=length + 1)]
+        with open(log_path,"ab") as file:
+            file.write("".join(lines).encode("utf-8"))
+        return length + len(lines)
+
+    # -------- Building and updating --------
+    def rebuild(self):
+        """Recompute the index and monthly rollups from the CSV in one memory-mapped pass."""
+        self._reset()
+        # Only the bytes present now are indexed, so rows appended during the scan are
+        # left for the append log (or make the index stale) instead of being claimed
+        stat = os.stat(self.csv_path)
+        with instrumentation.phase("index_rebuild"):
+            for start, end, entry_date, mood in iter_rows(self.csv_path, stat.st_size):
+                self.add_row(start, end, entry_date, mood)
+
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        if instrumentation.ENABLED:
+            instrumentation.count("bytes_read", self.size)
+            instrumentation.count("rows_scanned", sum(len(added) for added in self.added.values()))
+
+    def add_row(self, start, end, entry_date, mood):
+        """
+        Add the row stored at bytes [start, end) of the journal to the index.
+
+        Rows whose date cannot be parsed are left out of the index.
+        """
+        # Journals repeat the same dates, so each date text is parsed only once
+        if entry_date not in self._dates:
+            try:
+                parsed_date = parse_entry_date(entry_date)
+                self._dates[entry_date] = (month_key(parsed_date.year, parsed_date.month),
+                                           str(parsed_date.day), parsed_date.toordinal())
+            except ValueError:
+                self._dates[entry_date] = None
+        if self._dates[entry_date] is None:
+            return
+
+        key, day, ordinal = self._dates[entry_date]
+        ranges = self.months.setdefault(key, [])
+        # Extend the previous range when this row directly follows it
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+
+        # Update the month's mood counts and day -> mood mapping
+        rollup = self.rollups.setdefault(key, {"counts": {}, "days": {}})
+        rollup['counts'][mood] = rollup['counts'].get(mood,0) + 1
+        rollup['days'][day] = mood
+
+        # Queue the row for the posting list of its rasa; it is sorted in on the next read
+        rasa_id = REGISTRY.id_of(mood)
+        rasa = REGISTRY.keys[rasa_id] if rasa_id else mood.strip().lower()
+        self.added.setdefault(rasa, []).append((ordinal, start))
+
+    def _postings(self, rasa):
+        """
+        Return the (days, offsets) arrays of a rasa's postings in (day, offset) order.
+
+        They are copied out of the snapshot on first use, and rows added since are
+        merged in. Rows dated before ones already indexed (e.g. from an import of
+        older entries) are sorted into place rather than appended.
+        """
+        postings = self.rasas.get(rasa)
+        if postings is None:
+            days = array("I")
+            offsets = array("Q")
+            if rasa in self.sections:
+                start, count = self.sections[rasa]
+                position = self._offsets_start + 8 * start
+                offsets.frombytes(self._view[position:position + 8 * count])
+                position = self._days_start + 4 * start
+                days.frombytes(self._view[position:position + 4 * count])
+            postings = self.rasas[rasa] = (days, offsets)
+
+        added = self.added.pop(rasa, None)
+        if added:
+            days, offsets = postings
+            added.sort()
+            if days and (days[-1], offsets[-1]) > added[0]:
+                added = sorted(chain(zip(days, offsets), added))
+                del days[:]
+                del offsets[:]
+            days.extend(day for day, _ in added)
+            offsets.extend(offset for _, offset in added)
+        return postings
+
+    def matches(self, other):
+        """Return True if both indexes hold the same ranges, rollups and posting lists."""
+        rasas = (self.sections.keys() | self.rasas.keys() | self.added.keys()
+                 | other.sections.keys() | other.rasas.keys() | other.added.keys())
+        return (self.months == other.months
+                and self.rollups == other.rollups
+                and all(self._postings(rasa) == other._postings(rasa) for rasa in rasas))
+
+    # -------- Reading --------
+    def month_summary(self, year, month):
+        """
+        Return the rollup for a month as (mood_count, mood_by_day).
+
+        mood_count maps each mood to the number of times it was recorded (in the order
+        the moods first appeared) and mood_by_day maps day numbers to moods.
+        Both are empty if nothing was recorded that month.
+        """
+        rollup = self.rollups.get(month_key(year, month))
+        if rollup is None:
+            return {}, {}
+        mood_by_day = {int(day): mood for day, mood in rollup['days'].items()}
+        return dict(rollup['counts']), mood_by_day
+
+    def month_rows(self, year, month):
+        """
+        Yield the journal rows dated in the given month as fast_reader Entry objects.
+
+        Only the byte ranges recorded for that month are read from disk.
+        """
+        ranges = self.months.get(month_key(year, month), [])
+        if not ranges:
+            return
+
+        with open(self.csv_path,"rb") as file:
+            for start, end in ranges:
+                file.seek(start)
+                lines = file.read(end - start).splitlines()
+                instrumentation.count("bytes_read", end - start)
+                instrumentation.count("rows_matched", len(lines))
+                for line in lines:
+                    yield parse_line(line)
+
+    def rasa_count(self, rasa):
+        """Return the number of rows recorded for a rasa."""
+        return len(self._postings(rasa.strip().lower())[0])
+
+    def rasa_position(self, rasa, entry_date):
+        """
+        Return the position in the rasa's posting list of its first row dated on
+        or after entry_date (a datetime.date).
+        """
+        days, _ = self._postings(rasa.strip().lower())
+        return bisect_left(days, entry_date.toordinal())
+
+    def rasa_rows(self, rasa, first, count):
+        """
+        Yield up to count rows of a rasa as fast_reader Entry objects, starting at
+        position first of its posting list.
+
+        Rows are read one at a time by seeking to their offsets, so only the
+        requested rows are read from disk.
+        """
+        return self.read_rows(self.rasa_offsets(rasa, first, count))
+
+    def rasa_offsets(self, rasa, first, count):
+        """Return the byte offsets of up to count rows of a rasa, starting at position first of its posting list."""
+        _, offsets = self._postings(rasa.strip().lower())
+        return offsets[first:first + count]
+
+    def read_rows(self, offsets):
+        """
+        Yield the journal rows starting at the given byte offsets as fast_reader Entry
+        objects. Only the journal is read and the index is left untouched, so this
+        can run in another thread while the index is updated.
+        """
+        if not offsets:
+            return
+
+        with open(self.csv_path,"rb") as file:
+            for offset in offsets:
+                file.seek(offset)
+                line = file.readline()
+                instrumentation.count("bytes_read", len(line))
+                instrumentation.count("rows_matched")
+                yield parse_line(line)
+
+
+def _signature(stat):
+    # Identifies one version of the snapshot file
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _last_line(path):
+    """
+    Return the last line of a file, or None if the file is missing or empty.
+
+    Raises ValueError if the file does not end with a newline (a line cut short by a crash).
+    """
+    try:
+        file = open(path,"rb")
+    except FileNotFoundError:
+        return None
+    with file:
+        position = file.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0:
+            step = min(position, 4096)
+            position -= step
+            file.seek(position)
+            data = file.read(step) + data
+            if not data.endswith(b"\n"):
+                raise ValueError(f"{path} ends with an incomplete line")
+            start = data.rfind(b"\n", 0, len(data) - 1)
+            if start >= 0:
+                return data[start + 1:]
+        return data or None
+
+
+# =================== Command line ===================
+def main(argv=None):
+    """
+    Verify or rebuild the index of a journal from the command line.
+
+    'verify' recomputes the index from the CSV and compares it with the stored one,
+    exiting with status 1 if they differ. 'rebuild' recomputes and saves it.
+    """
+    parser = argparse.ArgumentParser(description="Verify or rebuild the mood journal index.")
+    parser.add_argument("command", choices=["verify","rebuild"])
+    parser.add_argument("journal", nargs="?", default="mood_tracking.csv")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.journal):
+        print(f"No journal found at {args.journal}.")
+        return 1
+
+    # Under the journal lock, so no batch is appended between the scan and the comparison
+    with FileLock(args.journal + ".lock"):
+        fresh = JournalIndex(args.journal)
+        fresh.rebuild()
+        if args.command == "verify":
+            stored = JournalIndex.read_existing(args.journal)
+            up_to_date = stored.is_current() and stored.matches(fresh)
+        else:
+            fresh.save()
+
+    if args.command == "verify":
+        if up_to_date:
+            print("Index is up to date.")
+            return 0
+        print("Index does not match the journal. Run 'rebuild' to fix it.")
+        return 1
+
+    print(f"Index rebuilt for {len(fresh.months)} month(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Journal Writer
+--------------
+Safe appends to a CSV journal from several processes at once, e.g. a kiosk running
+the tracker while a scheduled bulk import writes to the same journal.
+
+Writers never append to the CSV directly. Instead:
+1. The entry is added to a small write-ahead log ("<journal>.wal", one JSON line per
+   pending entry), under a short lock that only covers that one write.
+2. The writer then takes the journal lock ("<journal>.lock"). If the previous lock
+   holder already committed its entry, it is done. Otherwise it drains the log: every
+   entry pending at that moment - its own and those queued by other processes while
+   it waited - is written to the CSV in one write and one fsync, and added to the
+   journal index's append log. The drained entries are then removed from the log.
+
+While one process writes a batch, the others keep queueing entries, so the next
+lock holder commits them all at once. Eight concurrent writers therefore cost about
+as many fsyncs as one, instead of queueing up behind each other row by row.
+
+Before writing a batch, the lock holder records the CSV size and the log bytes it is
+about to commit in "<journal>.wal.commit". If the process dies part-way through, the
+next lock holder (or the tracker at startup) uses that record to either finish the
+batch (the rows reached the CSV but were not yet removed from the log) or roll it
+back (a partial row is cut off the CSV and the entries are written again).
+Incomplete lines at the end of the log, left by a crash while queueing, are discarded.
+
+Locks are the advisory file locks of file_lock.FileLock. Readers that rebuild the
+journal index take the journal lock too, so a rebuild never misses a batch.
+"""
+import csv
+import hashlib
+import json
+import os
+import uuid
+
+from file_lock import FileLock
+from journal_index import FIELDNAMES, LOG_COMPACT_THRESHOLD, JournalIndex
+
+
+# =================== Rows ===================
+def format_rows(entries):
+    """Return the CSV lines (as bytes) of entries, exactly as csv.writer writes them."""
+    lines = []
+    writer = csv.writer(_LineCollector(lines))
+    for entry in entries:
+        writer.writerow([entry[name] for name in FIELDNAMES])
+    return [line.encode("utf-8") for line in lines]
+
+
+class _LineCollector:
+    # csv.writer hands each formatted row to write() in a single call
+    def __init__(self, lines):
+        self.write = lines.append
+
+
+# =================== Writer ===================
+class JournalWriter:
+    """
+    Appends entries to a CSV journal so that concurrent processes never interleave
+    rows or race on the header, keeping the journal index up to date.
+
+    The writer keeps one binary append handle open for its lifetime.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.lock_path = csv_path + ".lock"
+        self.wal_path = csv_path + ".wal"
+        self.wal_lock_path = csv_path + ".wal.lock"
+        self.commit_path = csv_path + ".wal.commit"
+        self.index = None
+        self.log_length = 0
+        self.file = None
+
+    # -------- Public interface --------
+    def append(self, entries):
+        """
+        Queue entries in the write-ahead log and return once they are in the journal.
+
+        The entries are usually committed by this process, together with whatever
+        other processes queued meanwhile, but may be committed by another process
+        that took the journal lock first.
+        """
+        ids = [uuid.uuid4().hex for _ in entries]
+        lines = [json.dumps({"id": entry_id, "entry": entry}) + "\n" for entry_id, entry in zip(ids, entries)]
+        data = "".join(lines).encode("utf-8")
+        with FileLock(self.wal_lock_path):
+            with open(self.wal_path,"a+b") as file:
+                # End a line cut short by a crash, so it does not swallow these entries
+                if file.tell() > 0:
+                    file.seek(-1, os.SEEK_END)
+                    if file.read(1) != b"\n":
+                        data = b"\n" + data
+                file.write(data)
+
+        with FileLock(self.lock_path):
+            self._recover()
+            # The previous lock holder may already have committed these entries
+            wal_bytes, pending = self._read_log()
+            if any(entry_id.encode("ascii") in wal_bytes for entry_id in ids):
+                self._commit(pending, wal_bytes)
+                self._compact(LOG_COMPACT_THRESHOLD)
+
+    def write(self, entries, compact=True):
+        """
+        Write entries straight to the journal under the journal lock, after any
+        entries still waiting in the write-ahead log. Used by bulk imports, which
+        already batch their rows.
+
+        With compact=False the journal index's append log is never folded into its
+        snapshot here; call compact() once at the end instead.
+        """
+        with FileLock(self.lock_path):
+            self._recover()
+            self._drain_log()
+            self._commit(entries, wal_bytes=b"")
+            if compact:
+                self._compact(LOG_COMPACT_THRESHOLD)
+
+    def drain(self):
+        """Commit every entry waiting in the write-ahead log."""
+        with FileLock(self.lock_path):
+            self._recover()
+            self._drain_log()
+            self._compact(LOG_COMPACT_THRESHOLD)
+
+    def recover(self):
+        """Finish or roll back a batch interrupted by a crash, then commit any pending entries."""
+        self.drain()
+
+    def compact(self):
+        """Fold the journal index's append log into its snapshot, if it has one."""
+        with FileLock(self.lock_path):
+            self._compact(1)
+
+    def current_index(self):
+        """
+        Return the journal index, reloading it if another process changed the journal.
+        Called with the journal lock held.
+        """
+        if self.index is None or not (self.index.is_current() or self.index.refresh()):
+            self.index = JournalIndex.load(self.csv_path, locked=True)
+        return self.index
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    # -------- Internals (called with the journal lock held) --------
+    def _read_log(self):
+        """
+        Return (log bytes, entries) for the complete lines at the start of the log.
+
+        A line cut short by a crash, or one that is not valid JSON, is included in
+        the bytes (so it is removed with the batch) but not in the entries.
+        """
+        with FileLock(self.wal_lock_path):
+            try:
+                with open(self.wal_path,"rb") as file:
+                    data = file.read()
+            except FileNotFoundError:
+                return b"", []
+
+        entries = []
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append(json.loads(line)['entry'])
+            except (ValueError, KeyError, TypeError):
+                continue
+        return data, entries
+
+    def _drain_log(self):
+        wal_bytes, entries = self._read_log()
+        if wal_bytes:
+            self._commit(entries, wal_bytes)
+
+    def _commit(self, entries, wal_bytes):
+        """Write entries to the end of the CSV, then remove wal_bytes from the log."""
+        if self.file is None:
+            self.file = open(self.csv_path,"ab")
+        self.file.seek(0, os.SEEK_END)
+        size = self.file.tell()
+        mtime_ns = os.fstat(self.file.fileno()).st_mtime_ns
+
+        chunks = [",".join(FIELDNAMES).encode("utf-8") + b"\r\n"] if size == 0 and entries else []
+        offset = size + sum(len(chunk) for chunk in chunks)
+        rows = []
+        for entry, chunk in zip(entries, format_rows(entries)):
+            chunks.append(chunk)
+            rows.append((offset, offset + len(chunk), entry['Date'], entry['Mood']))
+            offset += len(chunk)
+        data = b"".join(chunks)
+
+        # Record what is about to be written, so a crash part-way through can be repaired
+        record = {"size": size, "end": size + len(data),
+                  "wal_bytes": len(wal_bytes), "wal_digest": hashlib.sha256(wal_bytes).hexdigest()}
+        with open(self.commit_path,"w",encoding="utf-8") as file:
+            json.dump(record, file)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        if rows:
+            # Only the index's append log is written; the index itself is not loaded
+            self.log_length = JournalIndex.log_appends(self.csv_path, rows, (size, mtime_ns))
+            if not self.log_length:
+                # The index was missing or stale before this write: rebuild it once now
+                self.index = JournalIndex.load(self.csv_path, locked=True)
+            elif self.index is not None and not self.index.refresh():
+                self.index = None
+
+        self._trim_log(record)
+        os.remove(self.commit_path)
+
+    def _trim_log(self, record):
+        # Remove the committed bytes from the start of the log, keeping entries queued since
+        if not record['wal_bytes']:
+            return
+        with FileLock(self.wal_lock_path):
+            with open(self.wal_path,"rb") as file:
+                remaining = file.read()[record['wal_bytes']:]
+            if not remaining:
+                os.remove(self.wal_path)
+                return
+            temp_path = f"{self.wal_path}.{os.getpid()}.tmp"
+            with open(temp_path,"wb") as file:
+                file.write(remaining)
+            os.replace(temp_path, self.wal_path)
+
+    def _recover(self):
+        """Repair the journal and the log after a batch that was interrupted by a crash."""
+        try:
+            with open(self.commit_path,"r",encoding="utf-8") as file:
+                record = json.load(file)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            # The crash hit while the commit record itself was written, before the CSV
+            os.remove(self.commit_path)
+            return
+
+        with FileLock(self.wal_lock_path):
+            try:
+                with open(self.wal_path,"rb") as file:
+                    head = file.read(record['wal_bytes'])
+            except FileNotFoundError:
+                head = b""
+        batch_still_queued = (record['wal_bytes'] > 0 and
+                              hashlib.sha256(head).hexdigest() == record['wal_digest'])
+        csv_size = os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+
+        if csv_size >= record['end']:
+            # The whole batch reached the CSV; only removing it from the log was missed
+            if batch_still_queued:
+                self._trim_log(record)
+        elif batch_still_queued or record['wal_bytes'] == 0:
+            # Cut the partly written batch off the CSV; its entries are written again
+            with open(self.csv_path,"r+b") as file:
+                file.truncate(record['size'])
+        os.remove(self.commit_path)
+        self.index = None
+
+    def _compact(self, threshold):
+        # Folding the log in loads the index, so it only happens once the log is long
+        if self.log_length >= threshold:
+            index = self.current_index()
+            if index.log_length:
+                index.save()
+            self.log_length = 0
@@ -12,6 +12,14 @@ Features include:
 - Starting a journaling session with mood selection and creative prompts.
 - Viewing monthly mood summaries with visual representation using Tkinter graphics.
 - Viewing all journal entries filtered by a selected rasa.
+- Searching the prompts and verses of all entries, e.g. "rain AND shantam in 2025".
+- A non-interactive command line for scripts and scheduled reports:
+    python navarasam_mood_tracker.py stats --month May --year 2025 --json
+    python navarasam_mood_tracker.py stats --all-months
+    python navarasam_mood_tracker.py entries --rasa 3 --limit 50
+    python navarasam_mood_tracker.py add --rasa 2 --verse "..."
+  Running it without a command opens the menu.
+- Opt-in timings and counters for every action (--profile json/table, or NAVARASAM_PROFILE; see instrumentation.py).
 
 The program uses standard libraries such as csv, datetime, random, os, calendar, and tkinter for visualization.
 
@@ -19,88 +27,39 @@ Author: Namita
 Date: 2025-06-14
 """
 # =================== Libraries imported ===================
-from datetime import datetime,date
-import csv
+from datetime import datetime,date,timedelta
+import argparse
+import instrumentation
+import json
 import random
 import os
-import calendar
-import tkinter as tk
-
-# =================== Dictionary ===================
-# Dictionary defining the nine Navarasas with their meanings, associated colors, and creative prompts
-rasa_dict = {1: {"rasa":"shringaram",
-                 "meaning":"love",
-                 "color":"pink",
-                 "prompts":["a moment that felt full of love",
-                            "longing or waiting",
-                            "a scent or sound that reminds you of affection",
-                            "if love were a season",
-                            "love in silence"]},
-             2:{"rasa":"hasyam",
-                "meaning":"laughter/happiness",
-                "color":"yellow",
-                "prompts":["happiest moment today",
-                           "how does nature giggle?",
-                           "if happiness had a shape what would it be?",
-                           "joy full mess",
-                           "stages of laughter"]},
-             3:{"rasa":"karunam",
-                "meaning":"compassion/sadness",
-                "color":"blue",
-                "prompts":["a moment of empathy or sadness",
-                           "sorrow through a windowpane",
-                           "a metaphor for tears",
-                           "if grief could speak, what does it whisper?",
-                           "something that you miss"]},
-             4:{"rasa":"raudram",
-                "meaning":"anger",
-                "color":"red",
-                "prompts":["a moment of frustration",
-                           "anger as fire",
-                           "if rage was a storm what would thunder be?",
-                           "steps of cooling down",
-                           "if anger were a person",
-                           "what would you say to it?"]},
-             5:{"rasa":"veeram",
-                "meaning":"heroism/courage",
-                "color":"orange",
-                "prompts":["a moment of bravery",
-                           "a battlecry",
-                           "a metaphor for your bravery today",
-                           "heroism according to you",
-                           "stomping on despite fear"]},
-             6:{"rasa":"bhayanakam",
-                "meaning":"fear",
-                "color":"purple",
-                "prompts":["a moment of fear",
-                           "what do shadows say?",
-                           "fear as a sound",
-                           "lines about uncertainity",
-                           "your perfect sanctuary"]},
-             7:{"rasa":"bibhatsam",
-                "meaning":"disgust",
-                "color":"green",
-                "prompts":["an unsettling moment",
-                           "unwelcome news",
-                           "when comfort fades away",
-                           "taste of unease",
-                           "whisper of disgust"]},
-             8:{"rasa":"adbhutam",
-                "meaning":"wonder",
-                "color":"turquoise",
-                "prompts":["a moment of amazement",
-                           "wonder in nature",
-                           "what makes you go 'wow'?",
-                           "spark of magic in real life",
-                           "wonder as a painting"]},
-             9:{"rasa":"shantam",
-                "meaning":"peace/tranquility",
-                "color":"grey",
-                "prompts":["a moment of peace",
-                           "you as still water",
-                           "sound of silence",
-                           "your idea of tranquility",
-                           "peace as a color"]}}
+import sys
+from analytics import format_report, journal_signature, load_columns, parse_range, range_counter_for, record_entry
+from rasas import REGISTRY, rasa_dict
+from search_index import search_journal, update_search_index
+from storage import open_storage
+# calendar_view (tkinter) and calendar_render are imported where they are first used,
+# so starting the tracker and moving around the menu does not load the GUI
+
+
+# Path of the journal; a .db/.sqlite file selects the SQLite storage backend
+JOURNAL_PATH = os.environ.get("NAVARASAM_JOURNAL", "mood_tracking.csv")
+
+# Number of journal entries shown per page when viewing entries for a rasa
+ENTRIES_PER_PAGE = 10
+
+# Longest date range (in days) drawn as a calendar in the mood summary
+MAX_CALENDAR_DAYS = 93
+
+# Longest verse accepted for a journal entry
+MAX_VERSE_LENGTH = 100
+
+# Numbered list of the rasas shown when choosing a mood, built once
+RASA_MENU = "\n".join(f"    {rasa_id}.{REGISTRY.names[rasa_id]} - {REGISTRY.meanings[rasa_id]}"
+                      for rasa_id in REGISTRY.ids)
+
+# ANSI escapes that move the cursor home and clear the screen and its scrollback
+CLEAR_SCREEN = "\033[H\033[2J\033[3J"
 
 
 # =================== Functions defined ===================
@@ -140,6 +99,7 @@ def learn_more():
     input("\nPress Enter to return to the main menu.")
 
 
+@instrumentation.instrumented
 def start_journaling():
     """
     Guide the user to select a mood from the Navarasam list, optionally provide a creative prompt, 
@@ -153,13 +113,12 @@ def start_journaling():
        - If yes, show a random prompt and allow the user to write a short verse (2-3 lines, max 100 chars).
        - Validate that the verse is not blank and within the character limit.
        - If no, record 'No prompt' and 'No verse today.'
-    5. Save the mood, prompt, verse, and current date to "mood_tracking.csv".
+    5. Save the mood, prompt, verse, and current date to the journal ("mood_tracking.csv" by default).
     6. Confirm to the user that the entry has been recorded.
     """
     # Display mood legend with mood numbers, names, and meanings
     print("\nWhat mood stood out in your day today?:\n")
-    for key,value in rasa_dict.items():
-        print(f"    {key}.{value['rasa'].title()} - {value['meaning'].title()}")
+    print(RASA_MENU)
 
     # Prompt user to select mood by number
     try:
@@ -169,9 +128,8 @@ def start_journaling():
             return
         
         # Retrieve and display mood details
-        rasa = rasa_dict[mood_today]['rasa'].title()
-        meaning = rasa_dict[mood_today]['meaning'].title()
-        color = rasa_dict[mood_today]['color'].lower()
+        rasa = REGISTRY.names[mood_today]
+        meaning = REGISTRY.meanings[mood_today]
         print(f"Today's mood: {rasa} - {meaning}\n")
 
     except ValueError:
@@ -194,8 +152,8 @@ def start_journaling():
                 print("Response cannot be blank")
                 continue
 
-            # Limit user verse to 100 characters
-            if len(user_verse) > 100:
+            # Limit user verse to MAX_VERSE_LENGTH characters
+            if len(user_verse) > MAX_VERSE_LENGTH:
                 print("Exceeding word limit. Please try again\n")
                 continue                
             
@@ -208,210 +166,182 @@ def start_journaling():
         print("Invalid input. Please enter y/n.")
         return
 
-    # Get today's date formatted as DD MMM YYYY
-    current_date = date.today().strftime('%d %b %Y')
-
-    # Define CSV file path and check if it exists
-    file_path = "mood_tracking.csv"
-    file_exists = os.path.exists(file_path)
-
-    # Append new entry to CSV file, write headers if file is new
-    with open("mood_tracking.csv","a",newline='',encoding="utf-8") as file:
-        writer = csv.writer(file)
-        if not file_exists:
-            writer.writerow(["Date","Mood","Meaning","Color","Prompt","Verse"])
-        writer.writerow([current_date,rasa,meaning,color,prompt,user_verse])
+    record_mood(open_storage(JOURNAL_PATH), mood_today, prompt, user_verse)
 
     # Confirm entry recording
     print("\nEntry recorded!")
     input("\nPress Enter to return to the main menu.")
 
 
+def record_mood(storage, mood_number, prompt, verse):
+    """
+    Save today's entry for a rasa (a key of rasa_dict) to the journal storage
+    and bring the session's date-range totals and the search index up to date.
+    Returns the entry that was saved.
+    """
+    # Get today's date formatted as DD MMM YYYY
+    entry = {"Date": date.today().strftime('%d %b %Y'),
+             "Mood": REGISTRY.names[mood_number],
+             "Meaning": REGISTRY.meanings[mood_number],
+             "Color": REGISTRY.colors[mood_number],
+             "Prompt": prompt,
+             "Verse": verse}
+
+    # Append new entry to the journal storage (which writes the CSV header if the file is new)
+    before = journal_signature(JOURNAL_PATH)
+    with instrumentation.phase("append"):
+        storage.append(entry)
+
+    # Extend this session's date-range totals, if they were already built, with the new entry
+    record_entry(JOURNAL_PATH, date.today().toordinal(), mood_number, before)
+
+    # Add the new entry to the search index, if the journal has one
+    with instrumentation.phase("update_search_index"):
+        update_search_index(JOURNAL_PATH)
+    return entry
+
+
+@instrumentation.instrumented
 def view_stats():
     """
-    Display mood statistics for a user-specified month and year.
+    Display mood statistics for a user-specified month and year, or for a date range.
 
     Steps:
-    - Checks if the mood tracking CSV file exists; if not, prompts user to add entries first.
-    - Prompts the user to input a month (3-letter abbreviation) and year.
-    - Reads and filters mood entries from the CSV file for the specified month and year.
-    - Calculates the frequency of each mood recorded in that period.
+    - Checks if the journal exists; if not, prompts user to add entries first.
+    - Prompts the user to input a month (3-letter abbreviation) and year,
+      or a date range such as "Jan 2023 - Jun 2025", "last 90 days" or "all of 2024".
+    - For a month, looks up the frequency of each mood and the mood of each day from the journal storage
+      (the journal index rollup for CSV journals, an indexed query for SQLite journals).
+    - For a date range, counts each mood from running per-day totals built once per session.
     - Identifies and displays the most frequently expressed mood (rasa) and its meaning.
     - Uses Tkinter to create a graphical calendar view:
-      - Each day of the month is represented by a colored circle corresponding to the mood recorded on that day.
+      - Each day is represented by a colored circle corresponding to the mood recorded on that day.
       - Days without entries are shown as white circles.
+      - A month opens in a viewer with previous/next month buttons (or the arrow keys).
+      - Ranges longer than MAX_CALENDAR_DAYS are summarised without a calendar.
     """
 
-    # Check if the CSV file exists; if not, notify user and exit
-    file_path = "mood_tracking.csv"
-    if not os.path.exists(file_path):
+    # Check if the journal exists; if not, notify user and exit
+    storage = open_storage(JOURNAL_PATH)
+    if not storage.exists():
         print("No data found. Please enter data into the journal first.")
         return
     
-    # Prompt user for the month (3-letter abbreviation) and year to view stats
+    # Prompt user for the month (3-letter abbreviation) or a date range to view stats
+    user_month = input("Enter the month to view (E.g.: Apr), "
+                       "or a date range (E.g.: Jan 2023 - Jun 2025, last 90 days, all of 2024): ").strip().title()
+
+    # Anything other than a three-letter month is read as a date range
+    if not (len(user_month) == 3 and user_month.isalpha()):
+        view_range_stats(storage, user_month)
+        return
+
+    # Prompt user for the year of the month
     try:
-        user_month = input("Enter the month to view (E.g.: Apr): ").strip().title()
         user_year = int(input("Enter the year to view: ").strip())
 
-        # Validate month input length
-        if len(user_month) != 3:
-            print("Please type only the first three alphabets of the month name.")
-            return
+        # Convert month entered to integer
+        month_num = datetime.strptime(user_month, "%b").month
 
     except ValueError:
         print("Invalid input")
         return
 
-    # Read CSV entries, filter for the specified month and year
-    entries = []
-    with open("mood_tracking.csv","r",newline='',encoding="utf-8") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            entry_date = datetime.strptime(row['Date'], '%d %b %Y')
-            if entry_date.strftime('%b') == user_month and entry_date.year == user_year:
-                entries.append(row)
-
-        # Convert month entered to integer and get number of days in that month
-        month_num = datetime.strptime(user_month, "%b").month
-        days_in_month = calendar.monthrange(user_year, month_num)[1]
+    # Look up the month's mood counts and day -> mood mapping from the journal storage
+    with instrumentation.phase("month_summary"):
+        mood_count, mood_by_day = storage.month_summary(user_year, month_num)
 
     # If no entries found for the specified month inform user and exit
-    if not entries:
+    if not mood_count:
         print("No entries found for the date")
         return
-    
-    # Aggregate entries by day and count frequency of each mood
-    entries_by_day = {}
-    mood_count = {}
-    for entry in entries:
-        entry_date = datetime.strptime(entry['Date'], '%d %b %Y')
-        day = entry_date.day
-        entries_by_day[day] = entry
-        mood = entry['Mood']
-        mood_count[mood] = mood_count.get(mood,0) + 1
- 
-    # Determine the most frequently recorded mood of the month
-    most_recorded_mood = max(mood_count, key = mood_count.get)
-
-    # Match meaning associated with the most common mood from rasa_dict
-    meaning = None
-    for info in rasa_dict.values():
-        if info['rasa'].lower() == most_recorded_mood.lower():
-            meaning = info['meaning'].title()
-            break
-    
-    # Display summary of the most expressed rasa for the selected month and year
-    print(f"\nYou most expressed rasa for {user_month} {user_year}: ")
-    print(f"{most_recorded_mood}({meaning})")
 
-    # Create canvas to display visualisation
-    window = tk.Tk()
-    window.title(f"\nThe rasas you expressed in {user_month} {user_year}")
-
-    canvas_width = 500
-    canvas_height = 700
-    canvas = tk.Canvas(window, width=canvas_width, height=canvas_height)
-    canvas.pack()
-
-    # Add title text inside canvas, centered at the top
-    canvas.create_text(
-    canvas_width / 2, 
-    20,
-    text=f"The rasas you expressed in {user_month} {user_year}",
-    font=("Helvetica", 16, "bold"),
-    fill="black")
-
-    # Add title text inside canvas, centered at the top
-    canvas.create_text(
-    canvas_width / 2, 
-    50,
-    text=f"Mood of the month: {most_recorded_mood} ({meaning}) ",
-    font=("Helvetica", 12, "italic"),
-    fill="black")   
-
-    # Draw circles for the moods
-    circle_radius = 20
-    margin  = 15
-    x_start, y_start = 65, 100
-    max_per_row = 7
-
-    # Draw a circle for each day of the month
-    for day in range(1, days_in_month + 1):
-        row = (day - 1) // max_per_row
-        col = (day - 1) % max_per_row
-        x = x_start + col * (2 * circle_radius + margin)
-        y = y_start + row * (2 * circle_radius + margin)
-
-        # Set circle color based on mood for the day, or white if no entry
-        if day in entries_by_day:
-            mood_name = entries_by_day[day]['Mood'].strip().lower() 
-            color = 'white'
-            for info in rasa_dict.values():
-                rasa_name = info['rasa'].strip().lower()
-                if mood_name == rasa_name:
-                    color = info['color']
-                    break
-        else:
-            color = 'white'
-
-        # Draw the circle and day number text
-        canvas.create_oval( x, 
-                            y, 
-                            x + 2 * circle_radius, 
-                            y + 2 * circle_radius,
-                            fill=color, 
-                            outline="black")
-        canvas.create_text(x + circle_radius, 
-                        y + circle_radius,
-                        text=str(day), 
-                        font=("Helvetica", 10))
-        
-    # Position for the legend text (below the circles)
-    legend_x = 50
-    legend_y = y_start + ((days_in_month // max_per_row) + 2) * (2 * circle_radius + margin)
-
-    # Add the title for the legend
-    canvas.create_text(
-        legend_x, 
-        legend_y - 25,  
-        text="Color Legend:",
-        anchor='w',
-        font=("Helvetica", 12, "bold")
-        )
-        
-    # Position for the legend text (below the circles)
-    legend_x = 50
-    legend_y = y_start + ((days_in_month // max_per_row) + 2) * (2 * circle_radius + margin)
-
-    # Show legend as text lines: "rasa name - color"
-    for idx, rasa_info in enumerate(rasa_dict.values()):
-        y = legend_y + idx * 20  # 20 px vertical spacing between lines
-        legend_text = f"{rasa_info['color'].capitalize()} - {rasa_info['rasa'].title()} ({rasa_info['meaning'].title()})"
-        
-        canvas.create_text(
-            legend_x, y,
-            text=legend_text,
-            anchor='w',  # align left
-            font=("Helvetica", 10)
-        )      
-    
-    window.mainloop()
+    print_mood_summary(f"{user_month} {user_year}", mood_count)
+
+    # Open the calendar view, which can then move to the previous or next month
+    from calendar_view import MonthViewer
+    MonthViewer(storage, user_year, month_num).run()
+
+
+def view_range_stats(storage, range_text):
+    """
+    Display mood statistics for a date range such as "Jan 2023 - Jun 2025" or "last 90 days".
+
+    The count of each mood in the range comes from running per-day totals, so it takes the same time
+    however long the range is. The calendar view is only drawn for ranges of up to MAX_CALENDAR_DAYS days.
+    """
+    try:
+        start, end = parse_range(range_text)
+    except ValueError as error:
+        print(f"Invalid input. {error}")
+        print("Type the first three letters of a month, or a range like Jan 2023 - Jun 2025, last 90 days or all of 2024.")
+        return
+
+    # Count each rasa in the range from the cumulative per-day counts
+    with instrumentation.phase("range_counts"):
+        counts = range_counter_for(JOURNAL_PATH).count(start, end)
+    mood_count = {REGISTRY.names[rasa_id]: count for rasa_id, count in counts.items() if count}
+
+    # If no entries found for the specified range inform user and exit
+    if not mood_count:
+        print("No entries found for the date")
+        return
+
+    label = f"{start.strftime('%d %b %Y')} - {end.strftime('%d %b %Y')}"
+    number_of_days = (end - start).days + 1
+    print_mood_summary(label, mood_count)
+    if number_of_days > MAX_CALENDAR_DAYS:
+        print(f"\nThe calendar view is only available for up to {MAX_CALENDAR_DAYS} days.")
+        input("\nPress Enter to return to the main menu...")
+        return
+
+    # Collect the mood of each day in the range, one month at a time
+    mood_by_date = {}
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        with instrumentation.phase("month_summary"):
+            mood_by_day = storage.month_summary(year, month)[1]
+        for day, mood in mood_by_day.items():
+            mood_by_date[date(year, month, day)] = mood
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    cells = []
+    for offset in range(number_of_days):
+        current = start + timedelta(days=offset)
+        cells.append((current.day, mood_by_date.get(current)))
+    from calendar_view import draw_calendar
+    draw_calendar(label, "period", mood_count, cells)
+
+
+def print_mood_summary(label, mood_count):
+    """Print the most expressed rasa of a period, given the count of each mood recorded in it."""
+
+    # Determine the most frequently recorded mood and its meaning
+    from calendar_render import mood_of_the_period
+    most_recorded_mood, meaning = mood_of_the_period(mood_count)
+
+    # Display summary of the most expressed rasa for the selected period
+    print(f"\nYou most expressed rasa for {label}: ")
+    print(f"{most_recorded_mood}({meaning})")
 
 
+@instrumentation.instrumented
 def view_all_entries():
     """
     Display all journal entries filtered by a chosen rasa (emotion).
 
     Prompts the user to select one of the nine rasas by number,
-    then reads the mood tracking CSV file and prints all entries matching that rasa.
+    then prints the entries matching that rasa a page at a time.
+    The user can move to the next or previous page or jump to a date.
+    Only the rows shown on the current page are read from the journal
+    (using the per-rasa row offsets of the journal index for CSV journals).
     If no entries exist for the selected rasa or if the file doesn't exist,
     an appropriate message is displayed.
     """
 
     # Display the list of rasas for user to choose from
     print("\nChoose the rasa:\n")
-    for key,value in rasa_dict.items():
-        print(f"    {key}.{value['rasa'].title()} - {value['meaning'].title()}")
+    print(RASA_MENU)
     
     # Prompt user for input and validate
     try:
@@ -424,42 +354,207 @@ def view_all_entries():
         return
 
     # Get chosen rasa name
-    chosen_rasa = rasa_dict[user_choice]['rasa'].title()
+    chosen_rasa = REGISTRY.names[user_choice]
     print(f"\nYour entries for {chosen_rasa}:\n")
 
-    file_path = "mood_tracking.csv"
+    # Check if the journal exists
+    storage = open_storage(JOURNAL_PATH)
+    if not storage.exists():
+        print("No entries found.")
+        return
+
+    # Look up how many entries the chosen rasa has in the journal
+    with instrumentation.phase("rasa_count"):
+        total = storage.rasa_count(chosen_rasa)
+
+    # Inform user if no matching entries found
+    if total == 0:
+        print("No entries found for this rasa.")
+        input("\nPress Enter to return to the main menu...")
+        return
+
+    # Show the entries one page at a time, reading only the rows on the page
+    page_start = 0
+    note = ""
+    while True:
+        clear_screen()
+        page_end = min(page_start + ENTRIES_PER_PAGE, total)
+        print(f"\nYour entries for {chosen_rasa} ({page_start + 1}-{page_end} of {total}):\n")
+
+        with instrumentation.phase("read_page"):
+            rows = list(storage.rasa_rows(chosen_rasa, page_start, ENTRIES_PER_PAGE))
+        for row in rows:
+            print(f"Date: {row['Date']}")
+            print(f"Prompt: {row['Prompt']}")
+            print(f"Verse: {row['Verse']}\n")
+
+        if note:
+            print(note)
+            note = ""
+
+        action = input("n = next page, p = previous page, j = jump to date, Enter = main menu: ").strip().lower()
+
+        if action == "n":
+            if page_end < total:
+                page_start = page_end
+            else:
+                note = "This is the last page."
+
+        elif action == "p":
+            if page_start > 0:
+                page_start = max(page_start - ENTRIES_PER_PAGE, 0)
+            else:
+                note = "This is the first page."
+
+        elif action == "j":
+            # Jump to the first entry on or after the given date
+            try:
+                jump_date = datetime.strptime(input("Enter the date (E.g.: 05 May 2025): ").strip(), '%d %b %Y')
+            except ValueError:
+                note = "Invalid date. Please use the format DD Mon YYYY."
+                continue
+            with instrumentation.phase("rasa_position"):
+                position = storage.rasa_position(chosen_rasa, jump_date.date())
+            if position < total:
+                page_start = position
+            else:
+                page_start = max(total - ENTRIES_PER_PAGE, 0)
+                note = "No entries on or after that date. Showing the last page."
+
+        elif action == "":
+            break
+
+        else:
+            note = "Invalid input. Please enter n, p, j or press Enter."
+
+
+@instrumentation.instrumented
+def search_entries():
+    """
+    Search the prompts and verses of all journal entries.
 
-    # Check if the CSV file exists
-    if not os.path.exists(file_path):
+    The query lists words that must all appear (optionally joined by AND),
+    and may name rasas and end with a date range, e.g. "rain AND shantam in 2025".
+    Matches are found with the journal's search index, which is built on
+    the first search and then kept up to date as entries are added,
+    and shown a page at a time.
+    """
+
+    # Check if the journal exists
+    if not open_storage(JOURNAL_PATH).exists():
         print("No entries found.")
+        input("\nPress Enter to return to the main menu...")
+        return
+
+    query = input('\nSearch (E.g.: rain AND shantam in 2025): ').strip()
+    try:
+        with instrumentation.phase("search"):
+            results = search_journal(JOURNAL_PATH, query)
+    except ValueError as error:
+        print(error)
+        input("\nPress Enter to return to the main menu...")
+        return
+
+    total = len(results)
+    if total == 0:
+        print("No entries match your search.")
+        input("\nPress Enter to return to the main menu...")
         return
 
-    # Open and read the CSV file, filtering entries by chosen rasa
-    with open(file_path,"r",newline='',encoding="utf-8") as file:
-        reader = csv.DictReader(file)
-        count = 0
+    # Show the matches one page at a time, reading only the rows on the page
+    page_start = 0
+    note = ""
+    while True:
+        clear_screen()
+        page_end = min(page_start + ENTRIES_PER_PAGE, total)
+        print(f"\nEntries matching '{query}' ({page_start + 1}-{page_end} of {total}):\n")
+
+        with instrumentation.phase("read_page"):
+            rows = results.page(page_start, ENTRIES_PER_PAGE)
+        for row in rows:
+            print(f"Date: {row['Date']} ({row['Mood']})")
+            print(f"Prompt: {row['Prompt']}")
+            print(f"Verse: {row['Verse']}\n")
+
+        if note:
+            print(note)
+            note = ""
+
+        action = input("n = next page, p = previous page, Enter = main menu: ").strip().lower()
+
+        if action == "n":
+            if page_end < total:
+                page_start = page_end
+            else:
+                note = "This is the last page."
+
+        elif action == "p":
+            if page_start > 0:
+                page_start = max(page_start - ENTRIES_PER_PAGE, 0)
+            else:
+                note = "This is the first page."
+
+        elif action == "":
+            break
 
-        # Loop through each row and print matching entries
-        for row in reader:
-            if row['Mood'].strip().lower() == chosen_rasa.lower():
-                print(f"Date: {row['Date']}")
-                print(f"Prompt: {row['Prompt']}")
-                print(f"Verse: {row['Verse']}\n")
-                count += 1
+        else:
+            note = "Invalid input. Please enter n, p or press Enter."
 
-        # Inform user if no matching entries found
-        if count == 0:
-            print("No entries found for this rasa.")
+
+@instrumentation.instrumented
+def view_analytics():
+    """
+    Display journal-wide mood analytics.
+
+    Loads the whole journal once and prints rolling 7/30/90-day rasa distributions,
+    the longest streak of each rasa, the rasa-to-rasa transition matrix and
+    the number of entries of each rasa per year.
+    """
+
+    # Check if the journal exists; if not, notify user and exit
+    if not open_storage(JOURNAL_PATH).exists():
+        print("No data found. Please enter data into the journal first.")
+        input("\nPress Enter to return to the main menu...")
+        return
+
+    print("\nYOUR MOOD ANALYTICS\n")
+    with instrumentation.phase("load_columns"):
+        columns = load_columns(JOURNAL_PATH)
+    with instrumentation.phase("report"):
+        lines = format_report(columns)
+    for line in lines:
+        print(line)
 
     input("\nPress Enter to return to the main menu...")
 
 
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """Clear the terminal with ANSI escapes, without starting a cls/clear shell command."""
+    if sys.stdout.isatty():
+        sys.stdout.write(CLEAR_SCREEN)
+        sys.stdout.flush()
+
+
+def enable_ansi_escapes():
+    """Turn on ANSI escape handling in the Windows console; other terminals already have it."""
+    if os.name != 'nt':
+        return
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        kernel32.SetConsoleMode(handle, mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
 
     
 # =================== Login Menu ===================
 def main_menu():
+    # Finish any journal write that was interrupted by a crash before reading the journal
+    storage = open_storage(JOURNAL_PATH)
+    storage.recover()
+    storage.close()
+    enable_ansi_escapes()
+
     while True:
         clear_screen()
         print("\nWELCOME TO NAVARASAM MOOD TRACKER!\n")
@@ -470,6 +565,8 @@ def main_menu():
             2. Start journaling
             3. View mood summary
             4. View all entries for a rasa
+            5. View mood analytics
+            6. Search entries
             0. Exit
             Response: ''').strip()
 
@@ -498,6 +595,14 @@ def main_menu():
             clear_screen()
             view_all_entries()
 
+        elif menu == 5:
+            clear_screen()
+            view_analytics()
+
+        elif menu == 6:
+            clear_screen()
+            search_entries()
+
         elif menu == 0:
             print("See you soon!")
             break
@@ -507,5 +612,218 @@ def main_menu():
             print("Invalid choice. Please select a valid menu option.")
             continue
 
+# =================== Command line ===================
+def summary_record(period, mood_count, mood_by_day=None):
+    """Return the summary of a period as a JSON-ready dictionary."""
+    record = {"period": period, "entries": sum(mood_count.values()), "counts": mood_count}
+    if mood_by_day is not None:
+        record["days"] = {str(day): mood for day, mood in sorted(mood_by_day.items())}
+    if mood_count:
+        from calendar_render import mood_of_the_period
+        most_recorded_mood, meaning = mood_of_the_period(mood_count)
+        record["mood"] = {"rasa": most_recorded_mood, "meaning": meaning}
+    else:
+        record["mood"] = None
+    return record
+
+
+def print_summary_record(record):
+    """Print one period of the stats command as a line of text."""
+    if record["mood"] is None:
+        print(f"{record['period']}: no entries")
+        return
+    counts = ", ".join(f"{mood} {count}" for mood, count in record["counts"].items())
+    print(f"{record['period']}: {record['mood']['rasa']} ({record['mood']['meaning']}) - {counts}")
+
+
+def rasa_number(text):
+    """Return the rasa_dict key of a rasa given by number or name; raises ValueError if there is none."""
+    if text.strip().isdigit() and int(text) in rasa_dict:
+        return int(text)
+    rasa_id = REGISTRY.id_of(text)
+    if rasa_id is None:
+        raise ValueError(f"Unknown rasa: {text!r}. "
+                         f"Use a number from {REGISTRY.ids[0]} to {REGISTRY.ids[-1]} or a rasa name.")
+    return rasa_id
+
+
+def single_line(text):
+    """argparse type for a journal field; line breaks are rejected since each row must stay on one line."""
+    if "\n" in text or "\r" in text:
+        raise argparse.ArgumentTypeError("must be a single line")
+    return text
+
+
+def positive_int(text):
+    """argparse type for a whole number of at least 1."""
+    try:
+        number = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {text!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+@instrumentation.instrumented
+def stats_command(args):
+    """
+    Print mood summaries for months and date ranges.
+
+    Every month summary is a lookup in the journal loaded once for the command
+    (the journal index for CSV journals), so --all-months costs one read of the journal.
+    """
+    storage = open_storage(JOURNAL_PATH)
+    if not storage.exists():
+        print("No data found. Please enter data into the journal first.", file=sys.stderr)
+        return 1
+
+    if args.all_months:
+        months = storage.recorded_months()
+    elif args.month:
+        try:
+            months = [(args.year, datetime.strptime(args.month.strip().title()[:3], "%b").month)]
+        except ValueError:
+            print(f"Invalid month: {args.month!r}", file=sys.stderr)
+            return 1
+    elif args.year:
+        months = [(year, month) for year, month in storage.recorded_months() if year == args.year]
+    else:
+        months = []
+
+    records = []
+    for year, month in months:
+        mood_count, mood_by_day = storage.month_summary(year, month)
+        records.append(summary_record(f"{year:04d}-{month:02d}", mood_count, mood_by_day))
+
+    for range_text in args.range or []:
+        try:
+            start, end = parse_range(range_text)
+        except ValueError as error:
+            print(f"Invalid range {range_text!r}: {error}", file=sys.stderr)
+            return 1
+        counts = range_counter_for(JOURNAL_PATH).count(start, end)
+        mood_count = {REGISTRY.names[rasa_id]: count for rasa_id, count in counts.items() if count}
+        records.append(summary_record(f"{start.isoformat()}/{end.isoformat()}", mood_count))
+
+    if args.json:
+        print(json.dumps(records, indent=2))
+    else:
+        for record in records:
+            print_summary_record(record)
+    return 0
+
+
+@instrumentation.instrumented
+def entries_command(args):
+    """Print the entries of a rasa in date order, optionally from a date and up to a limit."""
+    try:
+        rasa = REGISTRY.names[rasa_number(args.rasa)]
+        first_date = datetime.strptime(args.from_date, '%d %b %Y').date() if args.from_date else None
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    storage = open_storage(JOURNAL_PATH)
+    if not storage.exists():
+        print("No entries found.", file=sys.stderr)
+        return 1
+
+    first = storage.rasa_position(rasa, first_date) if first_date else 0
+    count = args.limit if args.limit is not None else storage.rasa_count(rasa)
+    rows = [{"date": row['Date'], "mood": row['Mood'], "prompt": row['Prompt'], "verse": row['Verse']}
+            for row in storage.rasa_rows(rasa, first, count)]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            print(f"Date: {row['date']}")
+            print(f"Prompt: {row['prompt']}")
+            print(f"Verse: {row['verse']}\n")
+    return 0
+
+
+@instrumentation.instrumented
+def add_command(args):
+    """Record today's entry for a rasa without any prompts."""
+    try:
+        mood_number = rasa_number(args.rasa)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    prompt = args.prompt or "No prompt"
+    if args.verse is None:
+        verse = "No verse today."
+    else:
+        verse = args.verse.strip()
+        if verse == "":
+            print("Response cannot be blank", file=sys.stderr)
+            return 1
+        if len(verse) > MAX_VERSE_LENGTH:
+            print(f"The verse is longer than {MAX_VERSE_LENGTH} characters.", file=sys.stderr)
+            return 1
+
+    storage = open_storage(JOURNAL_PATH)
+    entry = record_mood(storage, mood_number, prompt, verse)
+    storage.close()
+    if args.json:
+        print(json.dumps(entry))
+    else:
+        print(f"Entry recorded: {entry['Date']} {entry['Mood']}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Navarasam mood tracker. Run without a command for the interactive menu.")
+    parser.add_argument("--profile", choices=instrumentation.MODES,
+                        help="record timings and counters of each action as JSON lines or a summary table")
+    parser.add_argument("--cprofile", metavar="ACTIONS",
+                        help='run these actions (comma-separated, or "all") under cProfile')
+    commands = parser.add_subparsers(dest="command")
+
+    stats = commands.add_parser("stats", help="mood summaries of months and date ranges")
+    stats.add_argument("--month", help="month to summarise, e.g. May (needs --year)")
+    stats.add_argument("--year", type=int, help="year of --month; on its own, every month of the year")
+    stats.add_argument("--all-months", action="store_true", help="every month that has entries")
+    stats.add_argument("--range", action="append",
+                       help='a date range such as "last 90 days" (can be given several times)')
+    stats.add_argument("--json", action="store_true", help="print JSON instead of text")
+    stats.set_defaults(handler=stats_command)
+
+    entries = commands.add_parser("entries", help="entries recorded for a rasa")
+    entries.add_argument("--rasa", required=True, help="rasa number (1-9) or name")
+    entries.add_argument("--limit", type=positive_int, help="most entries to print (default: all)")
+    entries.add_argument("--from", dest="from_date", help="start at this date, e.g. 05 May 2025")
+    entries.add_argument("--json", action="store_true", help="print JSON instead of text")
+    entries.set_defaults(handler=entries_command)
+
+    add = commands.add_parser("add", help="record today's entry")
+    add.add_argument("--rasa", required=True, help="rasa number (1-9) or name")
+    add.add_argument("--verse", type=single_line, help="your verse (default: no verse)")
+    add.add_argument("--prompt", type=single_line, help='the prompt the verse answers (default: "No prompt")')
+    add.add_argument("--json", action="store_true", help="print the saved entry as JSON")
+    add.set_defaults(handler=add_command)
+    return parser
+
+
+def main(argv=None):
+    """Run a command given on the command line, or the interactive menu if there is none."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile or args.cprofile:
+        instrumentation.configure_from_environment(args.profile, args.cprofile)
+    if args.command is None:
+        main_menu()
+        return 0
+    if args.command == "stats" and args.month and not args.year:
+        parser.error("--month needs --year")
+    if args.command == "stats" and not (args.month or args.year or args.all_months or args.range):
+        parser.error("give --month and --year, --year, --all-months or --range")
+    return args.handler(args)
+
+
 if __name__ == "__main__":
-    main_menu()
+    sys.exit(main())
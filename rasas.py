@@ -0,0 +1,193 @@
+"""
+Navarasam Rasas
+---------------
+The nine Navarasas used by the mood tracker, shared by the main program and the
+journal storage backends.
+
+REGISTRY is built from rasa_dict once at import. Read paths carry rasa numbers
+(small integer codes, one byte each in the binary and analytics columns) and use it
+to turn a mood name into a number, or a number into the name, meaning and color
+written to the journal, with single dictionary lookups.
+
+A custom rasa set can replace the nine Navarasas: point NAVARASAM_RASAS at a JSON
+file laid out like rasa_dict, e.g.
+    {"1": {"rasa": "calm", "meaning": "peace", "color": "grey", "prompts": ["..."]}, ...}
+"""
+import json
+import os
+
+# Highest rasa number; analytics packs two rasa numbers into one byte
+MAX_RASA_ID = 15
+
+# Most prompts per rasa; the binary journal stores a prompt as a one-byte index
+MAX_PROMPTS = 250
+
+# Most spellings of rasa names remembered by RasaRegistry.id_of
+MAX_SPELLINGS = 1024
+
+# =================== Dictionary ===================
+# Dictionary defining the nine Navarasas with their meanings, associated colors, and creative prompts
+rasa_dict = {1: {"rasa":"shringaram",
+                 "meaning":"love",
+                 "color":"pink",
+                 "prompts":["a moment that felt full of love",
+                            "longing or waiting",
+                            "a scent or sound that reminds you of affection",
+                            "if love were a season",
+                            "love in silence"]},
+             2:{"rasa":"hasyam",
+                "meaning":"laughter/happiness",
+                "color":"yellow",
+                "prompts":["happiest moment today",
+                           "how does nature giggle?",
+                           "if happiness had a shape what would it be?",
+                           "joy full mess",
+                           "stages of laughter"]},
+             3:{"rasa":"karunam",
+                "meaning":"compassion/sadness",
+                "color":"blue",
+                "prompts":["a moment of empathy or sadness",
+                           "sorrow through a windowpane",
+                           "a metaphor for tears",
+                           "if grief could speak, what does it whisper?",
+                           "something that you miss"]},
+             4:{"rasa":"raudram",
+                "meaning":"anger",
+                "color":"red",
+                "prompts":["a moment of frustration",
+                           "anger as fire",
+                           "if rage was a storm what would thunder be?",
+                           "steps of cooling down",
+                           "if anger were a person",
+                           "what would you say to it?"]},
+             5:{"rasa":"veeram",
+                "meaning":"heroism/courage",
+                "color":"orange",
+                "prompts":["a moment of bravery",
+                           "a battlecry",
+                           "a metaphor for your bravery today",
+                           "heroism according to you",
+                           "stomping on despite fear"]},
+             6:{"rasa":"bhayanakam",
+                "meaning":"fear",
+                "color":"purple",
+                "prompts":["a moment of fear",
+                           "what do shadows say?",
+                           "fear as a sound",
+                           "lines about uncertainity",
+                           "your perfect sanctuary"]},
+             7:{"rasa":"bibhatsam",
+                "meaning":"disgust",
+                "color":"green",
+                "prompts":["an unsettling moment",
+                           "unwelcome news",
+                           "when comfort fades away",
+                           "taste of unease",
+                           "whisper of disgust"]},
+             8:{"rasa":"adbhutam",
+                "meaning":"wonder",
+                "color":"turquoise",
+                "prompts":["a moment of amazement",
+                           "wonder in nature",
+                           "what makes you go 'wow'?",
+                           "spark of magic in real life",
+                           "wonder as a painting"]},
+             9:{"rasa":"shantam",
+                "meaning":"peace/tranquility",
+                "color":"grey",
+                "prompts":["a moment of peace",
+                           "you as still water",
+                           "sound of silence",
+                           "your idea of tranquility",
+                           "peace as a color"]}}
+
+
+# =================== Registry ===================
+class RasaSpellings(dict):
+    """
+    Map from the spellings of rasa names seen so far to rasa numbers; journals repeat
+    a handful of them. A spelling not seen before is normalised (case, surrounding
+    spaces and quotes) once and remembered; unknown names map to None.
+    """
+
+    def __init__(self, keys):
+        super().__init__()
+        self._canonical = {key: rasa_id for rasa_id, key in keys.items()}
+        for key, rasa_id in self._canonical.items():
+            for spelling in (key, key.title(), key.upper()):
+                self[spelling] = rasa_id
+
+    def __missing__(self, name):
+        rasa_id = self._canonical.get(name.strip().strip('"').strip().lower()) if isinstance(name, str) else None
+        if len(self) < MAX_SPELLINGS:
+            self[name] = rasa_id
+        return rasa_id
+
+
+class RasaRegistry:
+    """
+    Lookup tables of a rasa set, keyed by rasa number (the keys of rasa_dict).
+
+    names, meanings and colors hold the Mood, Meaning and Color values written to
+    the journal, keys the lowercased names, and codes the one-byte code of each rasa.
+    id_of(name) returns the number of the rasa called name (in any case, with
+    surrounding spaces or quotes), or None if there is no such rasa.
+    """
+
+    def __init__(self, rasas):
+        self.rasas = rasas
+        self.ids = tuple(sorted(rasas))
+        self.names = {rasa_id: rasas[rasa_id]['rasa'].title() for rasa_id in self.ids}
+        self.meanings = {rasa_id: rasas[rasa_id]['meaning'].title() for rasa_id in self.ids}
+        self.colors = {rasa_id: rasas[rasa_id]['color'].lower() for rasa_id in self.ids}
+        self.keys = {rasa_id: rasas[rasa_id]['rasa'].strip().lower() for rasa_id in self.ids}
+        self.codes = {rasa_id: bytes([rasa_id]) for rasa_id in self.ids}
+        # A bound dict lookup, so a spelling already seen costs no Python-level call
+        self.id_of = RasaSpellings(self.keys).__getitem__
+
+    def meaning_of(self, name):
+        """Return the meaning of the rasa called name, or None if there is no such rasa."""
+        return self.meanings.get(self.id_of(name))
+
+    def color_of(self, name, default=None):
+        """Return the color of the rasa called name, or default if there is no such rasa."""
+        return self.colors.get(self.id_of(name), default)
+
+
+def load_rasas(path):
+    """
+    Read a rasa set from a JSON file laid out like rasa_dict (with the rasa numbers as
+    strings). Raises ValueError if the set cannot be used by the tracker.
+    """
+    with open(path,"r",encoding="utf-8") as file:
+        data = json.load(file)
+    if not isinstance(data, dict) or not data:
+        raise ValueError(f"{path}: expected an object of rasa numbers")
+
+    rasas = {}
+    for number, info in data.items():
+        try:
+            rasa_id = int(number)
+            rasa = {"rasa": str(info['rasa']).strip().lower(),
+                    "meaning": str(info['meaning']).strip().lower(),
+                    "color": str(info['color']).strip().lower(),
+                    "prompts": [str(prompt) for prompt in info['prompts']]}
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{path}: rasa {number!r} needs a number and rasa, meaning, color and prompts")
+        if not 1 <= rasa_id <= MAX_RASA_ID:
+            raise ValueError(f"{path}: rasa numbers must be between 1 and {MAX_RASA_ID}")
+        if not rasa['rasa'] or "," in rasa['rasa'] or not 1 <= len(rasa['prompts']) <= MAX_PROMPTS:
+            raise ValueError(f"{path}: rasa {number!r} needs a name without commas and 1 to {MAX_PROMPTS} prompts")
+        rasas[rasa_id] = rasa
+
+    names = [info['rasa'] for info in rasas.values()]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: rasa names must be unique")
+    return dict(sorted(rasas.items()))
+
+
+# A custom rasa set replaces the Navarasas before anything else reads rasa_dict
+if os.environ.get("NAVARASAM_RASAS"):
+    rasa_dict = load_rasas(os.environ["NAVARASAM_RASAS"])
+
+REGISTRY = RasaRegistry(rasa_dict)
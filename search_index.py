@@ -0,0 +1,618 @@
+"""
+Search Index
+------------
+Full-text search over the prompts and verses of a mood journal.
+
+Text is lowercased and split into words at anything that is not a letter or digit.
+For every word the index keeps a posting list: the ids of the rows whose prompt or
+verse contains it (a row's id is its position in the journal, counting from 0).
+Next to the postings it keeps the byte offset, date and rasa of every row, so a
+query is answered by intersecting posting lists and filtering two small columns.
+Only the rows that are shown are read from the journal.
+
+A query lists words that must all appear, optionally joined by AND. Rasa names
+filter on the rasa and a trailing "in <range>" clause filters on the date, using
+any range accepted by analytics.parse_range():
+    rain AND shantam in 2025
+    monsoon evening in May 2025
+    karunam in last 90 days
+
+For CSV journals the index is stored next to the journal in two files:
+- "<journal>.search"     : a snapshot. A JSON header (the word table and how much
+                           of the journal is covered) is followed by the row columns
+                           and the posting lists as arrays of integers, which are
+                           memory-mapped rather than parsed.
+- "<journal>.search.log" : one JSON line for every batch of rows indexed since the
+                           snapshot.
+
+The index remembers how many bytes of the journal it covers and the last bytes of
+that part. If the journal has grown and those bytes are unchanged, only the new rows
+are read and logged; start_journaling() does this after every entry. If the journal
+shrank or was edited, the index is rebuilt. The log is folded into the snapshot once
+it gets long.
+
+SQLite journals are searched with SQL filters and the same word matching, without a
+separate index.
+
+Each journal row is expected to sit on its own line, as written by start_journaling().
+
+The index can also be rebuilt or queried from the command line:
+    python search_index.py rebuild [journal.csv]
+    python search_index.py query "rain AND shantam in 2025" [--journal journal.csv]
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import instrumentation
+from analytics import parse_range
+from fast_reader import first_row, mapped, parse_line
+from file_lock import FileLock
+from journal_index import parse_entry_date
+from rasas import REGISTRY
+from storage import SQLITE_SUFFIXES, SqliteStorage, record_to_entry
+
+MAGIC = b"NVS1"
+
+# Snapshot header: magic, length of the JSON header that follows
+HEADER = struct.Struct("<4sI")
+
+# Number of rows indexed since the snapshot after which the log is merged into it
+LOG_COMPACT_ROWS = 2000
+
+# Number of bytes at the end of the indexed part of the journal used to recognise it
+TAIL_BYTES = 64
+
+# Words are runs of letters and digits
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+# Complete lines of the journal
+LINE_PATTERN = re.compile(rb"[^\n]*\n")
+
+# A parsed query: words that must all appear, a set of rasa numbers (empty for any
+# rasa) and an inclusive date range (None for any date)
+SearchQuery = namedtuple("SearchQuery", "terms rasa_ids start end")
+
+
+def tokenize(text):
+    """Return the lowercased words of text, in order."""
+    return WORD_PATTERN.findall(text.lower())
+
+
+def parse_query(text, today=None):
+    """
+    Parse a query typed by the user into a SearchQuery.
+
+    Raises ValueError if the query has no words, rasa names or date range.
+    """
+    words = text.split()
+    start = end = None
+
+    # The date range is everything after the last "in" that reads as one
+    for position in range(len(words) - 2, -1, -1):
+        if words[position].lower() == "in":
+            try:
+                start, end = parse_range(" ".join(words[position + 1:]), today)
+            except ValueError:
+                continue
+            words = words[:position]
+            break
+
+    terms = []
+    rasa_ids = set()
+    for word in words:
+        if word.lower() == "and":
+            continue
+        rasa_id = REGISTRY.id_of(word)
+        if rasa_id is not None:
+            rasa_ids.add(rasa_id)
+        else:
+            terms.extend(tokenize(word))
+
+    if not terms and not rasa_ids and start is None:
+        raise ValueError("Enter at least one word, rasa or date range to search for.")
+    return SearchQuery(terms, frozenset(rasa_ids), start, end)
+
+
+def row_terms(prompt, verse):
+    """Return the distinct words of a row's prompt and verse, sorted."""
+    return sorted(set(tokenize(prompt or "")) | set(tokenize(verse or "")))
+
+
+class SearchIndex:
+    """
+    Inverted index of the prompts and verses of a CSV journal.
+
+    Rows indexed since the snapshot are kept in memory (and in the log) until the
+    next save(); a word's posting list is the snapshot's list followed by them.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.snapshot_path = csv_path + ".search"
+        self.log_path = csv_path + ".search.log"
+        self.lock_path = csv_path + ".search.lock"
+        self._mapping = None
+        self._reset()
+
+    def _reset(self):
+        self._release()
+        self.size = 0               # bytes of the journal that are indexed
+        self.tail = ""              # hex of the last TAIL_BYTES of those bytes
+        self.mtime_ns = None        # modification time of the journal when last indexed
+        self.offsets = array("Q")   # byte offset of each row in the journal
+        self.days = array("I")      # date ordinal of each row (0 if unreadable)
+        self.rasas = bytearray()    # rasa number of each row (0 if unknown)
+        self.days_sorted = True     # whether the days are in ascending order
+        self.terms = {}             # word -> [start, count] in the snapshot postings
+        self.postings = memoryview(array("I"))
+        self.added = {}             # word -> array of rows indexed since the snapshot
+        self.log_rows = 0
+        self.log_offset = 0
+        self.snapshot_signature = None
+
+    def _release(self):
+        # Unmap the snapshot; row lists taken from its postings must be gone by now
+        if self._mapping is not None:
+            self.postings.release()
+            self._view.release()
+            self._mapping.close()
+            self._mapping = None
+
+    @classmethod
+    def load(cls, csv_path):
+        """Load the index of a journal, bringing it up to date with the journal first."""
+        index = cls(csv_path)
+        index.update()
+        return index
+
+    # -------- Keeping up with the journal --------
+    def update(self):
+        """
+        Bring the index up to date with the journal and with changes made by other
+        processes. Rows appended to the journal are indexed incrementally; anything
+        else rebuilds the index.
+        """
+        with FileLock(self.lock_path):
+            if self._snapshot_signature() != self.snapshot_signature:
+                self._reset()
+                if not self._read_snapshot():
+                    self._reset()
+            self._replay_log()
+            if not self._covers_journal_start():
+                self.rebuild()
+                return
+            self._catch_up()
+
+    def rebuild(self):
+        """Index the whole journal from scratch and save the index."""
+        self._reset()
+        self._index_new_rows(keep=False)
+        self.save()
+
+    def save(self):
+        """Write the index (snapshot and logged rows together) as a new snapshot."""
+        terms = {}
+        postings = array("I")
+        for term in self.terms.keys() | self.added.keys():
+            start = len(postings)
+            if term in self.terms:
+                first, count = self.terms[term]
+                postings.frombytes(self.postings[first:first + count].cast("B"))
+            if term in self.added:
+                postings.extend(self.added[term])
+            terms[term] = [start, len(postings) - start]
+
+        header = json.dumps({"byteorder": sys.byteorder,
+                             "size": self.size,
+                             "tail": self.tail,
+                             "mtime_ns": self.mtime_ns,
+                             "rows": len(self.days),
+                             "days_sorted": self.days_sorted,
+                             "postings": len(postings),
+                             "terms": terms}).encode("utf-8")
+        offsets, days, rasas = self.offsets, self.days, bytes(self.rasas)
+        self._release()
+
+        temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(temp_path,"wb") as file:
+            file.write(HEADER.pack(MAGIC, len(header)) + header)
+            file.write(b"\0" * (-file.tell() % 8))
+            for column in (offsets, days, postings):
+                file.write(column.tobytes())
+            file.write(rasas)
+        os.replace(temp_path, self.snapshot_path)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+        self._reset()
+        self._read_snapshot()
+
+    def _snapshot_signature(self):
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read_snapshot(self):
+        """Map the snapshot; returns False if it is missing or unreadable."""
+        try:
+            with open(self.snapshot_path,"rb") as file:
+                magic, length = HEADER.unpack(file.read(HEADER.size))
+                header = json.loads(file.read(length))
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                signature = os.fstat(file.fileno())
+        except (OSError, ValueError, struct.error):
+            return False
+
+        try:
+            rows, count = header['rows'], header['postings']
+            position = HEADER.size + length
+            position += -position % 8
+            valid = (magic == MAGIC and header['byteorder'] == sys.byteorder
+                     and len(mapping) == position + 13 * rows + 4 * count)
+        except (KeyError, TypeError):
+            valid = False
+        if not valid:
+            mapping.close()
+            return False
+
+        self._mapping = mapping
+        self._view = memoryview(mapping)
+        self.offsets.frombytes(self._view[position:position + 8 * rows])
+        position += 8 * rows
+        self.days.frombytes(self._view[position:position + 4 * rows])
+        position += 4 * rows
+        self.postings = self._view[position:position + 4 * count].cast("I")
+        position += 4 * count
+        self.rasas = bytearray(self._view[position:])
+
+        self.terms = header['terms']
+        self.size = header['size']
+        self.tail = header['tail']
+        self.mtime_ns = header['mtime_ns']
+        self.days_sorted = header['days_sorted']
+        self.snapshot_signature = signature.st_mtime_ns, signature.st_size, signature.st_ino
+        return True
+
+    def _replay_log(self):
+        # Apply the batches logged since the last replay; a line cut short by a crash ends it
+        try:
+            with open(self.log_path,"rb") as file:
+                file.seek(self.log_offset)
+                data = file.read()
+        except FileNotFoundError:
+            return
+
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            self.log_offset += len(line)
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                continue
+            # Skip batches that are already part of the index
+            if batch['from'] != self.size:
+                continue
+            for offset, day, rasa_id, terms in batch['rows']:
+                self._add_row(offset, day, rasa_id, terms)
+            self.log_rows += len(batch['rows'])
+            self.size, self.tail, self.mtime_ns = batch['size'], batch['tail'], batch['mtime_ns']
+
+    def _covers_journal_start(self):
+        """Return True if the indexed bytes are still the start of the journal."""
+        try:
+            with open(self.csv_path,"rb") as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_size < self.size:
+                    return False
+                # Same size but modified since: edited in place
+                if stat.st_size == self.size and self.size and stat.st_mtime_ns != self.mtime_ns:
+                    return False
+                tail = bytes.fromhex(self.tail)
+                file.seek(self.size - len(tail))
+                return file.read(len(tail)) == tail
+        except FileNotFoundError:
+            return self.size == 0
+
+    def _catch_up(self):
+        """Index the rows appended to the journal, logging them or saving a new snapshot."""
+        start = self.size
+        rows = self._index_new_rows(keep=True)
+        if rows is None:
+            self.save()
+            return
+        if rows:
+            line = json.dumps({"from": start, "size": self.size, "tail": self.tail,
+                               "mtime_ns": self.mtime_ns, "rows": rows})
+            with open(self.log_path,"ab") as file:
+                file.write(line.encode("utf-8") + b"\n")
+                self.log_offset = file.tell()
+
+    def _index_new_rows(self, keep):
+        """
+        Index the complete lines of the journal after the indexed bytes.
+
+        Returns the new rows as [offset, day, rasa, words] lists for the log, or None
+        if there are too many to log (or keep is False).
+        """
+        start = self.size
+        try:
+            mtime_ns = os.stat(self.csv_path).st_mtime_ns
+            with mapped(self.csv_path) as data:
+                rows = self._index_lines(data, keep)
+        except FileNotFoundError:
+            return []
+        if self.size != start:
+            self.mtime_ns = mtime_ns
+        return rows
+
+    def _index_lines(self, data, keep):
+        end = data.rfind(b"\n") + 1
+        if end <= self.size:
+            return []
+        # A journal that is not indexed yet starts with its header line
+        start = self.size if self.size else first_row(data)
+
+        rows = [] if keep else None
+        days = {}
+        prompts = {}
+        for match in LINE_PATTERN.finditer(data, start, end):
+            line = match.group()
+            if b"," not in line:
+                continue
+            entry = parse_line(line)
+
+            day = days.get(entry.date)
+            if day is None:
+                try:
+                    day = parse_entry_date(entry.date).toordinal()
+                except (TypeError, ValueError):
+                    day = 0
+                days[entry.date] = day
+            rasa_id = REGISTRY.id_of(entry.mood) or 0
+
+            # Journals repeat the same few prompts, so each is split into words once
+            prompt_terms = prompts.get(entry.prompt)
+            if prompt_terms is None:
+                prompt_terms = prompts[entry.prompt] = set(tokenize(entry.prompt or ""))
+            terms = prompt_terms.union(tokenize(entry.verse or ""))
+
+            self._add_row(match.start(), day, rasa_id, terms)
+            if rows is not None:
+                rows.append([match.start(), day, rasa_id, sorted(terms)])
+                if self.log_rows + len(rows) >= LOG_COMPACT_ROWS:
+                    rows = None
+
+        self.size = end
+        self.tail = data[max(end - TAIL_BYTES, 0):end].hex()
+        if rows is not None:
+            self.log_rows += len(rows)
+        return rows
+
+    def _add_row(self, offset, day, rasa_id, terms):
+        row = len(self.days)
+        if row and day < self.days[-1]:
+            self.days_sorted = False
+        self.offsets.append(offset)
+        self.days.append(day)
+        self.rasas.append(rasa_id)
+        added = self.added
+        for term in terms:
+            try:
+                added[term].append(row)
+            except KeyError:
+                added[term] = array("I", [row])
+
+    # -------- Queries --------
+    def term_rows(self, term):
+        """Return the sorted ids of the rows containing a word."""
+        first, count = self.terms.get(term, (0, 0))
+        rows = self.postings[first:first + count]
+        added = self.added.get(term)
+        if not added:
+            return rows
+        combined = array("I")
+        combined.frombytes(rows.cast("B"))
+        combined.extend(added)
+        return combined
+
+    def search(self, query):
+        """Return the ids of the rows matching a SearchQuery, in journal order."""
+        first, last = 0, len(self.days)
+        day_filter = query.start is not None
+        if day_filter and self.days_sorted:
+            # The rows of a date range are consecutive, so the range becomes a row range
+            first = bisect_left(self.days, query.start.toordinal())
+            last = bisect_right(self.days, query.end.toordinal())
+            day_filter = False
+
+        if query.terms:
+            # Start from the rarest word and check each row against the others
+            postings = sorted((_between(self.term_rows(term), first, last) for term in set(query.terms)),
+                              key=len)
+            rows = postings[0].tolist()
+            for other in postings[1:]:
+                rows = _intersect(rows, other)
+            if query.rasa_ids:
+                rasas, wanted = self.rasas, query.rasa_ids
+                rows = [row for row in rows if rasas[row] in wanted]
+        elif query.rasa_ids:
+            pattern = re.compile(b"[" + b"".join(re.escape(bytes([rasa_id])) for rasa_id in query.rasa_ids) + b"]")
+            rows = [match.start() for match in pattern.finditer(self.rasas, first, last)]
+        else:
+            rows = range(first, last)
+
+        if day_filter:
+            days, start, end = self.days, query.start.toordinal(), query.end.toordinal()
+            rows = [row for row in rows if start <= days[row] <= end]
+        return list(rows)
+
+    def read_rows(self, rows):
+        """Yield the Entry of each row id, read from the journal."""
+        with open(self.csv_path,"rb") as file:
+            for row in rows:
+                file.seek(self.offsets[row])
+                yield parse_line(file.readline())
+
+
+def _between(postings, first, last):
+    """Return the part of a sorted posting list with first <= row < last."""
+    if first == 0 and last > (postings[-1] if len(postings) else 0):
+        return postings
+    return postings[bisect_left(postings, first):bisect_left(postings, last)]
+
+
+def _intersect(rows, postings):
+    """Return the rows (a sorted list) that are also in postings (a sorted sequence)."""
+    if len(rows) * 20 < len(postings):
+        # Few rows against a long list: binary-search each row
+        found = []
+        for row in rows:
+            position = bisect_left(postings, row)
+            if position < len(postings) and postings[position] == row:
+                found.append(row)
+        return found
+    members = set(postings)
+    return [row for row in rows if row in members]
+
+
+# =================== Searching a journal ===================
+class SearchResults:
+    """The rows matching a query; len() gives how many, page() reads some of them."""
+
+    def __init__(self, rows, read_rows):
+        self.rows = rows
+        self._read_rows = read_rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def page(self, first, count):
+        """Return the entries of the matching rows first to first + count - 1."""
+        return list(self._read_rows(self.rows[first:first + count]))
+
+
+# Search indexes loaded in this session, keyed by journal path
+_indexes = {}
+
+
+def search_journal(path, query):
+    """
+    Return the SearchResults of a query (text or a SearchQuery) on a journal.
+
+    Raises ValueError if the query text cannot be parsed.
+    """
+    if isinstance(query, str):
+        query = parse_query(query)
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return _search_sqlite(path, query)
+
+    index = _indexes.get(path)
+    if index is None:
+        index = _indexes[path] = SearchIndex(path)
+    with instrumentation.phase("update_search_index"):
+        index.update()
+    rows = index.search(query)
+    instrumentation.count("rows_matched", len(rows))
+    return SearchResults(rows, index.read_rows)
+
+
+def update_search_index(path):
+    """Index the rows just appended to a CSV journal, if the journal has a search index."""
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return
+    index = _indexes.get(path)
+    if index is None:
+        if not os.path.exists(path + ".search"):
+            return
+        index = _indexes[path] = SearchIndex(path)
+    index.update()
+
+
+def _search_sqlite(path, query):
+    """Search a SQLite journal, narrowing the rows down in SQL before matching words."""
+    connection = SqliteStorage(path).connection
+    sql = ["SELECT id, prompt, verse FROM entries WHERE 1 = 1"]
+    parameters = []
+    terms = set(query.terms)
+    for term in terms:
+        sql.append("AND (prompt LIKE ? OR verse LIKE ?)")
+        parameters += [f"%{term}%"] * 2
+    if query.rasa_ids:
+        sql.append(f"AND rasa_id IN ({', '.join('?' * len(query.rasa_ids))})")
+        parameters += sorted(query.rasa_ids)
+    if query.start is not None:
+        sql.append("AND entry_date BETWEEN ? AND ?")
+        parameters += [query.start.isoformat(), query.end.isoformat()]
+    sql.append("ORDER BY id")
+
+    # LIKE also matches inside longer words, so check the words themselves
+    rows = [entry_id for entry_id, prompt, verse in connection.execute(" ".join(sql), parameters)
+            if terms.issubset(row_terms(prompt, verse))]
+
+    def read_rows(entry_ids):
+        for entry_id in entry_ids:
+            record = connection.execute(
+                "SELECT entry_date, rasa_id, prompt, verse FROM entries WHERE id = ?",
+                (entry_id,)).fetchone()
+            yield record_to_entry(*record)
+
+    return SearchResults(rows, read_rows)
+
+
+# =================== Command line ===================
+def main(argv=None):
+    """Rebuild the search index of a journal, or run a query against it."""
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index of a mood journal.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="index the whole journal from scratch")
+    rebuild.add_argument("journal", nargs="?", default="mood_tracking.csv")
+    query = commands.add_parser("query", help='search the journal, e.g. "rain AND shantam in 2025"')
+    query.add_argument("query")
+    query.add_argument("--journal", default="mood_tracking.csv")
+    query.add_argument("--limit", type=int, default=20, help="number of entries to print")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.journal):
+        print(f"No journal found at {args.journal}.")
+        return 1
+
+    if args.command == "rebuild":
+        if args.journal.lower().endswith(SQLITE_SUFFIXES):
+            print("SQLite journals are searched without a separate index.")
+            return 0
+        start = time.perf_counter()
+        index = SearchIndex(args.journal)
+        with FileLock(index.lock_path):
+            index.rebuild()
+        print(f"Indexed {len(index.days)} rows and {len(index.terms)} words "
+              f"in {time.perf_counter() - start:.1f} s.")
+        return 0
+
+    try:
+        parsed = parse_query(args.query)
+    except ValueError as error:
+        print(error)
+        return 1
+    start = time.perf_counter()
+    results = search_journal(args.journal, parsed)
+    seconds = time.perf_counter() - start
+    for entry in results.page(0, args.limit):
+        print(f"{entry['Date']}  {entry['Mood']}: {entry['Verse']}")
+    print(f"{len(results)} matching entries in {seconds * 1000:.1f} ms.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Stats Service
+-------------
+A small local HTTP/JSON service that answers the questions of the mood summary and
+the entries view, for dashboards that cannot drive the menu. It uses only the
+standard library (asyncio) and listens on 127.0.0.1 only.
+
+Endpoints (GET; every response is JSON):
+- /months              : the months that have entries, e.g. ["2025-05", "2025-06"]
+- /months/2025-05      : a month's mood counts, the mood of each day and the mood of
+                         the month, as in view_stats()
+- /rasas/shantam       : a page of a rasa's entries, as in view_all_entries();
+                         ?page=2, ?per_page=20, or ?from=05 May 2025 to start at the
+                         first entry on or after a date
+- /range?q=last 90 days: the mood counts and mood of the period for any date range
+                         accepted by analytics.parse_range()
+- /health              : the rows held in memory and the journal bytes they cover
+
+Errors are answered as JSON too: 400 or 404 for a bad request, and 500 (with the
+traceback printed to stderr) for anything unexpected.
+
+The journal is kept parsed in memory: the month rollups and rasa posting lists of a
+JournalIndex, and the per-day running totals of a RangeCounter. Before answering, the
+service compares the journal's size and modification time with what it has read.
+If the journal only grew, just the appended rows are read; if it was rewritten, it
+is read again. File access always happens in worker threads (asyncio.to_thread), and
+requests that arrive while a check is running share it, so hundreds of concurrent
+requests never queue up on the disk. The in-memory journal itself is only changed on
+the event loop, between requests' reads.
+
+Each journal row is expected to sit on its own line, as written by start_journaling().
+
+    python stats_service.py --journal mood_tracking.csv --port 8765
+    curl "http://127.0.0.1:8765/months/2025-05"
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import traceback
+from array import array
+from collections import namedtuple
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from analytics import JournalColumns, RangeCounter, parse_range
+from calendar_render import mood_of_the_period
+from fast_reader import first_row, mapped, rows_between
+from journal_index import JournalIndex, parse_entry_date
+from rasas import REGISTRY
+from storage import SQLITE_SUFFIXES
+
+# The service only accepts connections from this machine
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Entries per page of /rasas/<rasa>, by default and at most
+ENTRIES_PER_PAGE = 10
+MAX_PER_PAGE = 100
+
+# Number of bytes at the end of the parsed part of the journal used to recognise it
+TAIL_BYTES = 64
+
+# Seconds a kept-alive connection may wait for its next request
+IDLE_TIMEOUT = 30
+
+# Most header lines read from one request
+MAX_HEADER_LINES = 100
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """An error answered with the given HTTP status and a JSON error message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# =================== In-memory journal ===================
+# What a check of the journal found: the new rows as (start, end, date, mood, day,
+# rasa number) tuples, a replacement index and counter (None if the rows were only
+# appended), and the journal's size, (size, mtime) signature and last bytes after them
+JournalChange = namedtuple("JournalChange", "rows index counter size signature tail")
+
+
+class JournalCache:
+    """The parsed journal held in memory, kept in step with the CSV on disk."""
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.index = JournalIndex(csv_path)
+        self.counter = RangeCounter(JournalColumns(array("l"), b""))
+        self.rows = 0
+        self.size = 0           # bytes of the journal read so far
+        self.signature = None   # (size, mtime_ns) of the journal when last checked
+        self.tail = b""         # the last TAIL_BYTES of the bytes read so far
+        self._check = None      # the check in progress, shared by concurrent requests
+
+    async def refresh(self):
+        """Bring the cache up to date with the journal, sharing one check between concurrent callers."""
+        if self._check is None:
+            self._check = asyncio.ensure_future(self._update())
+        # A cancelled request must not cancel the check the others are waiting for
+        await asyncio.shield(self._check)
+
+    async def _update(self):
+        try:
+            change = await asyncio.to_thread(read_changes, self.csv_path, self.size, self.signature, self.tail)
+            if change is not None:
+                self._apply(change)
+        finally:
+            self._check = None
+
+    def _apply(self, change):
+        if change.index is not None:
+            self.index, self.counter, self.rows = change.index, change.counter, len(change.rows)
+        else:
+            for start, end, entry_date, mood, day, rasa_id in change.rows:
+                self.index.add_row(start, end, entry_date, mood)
+                if day is not None and rasa_id is not None:
+                    self.counter.add(day, rasa_id)
+            self.rows += len(change.rows)
+        self.size, self.signature, self.tail = change.size, change.signature, change.tail
+
+
+def read_changes(csv_path, size, signature, tail):
+    """
+    Check the journal against what was read before; runs in a worker thread.
+
+    Returns None if the journal is unchanged, a JournalChange with only the rows
+    after byte size if the journal only grew, or a JournalChange with a new index
+    and counter of the whole journal otherwise. Only complete lines are read.
+    """
+    try:
+        stat = os.stat(csv_path)
+    except FileNotFoundError:
+        if signature is None:
+            return None
+        return JournalChange([], JournalIndex(csv_path), RangeCounter(JournalColumns(array("l"), b"")),
+                             0, None, b"")
+    current = (stat.st_size, stat.st_mtime_ns)
+    if current == signature:
+        return None
+
+    with mapped(csv_path) as data:
+        end = data.rfind(b"\n") + 1
+        appended = size and len(data) > size and data[size - len(tail):size] == tail
+        start = size if appended else first_row(data)
+        rows = [(row_start, row_end, entry_date, mood) + _day_and_rasa(entry_date, mood)
+                for row_start, row_end, entry_date, mood in rows_between(data, start, max(end, start))]
+        new_tail = data[max(end - TAIL_BYTES, 0):end]
+    if appended:
+        return JournalChange(rows, None, None, max(end, size), current, new_tail if end > size else tail)
+
+    index = JournalIndex(csv_path)
+    days = array("l")
+    rasas = bytearray()
+    for row_start, row_end, entry_date, mood, day, rasa_id in rows:
+        index.add_row(row_start, row_end, entry_date, mood)
+        if day is not None and rasa_id is not None:
+            days.append(day)
+            rasas.append(rasa_id)
+    # RangeCounter needs the days in order; entries of the same day keep their order
+    order = sorted(range(len(days)), key=days.__getitem__)
+    columns = JournalColumns(array("l", (days[i] for i in order)), bytes(rasas[i] for i in order))
+    return JournalChange(rows, index, RangeCounter(columns), end, current, new_tail)
+
+
+def _day_and_rasa(entry_date, mood):
+    # (date ordinal, rasa number) of a row, with None for an unreadable date or unknown rasa
+    try:
+        day = parse_entry_date(entry_date).toordinal()
+    except (TypeError, ValueError):
+        day = None
+    return day, REGISTRY.id_of(mood)
+
+
+# =================== Endpoints ===================
+def mood_of_the_period_json(mood_count):
+    """Return the most recorded mood of a period as JSON, or None if nothing was recorded."""
+    if not mood_count:
+        return None
+    mood, meaning = mood_of_the_period(mood_count)
+    return {"rasa": mood, "meaning": meaning}
+
+
+def months_response(cache):
+    return {"months": sorted(cache.index.rollups)}
+
+
+def month_response(cache, key):
+    try:
+        parsed = datetime.strptime(key, "%Y-%m")
+    except ValueError:
+        raise HttpError(400, "Months are written as YYYY-MM, e.g. 2025-05.") from None
+    mood_count, mood_by_day = cache.index.month_summary(parsed.year, parsed.month)
+    return {"month": key,
+            "counts": mood_count,
+            "days": {str(day): mood for day, mood in sorted(mood_by_day.items())},
+            "mood_of_the_month": mood_of_the_period_json(mood_count)}
+
+
+async def rasa_response(cache, rasa, params):
+    rasa_id = REGISTRY.id_of(rasa)
+    if rasa_id is None:
+        raise HttpError(404, f"Unknown rasa: {rasa}")
+    name = REGISTRY.names[rasa_id]
+    index = cache.index
+
+    try:
+        per_page = min(max(int(params.get("per_page", ENTRIES_PER_PAGE)), 1), MAX_PER_PAGE)
+        if "from" in params:
+            first = index.rasa_position(name, datetime.strptime(params["from"], '%d %b %Y').date())
+        else:
+            first = (max(int(params.get("page", 1)), 1) - 1) * per_page
+    except ValueError:
+        raise HttpError(400, "page and per_page are numbers; from is a date like 05 May 2025.") from None
+
+    total = index.rasa_count(name)
+    # The page is looked up in the index here on the event loop; only reading its
+    # rows from the journal happens in a worker thread
+    offsets = index.rasa_offsets(name, first, per_page)
+    entries = await asyncio.to_thread(lambda: list(index.read_rows(offsets)))
+    return {"rasa": name,
+            "total": total,
+            "first": first,
+            "per_page": per_page,
+            "entries": [{"date": entry.date, "prompt": entry.prompt, "verse": entry.verse} for entry in entries]}
+
+
+def range_response(cache, params):
+    if "q" not in params:
+        raise HttpError(400, 'Give the range as ?q=..., e.g. ?q=last 90 days or ?q=Jan 2023 - Jun 2025.')
+    try:
+        start, end = parse_range(params["q"])
+    except ValueError as error:
+        raise HttpError(400, str(error)) from None
+    counts = cache.counter.count(start, end)
+    mood_count = {REGISTRY.names[rasa_id]: count for rasa_id, count in counts.items() if count}
+    return {"start": start.isoformat(),
+            "end": end.isoformat(),
+            "counts": mood_count,
+            "mood_of_the_period": mood_of_the_period_json(mood_count)}
+
+
+async def respond(cache, method, target):
+    """Return (status, JSON body) for a request."""
+    if method != "GET":
+        return 405, {"error": "Only GET requests are supported."}
+    url = urlsplit(target)
+    params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+    parts = [unquote(part) for part in url.path.split("/") if part]
+
+    try:
+        await cache.refresh()
+        if parts == ["health"]:
+            return 200, {"journal": cache.csv_path, "rows": cache.rows, "bytes": cache.size}
+        if parts == ["months"]:
+            return 200, months_response(cache)
+        if len(parts) == 2 and parts[0] == "months":
+            return 200, month_response(cache, parts[1])
+        if len(parts) == 2 and parts[0] == "rasas":
+            return 200, await rasa_response(cache, parts[1], params)
+        if parts == ["range"]:
+            return 200, range_response(cache, params)
+        raise HttpError(404, f"Unknown endpoint: {url.path}")
+    except HttpError as error:
+        return error.status, {"error": str(error)}
+    except Exception:
+        # Log anything unexpected and still answer, instead of dropping the connection
+        print(f"Error answering {method} {target}:", file=sys.stderr)
+        traceback.print_exc()
+        return 500, {"error": "Internal error; see the service log."}
+
+
+# =================== HTTP ===================
+async def handle_connection(reader, writer, cache):
+    """Answer the requests of one connection, keeping it open between requests if asked to."""
+    try:
+        while True:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            if not request_line:
+                break
+
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            words = request_line.decode("latin-1").split()
+            if len(words) != 3 or not words[2].startswith("HTTP/"):
+                status, body, keep_alive = 400, {"error": "Malformed request line."}, False
+            else:
+                method, target, version = words
+                status, body = await respond(cache, method, target)
+                connection = headers.get("connection", "").lower()
+                keep_alive = (status != 405 and connection != "close"
+                              and (version == "HTTP/1.1" or connection == "keep-alive"))
+
+            payload = json.dumps(body).encode("utf-8")
+            writer.write((f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                          f"Content-Type: application/json\r\n"
+                          f"Content-Length: {len(payload)}\r\n"
+                          f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+                         + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(csv_path, port=DEFAULT_PORT):
+    """Read the journal, then serve requests on HOST:port until cancelled."""
+    cache = JournalCache(csv_path)
+    await cache.refresh()
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(reader, writer, cache),
+                                        HOST, port, backlog=1024)
+    print(f"Serving {csv_path} ({cache.rows} entries) on http://{HOST}:{port}/")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve mood summaries of a journal as JSON on localhost.")
+    parser.add_argument("--journal", default=os.environ.get("NAVARASAM_JOURNAL", "mood_tracking.csv"))
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    if args.journal.lower().endswith(SQLITE_SUFFIXES):
+        print("The stats service reads CSV journals.")
+        return 1
+    try:
+        asyncio.run(serve(args.journal, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        print(f"Could not start the service: {error}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""
+Journal Storage
+---------------
+Storage backends for the mood journal. The main program talks to a storage object
+instead of opening "mood_tracking.csv" itself, so the journal can live either in
+the original CSV file or in a SQLite database.
+
+Backends:
+- CsvStorage    : the original CSV layout, read through the sidecar journal index and
+                  written through journal_writer, which is safe for concurrent processes.
+- SqliteStorage : a SQLite database with an ISO date column, a rasa id column and
+                  indexes on (date) and (rasa, date), so month and rasa queries are
+                  index range scans.
+
+Both backends exchange entries as dictionaries keyed by the CSV column names
+(Date, Mood, Meaning, Color, Prompt, Verse).
+
+For imports, both backends also provide bulk_writer(), which writes many entries
+through one open file or connection and commits them in groups of rows.
+
+Existing CSV journals can be migrated to SQLite in one go:
+    python storage.py migrate mood_tracking.csv [more.csv ...] mood_tracking.db
+
+A database that already has entries is only added to with --append, so running a
+migration twice does not duplicate the journal.
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+
+import instrumentation
+from journal_index import JournalIndex
+from journal_writer import JournalWriter
+from rasas import REGISTRY
+
+# File extensions that select the SQLite backend
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Number of rows a bulk writer collects before committing them
+GROUP_COMMIT_ROWS = 1000
+
+# Seconds a SQLite connection waits for another process's write lock
+BUSY_TIMEOUT = 30
+
+
+def open_storage(path):
+    """Return the storage backend for path, chosen by its file extension."""
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteStorage(path)
+    return CsvStorage(path)
+
+
+# =================== CSV backend ===================
+class CsvStorage:
+    """
+    Journal stored in the original CSV layout, queried through the journal index.
+
+    Appends go through a JournalWriter, so several processes can write to the same
+    journal safely.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = JournalWriter(path)
+
+    @property
+    def index(self):
+        # Load the journal index on first use; the writer shares it. A stale index is
+        # rebuilt under the journal lock, so appends by other processes wait for it
+        if self.writer.index is None:
+            with instrumentation.phase("load_index"):
+                self.writer.index = JournalIndex.load(self.path)
+        return self.writer.index
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def append(self, entry):
+        """Append one entry to the CSV, writing the header first if the file is new."""
+        self.writer.append([entry])
+
+    def bulk_writer(self, group_size=GROUP_COMMIT_ROWS):
+        """Return a CsvBulkWriter that appends entries to this journal in groups."""
+        return CsvBulkWriter(self, group_size)
+
+    def recover(self):
+        """Repair the journal after a crashed write and commit entries left pending."""
+        if self.exists() or os.path.exists(self.writer.wal_path):
+            self.writer.recover()
+
+    def month_summary(self, year, month):
+        return self.index.month_summary(year, month)
+
+    def month_rows(self, year, month):
+        return self.index.month_rows(year, month)
+
+    def recorded_months(self):
+        """Return the (year, month) pairs that have entries, in date order."""
+        return sorted((int(key[:4]), int(key[5:7])) for key in self.index.rollups)
+
+    def rasa_count(self, rasa):
+        return self.index.rasa_count(rasa)
+
+    def rasa_position(self, rasa, entry_date):
+        return self.index.rasa_position(rasa, entry_date)
+
+    def rasa_rows(self, rasa, first, count):
+        return self.index.rasa_rows(rasa, first, count)
+
+    def close(self):
+        self.writer.close()
+
+
+class CsvBulkWriter:
+    """
+    Appends many entries to a CSV journal in groups.
+
+    Entries are collected and committed every group_size rows: the group is written
+    through the journal writer's open handle in one call, fsynced, and added to the
+    journal index's append log as one batch. The index snapshot is rewritten once,
+    when the bulk writer closes. Use it as a context manager so the last group is
+    committed then.
+    """
+
+    def __init__(self, storage, group_size):
+        self.storage = storage
+        self.group_size = group_size
+        self.pending = []
+        self.written = 0
+
+    def append(self, entry):
+        """Add one entry; the group is committed once it holds group_size rows."""
+        self.pending.append(entry)
+        if len(self.pending) >= self.group_size:
+            self.commit()
+
+    def commit(self):
+        """Write, fsync and index the pending entries."""
+        if not self.pending:
+            return
+        self.storage.writer.write(self.pending, compact=False)
+        self.written += len(self.pending)
+        self.pending.clear()
+
+    def close(self):
+        self.commit()
+        self.storage.writer.compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# =================== SQLite backend ===================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    entry_date TEXT NOT NULL,
+    rasa_id INTEGER NOT NULL,
+    prompt TEXT NOT NULL,
+    verse TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_date ON entries (entry_date);
+CREATE INDEX IF NOT EXISTS idx_entries_rasa_date ON entries (rasa_id, entry_date);
+"""
+
+
+def entry_to_record(entry):
+    """
+    Convert a CSV-style entry to an (ISO date, rasa id, prompt, verse) record.
+
+    Raises ValueError if the date cannot be parsed or the mood is not a known rasa.
+    """
+    entry_date = datetime.strptime(entry['Date'], '%d %b %Y').date()
+    rasa_id = REGISTRY.id_of(entry['Mood'])
+    if rasa_id is None:
+        raise ValueError(f"Unknown rasa: {entry['Mood']!r}")
+    return (entry_date.isoformat(), rasa_id, entry['Prompt'], entry['Verse'])
+
+
+def record_to_entry(iso_date, rasa_id, prompt, verse):
+    """Convert a stored record back to a CSV-style entry."""
+    return {"Date": date.fromisoformat(iso_date).strftime('%d %b %Y'),
+            "Mood": REGISTRY.names[rasa_id],
+            "Meaning": REGISTRY.meanings[rasa_id],
+            "Color": REGISTRY.colors[rasa_id],
+            "Prompt": prompt,
+            "Verse": verse}
+
+
+def month_bounds(year, month):
+    """Return the ISO dates of the first day of the month and of the next month."""
+    first = date(year, month, 1)
+    following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first.isoformat(), following.isoformat()
+
+
+class SqliteStorage:
+    """Journal stored in a SQLite database with indexed date and rasa columns."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        # Open the database and create the schema on first use
+        if self._connection is None:
+            # Wait for other processes' write transactions instead of failing at once
+            self._connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def append(self, entry):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO entries (entry_date, rasa_id, prompt, verse) VALUES (?, ?, ?, ?)",
+                entry_to_record(entry))
+
+    def recover(self):
+        # SQLite rolls back interrupted transactions itself when the database is opened
+        pass
+
+    def bulk_writer(self, group_size=GROUP_COMMIT_ROWS):
+        """Return a SqliteBulkWriter that inserts entries into this journal in groups."""
+        return SqliteBulkWriter(self, group_size)
+
+    def month_summary(self, year, month):
+        """Return (mood_count, mood_by_day) for a month, like the journal index rollup."""
+        mood_count = {}
+        mood_by_day = {}
+        cursor = self.connection.execute(
+            "SELECT entry_date, rasa_id FROM entries "
+            "WHERE entry_date >= ? AND entry_date < ? ORDER BY id",
+            month_bounds(year, month))
+        for iso_date, rasa_id in cursor:
+            mood = REGISTRY.names[rasa_id]
+            mood_count[mood] = mood_count.get(mood,0) + 1
+            mood_by_day[int(iso_date[8:10])] = mood
+        instrumentation.count("rows_matched", sum(mood_count.values()))
+        return mood_count, mood_by_day
+
+    def month_rows(self, year, month):
+        cursor = self.connection.execute(
+            "SELECT entry_date, rasa_id, prompt, verse FROM entries "
+            "WHERE entry_date >= ? AND entry_date < ? ORDER BY id",
+            month_bounds(year, month))
+        for record in cursor:
+            yield record_to_entry(*record)
+
+    def recorded_months(self):
+        """Return the (year, month) pairs that have entries, in date order."""
+        cursor = self.connection.execute(
+            "SELECT DISTINCT substr(entry_date, 1, 7) FROM entries ORDER BY 1")
+        return [(int(key[:4]), int(key[5:7])) for (key,) in cursor]
+
+    def rasa_count(self, rasa):
+        rasa_id = REGISTRY.id_of(rasa)
+        cursor = self.connection.execute(
+            "SELECT COUNT(*) FROM entries WHERE rasa_id = ?", (rasa_id,))
+        return cursor.fetchone()[0]
+
+    def rasa_position(self, rasa, entry_date):
+        rasa_id = REGISTRY.id_of(rasa)
+        cursor = self.connection.execute(
+            "SELECT COUNT(*) FROM entries WHERE rasa_id = ? AND entry_date < ?",
+            (rasa_id, entry_date.isoformat()))
+        return cursor.fetchone()[0]
+
+    def rasa_rows(self, rasa, first, count):
+        rasa_id = REGISTRY.id_of(rasa)
+        cursor = self.connection.execute(
+            "SELECT entry_date, rasa_id, prompt, verse FROM entries "
+            "WHERE rasa_id = ? ORDER BY entry_date, id LIMIT ? OFFSET ?",
+            (rasa_id, count, first))
+        for record in cursor:
+            yield record_to_entry(*record)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class SqliteBulkWriter:
+    """
+    Inserts many entries into a SQLite journal, committing one transaction every
+    group_size rows instead of one per entry. Use it as a context manager so the
+    last group is committed when the writer closes.
+    """
+
+    def __init__(self, storage, group_size):
+        self.storage = storage
+        self.group_size = group_size
+        self.pending = []
+        self.written = 0
+
+    def append(self, entry):
+        """Add one entry; the group is committed once it holds group_size rows."""
+        self.pending.append(entry_to_record(entry))
+        if len(self.pending) >= self.group_size:
+            self.commit()
+
+    def commit(self):
+        """Insert the pending rows in a single transaction."""
+        if not self.pending:
+            return
+        with self.storage.connection:
+            self.storage.connection.executemany(
+                "INSERT INTO entries (entry_date, rasa_id, prompt, verse) VALUES (?, ?, ?, ?)",
+                self.pending)
+        self.written += len(self.pending)
+        self.pending.clear()
+
+    def close(self):
+        self.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# =================== Migration ===================
+def migrate_csv_to_sqlite(csv_paths, db_path, append=False):
+    """
+    Copy every entry of the given CSV journals into a SQLite database.
+
+    All rows are validated first and inserted in a single transaction, so a bad row
+    leaves the database unchanged. Raises ValueError if the database already has
+    entries, unless append is True. Returns the number of entries migrated.
+    """
+    records = []
+    for csv_path in csv_paths:
+        with open(csv_path,"r",newline='',encoding="utf-8") as file:
+            # Line 1 is the header, so data rows start at line 2
+            for line_number, row in enumerate(csv.DictReader(file), start=2):
+                try:
+                    records.append(entry_to_record(row))
+                except (KeyError, ValueError) as error:
+                    raise ValueError(f"{csv_path}, line {line_number}: {error}") from error
+
+    storage = SqliteStorage(db_path)
+    try:
+        with storage.connection:
+            if not append:
+                existing = storage.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                if existing:
+                    raise ValueError(f"{db_path} already has {existing} entries; "
+                                     f"use --append to add these to them")
+            storage.connection.executemany(
+                "INSERT INTO entries (entry_date, rasa_id, prompt, verse) VALUES (?, ?, ?, ?)",
+                records)
+    finally:
+        storage.close()
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate mood journals from CSV to SQLite.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="copy CSV journals into a SQLite database")
+    migrate.add_argument("csv_paths", nargs="+", metavar="journal.csv")
+    migrate.add_argument("db_path", metavar="journal.db")
+    migrate.add_argument("--append", action="store_true",
+                         help="add to a database that already has entries")
+    args = parser.parse_args(argv)
+
+    try:
+        count = migrate_csv_to_sqlite(args.csv_paths, args.db_path, args.append)
+    except (OSError, ValueError) as error:
+        print(f"Migration failed: {error}")
+        return 1
+    print(f"Migrated {count} entries into {args.db_path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
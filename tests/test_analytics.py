@@ -0,0 +1,42 @@
+"""The session's cached date-range counter stays in step with the journal."""
+from datetime import date
+
+import pytest
+
+import analytics
+import navarasam_mood_tracker
+from storage import CsvStorage
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    path = str(tmp_path / "mood_tracking.csv")
+    monkeypatch.setattr(navarasam_mood_tracker, "JOURNAL_PATH", path)
+    monkeypatch.setattr(analytics, "_range_counters", {})
+    navarasam_mood_tracker.record_mood(CsvStorage(path), 1, "a prompt", "a verse")
+    return path
+
+
+def today_counts(path):
+    counts = analytics.range_counter_for(path).count(date.today(), date.today())
+    return {rasa_id: count for rasa_id, count in counts.items() if count}
+
+
+def test_recorded_entry_extends_the_cached_counter(journal):
+    assert today_counts(journal) == {1: 1}
+    navarasam_mood_tracker.record_mood(CsvStorage(journal), 2, "a prompt", "a verse")
+    assert today_counts(journal) == {1: 1, 2: 1}
+
+
+def test_entry_from_another_process_is_not_dropped(journal):
+    assert today_counts(journal) == {1: 1}
+    # Another process appends, then this session records its own entry
+    other = CsvStorage(journal)
+    other.append({"Date": date.today().strftime('%d %b %Y'), "Mood": "Veeram", "Meaning": "Courage",
+                  "Color": "orange", "Prompt": "No prompt", "Verse": "No verse today."})
+    other.writer.close()
+    navarasam_mood_tracker.record_mood(CsvStorage(journal), 2, "a prompt", "a verse")
+
+    fresh = analytics.RangeCounter(analytics.load_columns(journal)).count(date.today(), date.today())
+    assert today_counts(journal) == {rasa_id: count for rasa_id, count in fresh.items() if count}
+    assert today_counts(journal) == {1: 1, 2: 1, 5: 1}
@@ -0,0 +1,64 @@
+"""The binary journal converts losslessly to and from CSV and refuses damaged files."""
+import os
+
+import pytest
+
+from binary_journal import BinaryJournal, binary_to_csv, csv_to_binary
+from generate_journal import generate_journal
+from journal_index import JournalIndex
+
+# Rows the integer columns cannot describe on their own: custom prompts, old
+# meanings, a missing column and an extra one
+ODD_ROWS = ("03 Jan 2001,Hasyam,Laughter/Happiness,yellow,my own prompt,\"A verse, with a comma\"\r\n"
+            "01 Jan 2001,Shantam,Calm,grey,No prompt,No verse today.\r\n"
+            "02 Jan 2001,Karunam,Compassion/Sadness,blue,No prompt\r\n"
+            "04 Jan 2001,Veeram,Courage,orange,No prompt,No verse today.,extra\r\n")
+
+
+@pytest.fixture
+def journal(tmp_path):
+    path = str(tmp_path / "mood_tracking.csv")
+    generate_journal(path, 500)
+    with open(path,"a",encoding="utf-8",newline="") as file:
+        file.write(ODD_ROWS)
+    return path
+
+
+def test_round_trip_is_lossless(journal, tmp_path):
+    nvj_path = str(tmp_path / "journal.nvj")
+    back_path = str(tmp_path / "back.csv")
+    assert csv_to_binary(journal, nvj_path) == 504
+    assert binary_to_csv(nvj_path, back_path) == 504
+    with open(journal,"rb") as original, open(back_path,"rb") as back:
+        assert back.read() == original.read()
+
+
+def test_lookups_match_the_csv_index(journal, tmp_path):
+    nvj_path = str(tmp_path / "journal.nvj")
+    csv_to_binary(journal, nvj_path)
+    index = JournalIndex.load(journal)
+    with BinaryJournal(nvj_path) as binary:
+        assert not binary.is_sorted
+        for year, month in ((2000, 1), (2000, 12), (2001, 1)):
+            assert binary.month_summary(year, month) == index.month_summary(year, month)
+        assert len(list(binary.rasa_positions(2))) == index.rasa_count("hasyam")
+
+
+@pytest.mark.parametrize("cut", [1, 9, 100])
+def test_truncated_file_is_rejected(journal, tmp_path, cut):
+    nvj_path = str(tmp_path / "journal.nvj")
+    csv_to_binary(journal, nvj_path)
+    with open(nvj_path,"r+b") as file:
+        file.truncate(os.path.getsize(nvj_path) - cut)
+    with pytest.raises(ValueError):
+        BinaryJournal(nvj_path)
+
+
+def test_short_or_foreign_file_is_rejected(journal, tmp_path):
+    nvj_path = str(tmp_path / "journal.nvj")
+    for data in (b"", b"NVJ1", b"not a journal at all"):
+        with open(nvj_path,"wb") as file:
+            file.write(data)
+        open(nvj_path + ".verses","wb").close()
+        with pytest.raises(ValueError):
+            BinaryJournal(nvj_path)
@@ -0,0 +1,32 @@
+"""Bulk imports validate their settings and entries."""
+import io
+
+import pytest
+
+import bulk_import
+from storage import CsvStorage
+
+
+def test_group_size_below_one_is_rejected(tmp_path):
+    storage = CsvStorage(str(tmp_path / "mood_tracking.csv"))
+    source = ("import.jsonl", io.StringIO('{"Date":"2025-01-01","Mood":"Shantam"}\n'), "jsonl")
+    with pytest.raises(ValueError):
+        bulk_import.bulk_import([source], storage, group_size=0)
+    storage.close()
+
+
+@pytest.mark.parametrize("group_size", ["0", "-5", "many"])
+def test_group_size_option_must_be_positive(tmp_path, capsys, group_size):
+    with pytest.raises(SystemExit):
+        bulk_import.main(["-", "--journal", str(tmp_path / "mood_tracking.csv"), "--group-size", group_size])
+    assert "--group-size" in capsys.readouterr().err
+
+
+def test_import_in_groups(tmp_path):
+    storage = CsvStorage(str(tmp_path / "mood_tracking.csv"))
+    lines = "".join(f'{{"Date":"2025-01-{day:02d}","Mood":"Hasyam","Verse":"day {day}"}}\n' for day in range(1, 6))
+    lines += '{"Date":"2025-01-06","Mood":"Hasyam","Verse":"two\\nlines"}\n'
+    result = bulk_import.bulk_import([("import.jsonl", io.StringIO(lines), "jsonl")], storage, group_size=2)
+    assert (result.imported, result.skipped) == (5, 1)
+    assert storage.rasa_count("hasyam") == 5
+    storage.close()
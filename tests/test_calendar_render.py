@@ -0,0 +1,32 @@
+"""Batch rendering prepares each journal's index once, before the workers start."""
+from datetime import date
+
+import calendar_render
+from journal_index import JournalIndex
+
+JOURNAL = ("Date,Mood,Meaning,Color,Prompt,Verse\r\n"
+           "01 May 2025,Shantam,Peace/Tranquility,grey,No prompt,No verse today.\r\n"
+           "02 Jun 2025,Hasyam,Laughter/Happiness,yellow,No prompt,No verse today.\r\n")
+
+
+def test_range_tasks_leave_the_index_current(tmp_path):
+    path = str(tmp_path / "mood_tracking.csv")
+    with open(path,"w",encoding="utf-8",newline="") as file:
+        file.write(JOURNAL)
+
+    tasks = calendar_render.batch_tasks([path], str(tmp_path), "svg", (date(2025, 5, 1), date(2025, 6, 30)))
+
+    assert [months for _, months, _, _ in tasks] == [[(2025, 5), (2025, 6)]]
+    assert JournalIndex.read_existing(path).is_current()
+
+
+def test_batch_renders_every_month_in_range(tmp_path):
+    path = str(tmp_path / "mood_tracking.csv")
+    with open(path,"w",encoding="utf-8",newline="") as file:
+        file.write(JOURNAL)
+
+    written = calendar_render.render_batch([path], str(tmp_path / "out"), "svg",
+                                           (date(2025, 5, 1), date(2025, 6, 30)), workers=2)
+
+    assert [name.rsplit("_", 1)[1] for name in written] == ["2025-05.svg", "2025-06.svg"]
+    assert "Shantam" in open(written[0], encoding="utf-8").read()
@@ -0,0 +1,29 @@
+"""A fleet report skips journals it cannot read and reports the rest."""
+import os
+
+import fleet_report
+from binary_journal import csv_to_binary
+
+JOURNAL = ("Date,Mood,Meaning,Color,Prompt,Verse\r\n"
+           "01 May 2025,Shantam,Peace/Tranquility,grey,No prompt,No verse today.\r\n"
+           "02 May 2025,Hasyam,Laughter/Happiness,yellow,No prompt,No verse today.\r\n")
+
+
+def test_truncated_binary_journal_is_skipped(tmp_path):
+    csv_path = str(tmp_path / "ana.csv")
+    with open(csv_path,"w",encoding="utf-8",newline="") as file:
+        file.write(JOURNAL)
+    nvj_path = str(tmp_path / "ben.nvj")
+    csv_to_binary(csv_path, nvj_path)
+    with open(nvj_path,"r+b") as file:
+        file.truncate(os.path.getsize(nvj_path) - 3)
+    short_path = str(tmp_path / "cy.nvj")
+    with open(short_path,"wb") as file:
+        file.write(b"NVJ")
+    open(short_path + ".verses","wb").close()
+
+    read, rows, population, errors = fleet_report.aggregate_chunk([csv_path, nvj_path, short_path])
+
+    assert read == 1
+    assert [path for path, _ in errors] == [nvj_path, short_path]
+    assert population == {"2025-05": [1, {9: 1, 2: 1}]}
@@ -0,0 +1,128 @@
+"""
+The journal index: its snapshot and append log read back what was saved, it is
+rebuilt when the CSV changes behind its back, and its month and rasa lookups agree
+with a full scan of the journal.
+"""
+import csv
+import os
+from datetime import datetime
+
+import pytest
+
+import journal_index
+from generate_journal import generate_journal
+from journal_index import MAGIC, JournalIndex
+from journal_writer import JournalWriter
+
+
+def entry(entry_date, mood):
+    return {"Date": entry_date, "Mood": mood, "Meaning": "Peace", "Color": "white",
+            "Prompt": "No prompt", "Verse": "No verse today."}
+
+
+def scan(path):
+    """Return the journal's rows as (journal position, date, row) read with csv.DictReader."""
+    with open(path,"r",encoding="utf-8",newline="") as file:
+        return [(position, datetime.strptime(row['Date'], '%d %b %Y').date(), row)
+                for position, row in enumerate(csv.DictReader(file))]
+
+
+def rebuilt(path):
+    fresh = JournalIndex(path)
+    fresh.rebuild()
+    return fresh
+
+
+@pytest.fixture
+def journal(tmp_path):
+    path = str(tmp_path / "mood_tracking.csv")
+    generate_journal(path, 2_000)
+    JournalIndex.load(path)
+    # Rows dated before the rest of the journal, appended (and logged) at the end
+    writer = JournalWriter(path)
+    writer.append([entry("03 Jan 2000", "Veeram"), entry("01 Jan 2000", "Veeram")])
+    writer.close()
+    return path
+
+
+def test_snapshot_round_trip(journal):
+    index = JournalIndex.load(journal)
+    index.save()
+    with open(journal + ".idx","rb") as file:
+        assert file.read(len(MAGIC)) == MAGIC
+    assert not os.path.exists(journal + ".idx.log")
+
+    stored = JournalIndex.read_existing(journal)
+    assert stored.is_current()
+    assert stored.log_length == 0
+    assert stored.matches(rebuilt(journal))
+
+    # Saving again after reading only some of the postings keeps the others
+    stored.rasa_count("shantam")
+    stored.save()
+    assert JournalIndex.read_existing(journal).matches(rebuilt(journal))
+
+
+def test_append_log_is_replayed(journal):
+    index = JournalIndex.load(journal)
+    assert index.log_length == 2
+    assert index.matches(rebuilt(journal))
+    assert journal_index.main(["verify", journal]) == 0
+
+
+def test_truncated_snapshot_is_rebuilt(journal):
+    with open(journal + ".idx","r+b") as file:
+        file.truncate(os.path.getsize(journal + ".idx") - 4)
+    assert not JournalIndex.read_existing(journal).is_current()
+
+    index = JournalIndex.load(journal)
+    assert index.is_current()
+    assert index.matches(rebuilt(journal))
+
+
+def test_outside_edit_is_detected_and_rebuilt(journal):
+    # Rewrite the journal by hand, keeping every other row
+    with open(journal,"rb") as file:
+        lines = file.read().splitlines(keepends=True)
+    with open(journal,"wb") as file:
+        file.writelines(lines[:1] + lines[1::2])
+
+    assert journal_index.main(["verify", journal]) == 1
+    index = JournalIndex.load(journal)
+    assert index.is_current()
+    assert index.matches(rebuilt(journal))
+    assert sum(index.rasa_count(rasa) for rasa in index.sections.keys() | index.added.keys()) == len(lines) // 2
+    assert journal_index.main(["verify", journal]) == 0
+
+
+def test_month_lookups_match_a_full_scan(journal):
+    index = JournalIndex.load(journal)
+    rows = scan(journal)
+    months = sorted({(entry_date.year, entry_date.month) for _, entry_date, _ in rows})
+    for year, month in months:
+        in_month = [row for _, entry_date, row in rows if (entry_date.year, entry_date.month) == (year, month)]
+        counts = {}
+        for row in in_month:
+            counts[row['Mood']] = counts.get(row['Mood'], 0) + 1
+        mood_count, mood_by_day = index.month_summary(year, month)
+        assert mood_count == counts
+        assert mood_by_day == {int(row['Date'][:2]): row['Mood'] for row in in_month}
+        assert [(entry.date, entry.verse) for entry in index.month_rows(year, month)] == \
+            [(row['Date'], row['Verse']) for row in in_month]
+    assert index.month_summary(1999, 12) == ({}, {})
+
+
+@pytest.mark.parametrize("rasa", ["Shantam", "Veeram", "karunam"])
+def test_rasa_lookups_match_a_full_scan(journal, rasa):
+    index = JournalIndex.load(journal)
+    # Entries of a rasa come in date order, and in journal order within a day
+    expected = [row for _, _, row in sorted((entry_date, position, row) for position, entry_date, row in scan(journal)
+                                            if row['Mood'].lower() == rasa.lower())]
+    assert index.rasa_count(rasa) == len(expected)
+    page = list(index.rasa_rows(rasa, 1, 25))
+    assert [(entry.date, entry.verse) for entry in page] == [(row['Date'], row['Verse']) for row in expected[1:26]]
+
+    first_date = datetime.strptime(expected[10]['Date'], '%d %b %Y').date()
+    position = index.rasa_position(rasa, first_date)
+    assert expected[position]['Date'] == expected[10]['Date']
+    assert position == 0 or expected[position - 1]['Date'] != expected[10]['Date']
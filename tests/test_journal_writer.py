@@ -0,0 +1,175 @@
+"""
+Crash safety of the journal writer: a batch cut short while writing the CSV, entries
+left in the write-ahead log with no commit record, and the journal index's append log
+read back after a crash must all leave the journal and its index consistent, as must
+a reader rebuilding the index while another process appends.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import pytest
+
+import journal_index
+from journal_index import JournalIndex
+from journal_writer import JournalWriter, format_rows
+
+HEADER_LINE = b"Date,Mood,Meaning,Color,Prompt,Verse\r\n"
+
+
+def entry(day, mood="Shantam"):
+    return {"Date": f"{day:02d} May 2025", "Mood": mood, "Meaning": "Peace", "Color": "white",
+            "Prompt": "a quiet moment", "Verse": f"Verse {day}"}
+
+
+def wal_line(entry_id, journal_entry):
+    return (json.dumps({"id": entry_id, "entry": journal_entry}) + "\n").encode("utf-8")
+
+
+def read_rows(path):
+    with open(path,"rb") as file:
+        return file.read().splitlines(keepends=True)
+
+
+def assert_index_matches(path):
+    stored = JournalIndex.read_existing(path)
+    fresh = JournalIndex(path)
+    fresh.rebuild()
+    assert stored.is_current()
+    assert stored.matches(fresh)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    path = str(tmp_path / "mood_tracking.csv")
+    writer = JournalWriter(path)
+    writer.append([entry(1), entry(2, "Hasyam")])
+    writer.close()
+    return path
+
+
+def test_torn_tail_row_is_cut_off_and_written_again(journal):
+    # A crash while writing the CSV: the commit record is in place and half a row reached the CSV
+    queued = entry(3, "Karunam")
+    wal_bytes = wal_line("a" * 32, queued)
+    with open(journal + ".wal","wb") as file:
+        file.write(wal_bytes)
+    size = os.path.getsize(journal)
+    row, = format_rows([queued])
+    with open(journal + ".wal.commit","w",encoding="utf-8") as file:
+        json.dump({"size": size, "end": size + len(row), "wal_bytes": len(wal_bytes),
+                   "wal_digest": hashlib.sha256(wal_bytes).hexdigest()}, file)
+    with open(journal,"ab") as file:
+        file.write(row[:len(row) // 2])
+
+    writer = JournalWriter(journal)
+    writer.recover()
+    writer.close()
+
+    rows = read_rows(journal)
+    assert rows[0] == HEADER_LINE
+    assert rows[1:] == format_rows([entry(1), entry(2, "Hasyam"), queued])
+    assert not os.path.exists(journal + ".wal.commit")
+    assert not os.path.exists(journal + ".wal")
+    assert_index_matches(journal)
+
+
+def test_committed_batch_still_in_log_is_not_written_twice(journal, monkeypatch):
+    # A crash after the rows reached the CSV, before they were removed from the log
+    def crash(self, record):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(JournalWriter, "_trim_log", crash)
+    writer = JournalWriter(journal)
+    with pytest.raises(KeyboardInterrupt):
+        writer.append([entry(3, "Karunam")])
+    writer.close()
+    monkeypatch.undo()
+    assert os.path.exists(journal + ".wal.commit")
+
+    writer = JournalWriter(journal)
+    writer.recover()
+    writer.close()
+
+    assert read_rows(journal)[1:] == format_rows([entry(1), entry(2, "Hasyam"), entry(3, "Karunam")])
+    assert not os.path.exists(journal + ".wal")
+    assert_index_matches(journal)
+
+
+def test_pending_log_without_commit_record_is_drained(journal):
+    # Entries queued by a process that died before taking the journal lock, the last
+    # one cut short while it was being queued
+    queued = [entry(3, "Karunam"), entry(4, "Raudram")]
+    with open(journal + ".wal","wb") as file:
+        file.write(wal_line("b" * 32, queued[0]) + wal_line("c" * 32, queued[1]))
+        file.write(wal_line("d" * 32, entry(5))[:20])
+    assert not os.path.exists(journal + ".wal.commit")
+
+    writer = JournalWriter(journal)
+    writer.recover()
+    writer.close()
+
+    assert read_rows(journal)[1:] == format_rows([entry(1), entry(2, "Hasyam")] + queued)
+    assert not os.path.exists(journal + ".wal")
+    assert_index_matches(journal)
+
+
+def test_index_log_is_replayed_after_a_crash(journal):
+    for day in (3, 4, 5):
+        writer = JournalWriter(journal)
+        writer.append([entry(day, "Veeram")])
+        writer.close()
+
+    # A new process finds the appends in the log rather than in the snapshot
+    index = JournalIndex.load(journal)
+    assert index.log_length == 3
+    assert os.path.exists(journal + ".idx.log")
+    assert index.rasa_count("veeram") == 3
+    assert_index_matches(journal)
+
+
+def test_torn_index_log_line_leads_to_a_rebuild(journal):
+    # A crash after a row reached the CSV but while its log line was being written
+    row, = format_rows([entry(3, "Bhayanakam")])
+    start = os.path.getsize(journal)
+    with open(journal,"ab") as file:
+        file.write(row)
+    with open(journal + ".idx.log","ab") as file:
+        file.write(json.dumps({"n": 1, "start": start, "end": start + len(row)}).encode("utf-8")[:25])
+
+    index = JournalIndex.load(journal)
+    assert index.is_current()
+    assert index.rasa_count("bhayanakam") == 1
+    assert_index_matches(journal)
+
+    # Later appends are logged on top of the rebuilt index
+    writer = JournalWriter(journal)
+    writer.append([entry(4, "Bhayanakam")])
+    writer.close()
+    assert JournalIndex.load(journal).rasa_count("bhayanakam") == 2
+    assert_index_matches(journal)
+
+
+def test_rebuild_does_not_miss_a_concurrent_append(journal, monkeypatch):
+    # The index is stale, and another writer appends while a reader rebuilds it
+    row, = format_rows([entry(3, "Veeram")])
+    with open(journal,"ab") as file:
+        file.write(row)
+
+    appender = threading.Thread(target=lambda: JournalWriter(journal).append([entry(4, "Veeram")]))
+    scan = journal_index.iter_rows
+
+    def scan_while_appending(*args):
+        rows = scan(*args)
+        yield next(rows)
+        appender.start()
+        appender.join(timeout=0.5)
+        yield from rows
+    monkeypatch.setattr(journal_index, "iter_rows", scan_while_appending)
+
+    JournalIndex.load(journal)
+    appender.join()
+    monkeypatch.undo()
+
+    assert JournalIndex.load(journal).rasa_count("veeram") == 2
+    assert_index_matches(journal)
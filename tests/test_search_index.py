@@ -0,0 +1,106 @@
+"""
+The search index: built from a journal, extended as rows are appended, rebuilt
+when the journal is rewritten, and always answering like a full scan would.
+"""
+import csv
+import os
+from datetime import datetime
+
+import pytest
+
+from generate_journal import generate_journal
+from journal_writer import JournalWriter
+from rasas import REGISTRY
+from search_index import SearchIndex, parse_query, row_terms
+
+QUERIES = ["rain", "rain AND storm", "shantam", "karunam river", "bloom in 2001", "silence in Mar 2000 - Jun 2000",
+           "hasyam in May 2000"]
+
+
+def entry(entry_date, mood, verse):
+    return {"Date": entry_date, "Mood": mood, "Meaning": "Peace", "Color": "white",
+            "Prompt": "No prompt", "Verse": verse}
+
+
+def scan_matches(path, query):
+    """Return the ids of the rows matching a query, found by reading every row."""
+    with open(path,"r",encoding="utf-8",newline="") as file:
+        rows = list(csv.DictReader(file))
+    matches = []
+    for row_id, row in enumerate(rows):
+        day = datetime.strptime(row['Date'], '%d %b %Y').date()
+        if (set(query.terms) <= set(row_terms(row['Prompt'], row['Verse']))
+                and (not query.rasa_ids or REGISTRY.id_of(row['Mood']) in query.rasa_ids)
+                and (query.start is None or query.start <= day <= query.end)):
+            matches.append(row_id)
+    return matches
+
+
+def assert_answers_like_a_scan(index, path):
+    for text in QUERIES:
+        query = parse_query(text)
+        assert index.search(query) == scan_matches(path, query), text
+
+
+@pytest.fixture
+def journal(tmp_path):
+    path = str(tmp_path / "mood_tracking.csv")
+    generate_journal(path, 1_500)
+    return path
+
+
+def built(path):
+    index = SearchIndex(path)
+    index.rebuild()
+    return index
+
+
+def test_first_load_indexes_the_journal(journal):
+    # Without a snapshot the rows are indexed into the log, like any appended rows
+    assert_answers_like_a_scan(SearchIndex.load(journal), journal)
+    assert_answers_like_a_scan(SearchIndex.load(journal), journal)
+
+
+def test_build_and_query(journal):
+    index = built(journal)
+    assert os.path.exists(journal + ".search")
+    assert not os.path.exists(journal + ".search.log")
+    assert_answers_like_a_scan(index, journal)
+
+    rows = index.search(parse_query("rain AND storm"))
+    entries = list(index.read_rows(rows[:3]))
+    assert all({"rain", "storm"} <= set(row_terms(item.prompt, item.verse)) for item in entries)
+
+    # A fresh process reads the snapshot instead of the journal
+    assert_answers_like_a_scan(SearchIndex.load(journal), journal)
+
+
+def test_appended_rows_are_indexed_incrementally(journal):
+    index = built(journal)
+    writer = JournalWriter(journal)
+    # Also a row dated before the rest, so the dates are no longer in order
+    writer.append([entry("10 Jun 2001", "Karunam", "River of rain"),
+                   entry("05 Jan 1999", "Shantam", "Rain before it all")])
+    writer.close()
+
+    index.update()
+    assert index.log_rows == 2
+    assert not index.days_sorted
+    assert_answers_like_a_scan(index, journal)
+    assert index.search(parse_query("rain in 1999")) == [1_501]
+
+    reloaded = SearchIndex.load(journal)
+    assert reloaded.log_rows == 2
+    assert_answers_like_a_scan(reloaded, journal)
+
+
+def test_rewritten_journal_is_reindexed(journal):
+    index = built(journal)
+    with open(journal,"rb") as file:
+        lines = file.read().splitlines(keepends=True)
+    with open(journal,"wb") as file:
+        file.writelines(lines[:1] + lines[:0:-1])
+
+    index.update()
+    assert index.log_rows == 0
+    assert_answers_like_a_scan(index, journal)
@@ -0,0 +1,29 @@
+"""
+The startup and menu latency budgets of benchmarks/startup_budget.py, as tests:
+importing the tracker stays within IMPORT_BUDGET_MS without loading tkinter or the
+calendar modules, and a menu iteration stays within MENU_BUDGET_MS without
+starting a process.
+"""
+import os
+import statistics
+
+import startup_budget
+
+
+def test_import_within_budget():
+    results = [startup_budget.run_child(startup_budget.IMPORT_SCRIPT) for _ in range(5)]
+    median_ms = statistics.median(result['seconds'] for result in results) * 1000
+    assert median_ms <= startup_budget.IMPORT_BUDGET_MS
+
+
+def test_import_defers_calendar_modules():
+    result = startup_budget.run_child(startup_budget.IMPORT_SCRIPT)
+    assert result['loaded'] == []
+
+
+def test_menu_within_budget_and_starts_no_process(tmp_path):
+    environment = dict(os.environ, NAVARASAM_JOURNAL=str(tmp_path / "mood_tracking.csv"))
+    result = startup_budget.run_child(startup_budget.MENU_SCRIPT, environment)
+    iteration_ms = result['seconds'] * 1000 / (startup_budget.MENU_ITERATIONS + 1)
+    assert iteration_ms <= startup_budget.MENU_BUDGET_MS
+    assert result['spawned'] == []
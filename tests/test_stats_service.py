@@ -0,0 +1,42 @@
+"""The stats service only changes its in-memory journal on the event loop."""
+import asyncio
+import threading
+
+import stats_service
+from journal_index import JournalIndex
+from journal_writer import JournalWriter
+
+
+def entry(day, mood):
+    return {"Date": f"{day:02d} May 2025", "Mood": mood, "Meaning": "Peace", "Color": "white",
+            "Prompt": "a quiet moment", "Verse": f"Verse {day}"}
+
+
+def test_rasa_page_reads_postings_on_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "mood_tracking.csv")
+    writer = JournalWriter(path)
+    writer.append([entry(2, "Shantam"), entry(3, "Hasyam")])
+
+    loop_thread = []
+    postings = JournalIndex._postings
+
+    def postings_on_loop(index, rasa):
+        assert threading.current_thread() is loop_thread[0]
+        return postings(index, rasa)
+    monkeypatch.setattr(JournalIndex, "_postings", postings_on_loop)
+
+    async def pages():
+        loop_thread.append(threading.current_thread())
+        cache = stats_service.JournalCache(path)
+        await cache.refresh()
+        first = await stats_service.rasa_response(cache, "shantam", {})
+        # Rows appended since are merged into the posting list when the page is read
+        writer.append([entry(1, "Shantam")])
+        await cache.refresh()
+        second = await stats_service.rasa_response(cache, "shantam", {})
+        return first, second
+
+    first, second = asyncio.run(pages())
+    writer.close()
+    assert [row['date'] for row in first['entries']] == ["02 May 2025"]
+    assert [row['date'] for row in second['entries']] == ["01 May 2025", "02 May 2025"]
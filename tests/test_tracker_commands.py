@@ -0,0 +1,37 @@
+"""The tracker's non-interactive commands."""
+import csv
+
+import pytest
+
+import navarasam_mood_tracker
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    path = str(tmp_path / "mood_tracking.csv")
+    monkeypatch.setattr(navarasam_mood_tracker, "JOURNAL_PATH", path)
+    return path
+
+
+def read_entries(path):
+    with open(path,"r",encoding="utf-8",newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def test_add_keeps_a_prompt_given_without_a_verse(journal):
+    assert navarasam_mood_tracker.main(["add", "--rasa", "2", "--prompt", "my prompt"]) == 0
+    entry, = read_entries(journal)
+    assert (entry['Mood'], entry['Prompt'], entry['Verse']) == ("Hasyam", "my prompt", "No verse today.")
+
+
+def test_add_with_prompt_and_verse(journal):
+    assert navarasam_mood_tracker.main(["add", "--rasa", "shantam", "--prompt", "a prompt",
+                                        "--verse", " still water "]) == 0
+    entry, = read_entries(journal)
+    assert (entry['Mood'], entry['Prompt'], entry['Verse']) == ("Shantam", "a prompt", "still water")
+
+
+def test_add_rejects_a_line_break(journal, capsys):
+    with pytest.raises(SystemExit):
+        navarasam_mood_tracker.main(["add", "--rasa", "2", "--verse", "two\nlines"])
+    assert "single line" in capsys.readouterr().err